@@ -41,6 +41,7 @@ class AdminPanel:
             '/admin_set': self.update_setting,
             '/admin_restart': self.restart_bot,
             '/admin_clean': self.clean_all_data,
+            '/admin_strategies': self.get_strategy_stats,
             # Süper admin komutları
             '/super_admin_info': self.get_super_admin_info,
             '/super_admin_promote': self.promote_to_super_admin,
@@ -96,6 +97,8 @@ class AdminPanel:
             'allowed_formats': ['mp3', 'mp4', 'avi', 'mkv'],
             'auto_delete_temp': True,
             'rate_limit_per_minute': 10,
+            'chat_rate_limit_per_minute': 30,
+            'audio_delivery': 'mp3',
             'maintenance_mode': False,
             'welcome_message': "Hoş geldiniz!",
             'banned_users': [],
@@ -248,6 +251,19 @@ class AdminPanel:
         for i, (command, count) in enumerate(top_commands, 1):
             stats_text += f"{i}. {command}: {count} kez\n"
         
+        # Disk kullanımı
+        from storage_manager import storage_manager
+        storage = storage_manager.get_status()
+        quota = f"{storage['quota_mb']} MB" if storage['quota_mb'] else "yok"
+        stats_text += (
+            f"\n💾 **Disk Kullanımı:**\n"
+            f"• Aktif İşler: {storage['jobs_mb']} MB ({len(storage['jobs'])} iş)\n"
+            f"• Medya Önbelleği: {storage['cache_mb']} MB\n"
+            f"• Toplam / Kota: {storage['total_mb']} MB / {quota}\n"
+            f"• Boş Disk: {storage['free_disk_mb']} MB\n"
+            f"• Reddedilen İş: {storage['rejected']}\n"
+        )
+        
         return stats_text
     
     def ban_user(self, user_id: int) -> bool:
@@ -294,9 +310,11 @@ class AdminPanel:
 • Max Dosya Boyutu: {max_file_size} MB
 • İzinli Formatlar: {allowed_formats}
 • Otomatik Temizlik: {auto_delete_temp}
+• Varsayılan Ses Modu: {audio_delivery}
 
 🚦 **Kısıtlamalar:**
 • Dakika Başına Limit: {rate_limit_per_minute}
+• Sohbet Başına Limit: {chat_rate_limit_per_minute}
 • Bakım Modu: {maintenance_mode}
 • Banlı Kullanıcı Sayısı: {banned_count}
 
@@ -309,7 +327,9 @@ class AdminPanel:
             max_file_size=self.settings['max_file_size'] // (1024*1024),
             allowed_formats=', '.join(self.settings['allowed_formats']),
             auto_delete_temp='✅' if self.settings['auto_delete_temp'] else '❌',
+            audio_delivery='Orijinal Ses' if self.settings.get('audio_delivery') == 'native' else 'MP3',
             rate_limit_per_minute=self.settings['rate_limit_per_minute'],
+            chat_rate_limit_per_minute=self.settings.get('chat_rate_limit_per_minute', self.settings['rate_limit_per_minute'] * 3),
             maintenance_mode='✅' if self.settings['maintenance_mode'] else '❌',
             banned_count=len(self.settings['banned_users']),
             video_download='✅' if self.settings['feature_flags']['video_download'] else '❌',
@@ -355,26 +375,20 @@ class AdminPanel:
             }
             self.save_stats()
             
-            # Geçici dosyaları temizle
-            import shutil
-            temp_dirs = ['downloads', 'temp']
-            cleaned_files = 0
-            
-            for temp_dir in temp_dirs:
-                if os.path.exists(temp_dir):
-                    for root, dirs, files in os.walk(temp_dir):
-                        for file in files:
-                            try:
-                                os.remove(os.path.join(root, file))
-                                cleaned_files += 1
-                            except:
-                                pass
+            # Biten işlerin dosyalarını ve medya önbelleğini temizle
+            from storage_manager import storage_manager
+            freed_mb = storage_manager.clean() / (1024 * 1024)
             
-            return f"🧹 **Temizlik tamamlandı!**\n🗑️ {cleaned_files} dosya silindi.\n📊 İstatistikler sıfırlandı."
+            return f"🧹 **Temizlik tamamlandı!**\n🗑️ {freed_mb:.1f} MB boşaltıldı.\n📊 İstatistikler sıfırlandı."
             
         except Exception as e:
             return f"❌ Temizlik hatası: {e}"
     
+    def get_strategy_stats(self) -> str:
+        """Bypass stratejilerinin başarı/gecikme istatistiklerini al"""
+        from strategy_registry import strategy_registry
+        return strategy_registry.get_stats_text()
+    
     def restart_bot(self):
         """Bot'u yeniden başlat"""
         return "Bot yeniden başlatılıyor..."
@@ -451,6 +465,10 @@ class AdminPanel:
                 InlineKeyboardButton("🧹 Temizle", callback_data="vk_admin_clean"),
                 InlineKeyboardButton("📝 Loglar", callback_data="vk_admin_logs")
             ],
+            [
+                InlineKeyboardButton("🧭 Stratejiler", callback_data="vk_admin_strategies"),
+                InlineKeyboardButton("🎧 Ses Modu", callback_data="vk_admin_audio")
+            ],
             [
                 InlineKeyboardButton("🔙 Ana Menü", callback_data="start_menu"),
                 InlineKeyboardButton("❌ Kapat", callback_data="vk_close")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+🎧 Naofumi Bot Akışlı MP3 Dönüştürme
+Kaynak ses akışını indirirken doğrudan ffmpeg'in stdin'ine aktarır;
+kaynak dosya diske yazılıp tekrar okunmaz, kodlama baytlar gelirken başlar.
+MP3 çıktısı bellek tamponu yerine iş klasöründeki dosyaya yazılır: process modunda işçi
+süreçten yalnızca dosya yolu döner, medya önbelleği ve Telegram yüklemesi de dosyadan okur
+(SpooledTemporaryFile da sınırı aşınca diske yazacaktı; kazanç kaynak dosyanın yazılmamasıdır)
+"""
+
+import os
+import shutil
+import subprocess
+import time
+import logging
+from http.cookiejar import CookieJar
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import requests
+from yt_dlp import YoutubeDL
+
+from bandwidth_manager import Pacer
+from config import DOWNLOAD_JOB_TIMEOUT
+from download_executor import download_executor
+from process_limits import kill_group
+from transcode_pool import transcode_pool, spawn_ffmpeg, check_memory, wait_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+# Tek HTTP isteğinde istenecek aralık (YouTube aralıksız uzun istekleri yavaşlatır)
+RANGE_CHUNK_SIZE = 10 * 1024 * 1024
+READ_SIZE = 64 * 1024
+
+
+def can_stream(info_dict: Dict) -> bool:
+    """Seçilen format tek parça HTTP(S) dosyası mı ve ffmpeg var mı?"""
+    if info_dict.get('requested_formats') or not info_dict.get('url'):
+        return False
+    if info_dict.get('protocol') not in ('http', 'https'):
+        return False
+    return shutil.which('ffmpeg') is not None
+
+
+def iter_ranges(session: requests.Session, url: str, headers: Dict,
+                total: Optional[int] = None) -> Iterator[Tuple[bytes, Optional[int]]]:
+    """
+    Kaynağı RANGE_CHUNK_SIZE'lık aralık istekleriyle oku, (parça, bilinen toplam boyut) üret.
+    Toplam boyut bilinmiyorsa (Content-Range: bytes a-b/*) istenen aralıktan kısa ya da boş
+    bir 206 gelene kadar devam edilir; aralığı yok sayan sunucuda (200) tek yanıt yeterlidir.
+    """
+    downloaded = 0
+    while total is None or downloaded < total:
+        start = downloaded
+        end = start + RANGE_CHUNK_SIZE - 1
+        if total:
+            end = min(end, total - 1)
+        response = session.get(
+            url, headers={**headers, 'Range': f'bytes={start}-{end}'},
+            stream=True, timeout=30
+        )
+        # Boyut bilinmezken dosya tam aralık sınırında bittiyse sonraki aralık 416 döner
+        if response.status_code == 416 and total is None and start:
+            response.close()
+            return
+        response.raise_for_status()
+
+        # Kesin toplam boyut Content-Range başlığından öğrenilir
+        content_range = response.headers.get('Content-Range', '')
+        if '/' in content_range and content_range.rsplit('/', 1)[1].isdigit():
+            total = int(content_range.rsplit('/', 1)[1])
+
+        received = 0
+        for chunk in response.iter_content(READ_SIZE):
+            received += len(chunk)
+            downloaded += len(chunk)
+            yield chunk, total
+
+        # 200: tüm dosya tek yanıtta geldi; boş ya da (boyut bilinmezken) kısa 206: dosyanın sonu
+        if response.status_code != 206 or not received or (total is None and received < end - start + 1):
+            return
+
+
+def stream_transcode(info_dict: Dict, output_file: str, bitrate: int,
+                     progress_callback: Optional[Callable[[Dict], None]] = None,
+                     pacer: Optional[Pacer] = None, timeout: int = DOWNLOAD_JOB_TIMEOUT,
+                     proxy: Optional[str] = None, cookies: Optional[CookieJar] = None):
+    """
+    Kaynağı aralıklı isteklerle indirip ffmpeg'e aktar, MP3 çıktısını output_file'a yaz.
+    İstekler yt-dlp'nin http_headers'ı, proxy'si ve çerezleriyle yapılır.
+    İlerleme olayları yt-dlp hook'larıyla aynı biçimdedir. Hata olursa yarım çıktı silinir.
+    """
+    url = info_dict['url']
+    headers = dict(info_dict.get('http_headers') or {})
+    total = info_dict.get('filesize')
+    deadline = time.time() + timeout if timeout else None
+
+    ffmpeg = spawn_ffmpeg(
+        [
+            '-hide_banner', '-loglevel', 'error',
+            '-i', 'pipe:0', *transcode_pool.ffmpeg_args('mp3', bitrate),
+            '-f', 'mp3', '-y', output_file
+        ],
+        stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+
+    def emit(status, downloaded):
+        if progress_callback:
+            event = {'status': status, 'filename': output_file, 'downloaded_bytes': downloaded}
+            if total:
+                event['total_bytes'] = total
+            progress_callback(event)
+
+    downloaded = 0
+    next_memory_check = 0.0
+    try:
+        with requests.Session() as session:
+            if proxy:
+                session.proxies = {'http': proxy, 'https': proxy}
+            if cookies is not None:
+                session.cookies.update(cookies)
+            for chunk, total in iter_ranges(session, url, headers, total):
+                if deadline and time.time() > deadline:
+                    raise TimeoutError(f"Akışlı dönüştürme {timeout} saniyeyi aştı")
+                # ffmpeg belleği en fazla saniyede bir ölçülür
+                if time.time() >= next_memory_check:
+                    next_memory_check = time.time() + 1.0
+                    check_memory(ffmpeg)
+                ffmpeg.stdin.write(chunk)
+                downloaded += len(chunk)
+                if pacer:
+                    pacer.throttle(len(chunk))
+                emit('downloading', downloaded)
+
+        ffmpeg.stdin.close()
+        wait_ffmpeg(ffmpeg, max(1, deadline - time.time()) if deadline else None)
+
+        emit('finished', downloaded)
+    except BaseException:
+        if ffmpeg.poll() is None:
+            kill_group(ffmpeg)
+            ffmpeg.wait()
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        raise
+    finally:
+        for pipe in (ffmpeg.stdin, ffmpeg.stderr):
+            try:
+                pipe.close()
+            except Exception:
+                pass
+
+
+def run_stream(ydl_opts: Dict, info_dict: Dict, bitrate: int,
+               progress_callback: Optional[Callable[[Dict], None]], pacer: Optional[Pacer]) -> Tuple[Dict, str]:
+    """Dosya adını yt-dlp şablonuyla belirle ve akışlı dönüştürmeyi çalıştır (download_executor işçisinde)"""
+    with YoutubeDL(ydl_opts) as ydl:
+        output_file = ydl.prepare_filename(info_dict).rsplit(".", 1)[0] + ".mp3"
+        stream_transcode(
+            info_dict, output_file, bitrate, progress_callback, pacer,
+            proxy=ydl_opts.get('proxy'), cookies=ydl.cookiejar
+        )
+    return info_dict, output_file
+
+
+async def transcode(ydl_opts: Dict, info_dict: Dict, bitrate: int,
+                    progress_callback: Optional[Callable[[Dict], None]] = None,
+                    pacer: Optional[Pacer] = None) -> Tuple[Dict, str]:
+    """
+    Akışlı dönüştürmeyi indirme havuzunda çalıştır (process modunda ayrı süreçte, zaman aşımında öldürülür).
+    yt-dlp ile aynı biçimde (info_dict, MP3 dosya yolu) döndürür.
+    """
+    start = time.time()
+    result = await download_executor.stream_mp3(ydl_opts, info_dict, bitrate, progress_callback, pacer)
+    logger.info(f"Akışlı MP3 dönüştürme tamamlandı ({time.time() - start:.1f} sn): {os.path.basename(result[1])}")
+    return result
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+📶 Naofumi Bot Bant Genişliği Yöneticisi
+Toplam bant genişliğini aktif indirme ve yüklemeler arasında ağırlıklı adil paylaştırır
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+from config import BANDWIDTH_TOTAL_MBPS, BANDWIDTH_FLOOR_KBPS, BANDWIDTH_CAP_MBPS
+
+logger = logging.getLogger(__name__)
+
+# Akış türü ağırlıkları: kısa ses işleri ve Telegram yüklemeleri büyük videonun gölgesinde kalmasın
+FLOW_WEIGHTS = {
+    'audio': 3,
+    'video': 1,
+    'upload': 2
+}
+
+
+class Pacer:
+    def __init__(self, rate: float = 0):
+        """Tek akış için token bucket hız ayarlayıcı (rate: byte/sn, 0 = sınırsız)"""
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.allowance = 0.0
+        self.last = time.monotonic()
+        self._last_bytes: Dict[str, int] = {}
+
+    def set_rate(self, rate: float):
+        with self.lock:
+            self.rate = rate
+
+    def consume(self, nbytes: int) -> float:
+        """nbytes harcandı; hızı aşmamak için beklenmesi gereken süreyi döndür"""
+        with self.lock:
+            now = time.monotonic()
+            elapsed, self.last = now - self.last, now
+            if not self.rate:
+                self.allowance = 0.0
+                return 0.0
+            # En fazla 1 saniyelik birikmiş hak (patlama sınırı)
+            self.allowance = min(self.rate, self.allowance + elapsed * self.rate) - nbytes
+            return -self.allowance / self.rate if self.allowance < 0 else 0.0
+
+    def throttle(self, nbytes: int):
+        """Thread içinden: gerekirse uyu"""
+        delay = self.consume(nbytes)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def athrottle(self, nbytes: int):
+        """Event loop içinden: gerekirse bekle"""
+        delay = self.consume(nbytes)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def progress_hook(self, data: Dict):
+        """yt-dlp progress hook'u: inen bayt farkı kadar hız ayarla"""
+        if data.get('status') != 'downloading':
+            return
+        key = data.get('filename') or ''
+        current = data.get('downloaded_bytes') or 0
+        previous = self._last_bytes.get(key, 0)
+        self._last_bytes[key] = current
+        if current > previous:
+            self.throttle(current - previous)
+
+
+class Flow:
+    def __init__(self, flow_id: int, kind: str, weight: float):
+        """Bant genişliği paylaşan tek bir indirme ya da yükleme"""
+        self.flow_id = flow_id
+        self.kind = kind
+        self.weight = weight
+        self.pacer = Pacer()
+        self.opened_at = time.time()
+
+
+class BandwidthManager:
+    def __init__(self, total_mbps: float = BANDWIDTH_TOTAL_MBPS,
+                 floor_kbps: float = BANDWIDTH_FLOOR_KBPS, cap_mbps: float = BANDWIDTH_CAP_MBPS):
+        """Bant genişliği yöneticisini başlat (0 = sınırsız)"""
+        self.total = total_mbps * 1_000_000 / 8        # byte/sn
+        self.floor = floor_kbps * 1000 / 8
+        self.cap = cap_mbps * 1_000_000 / 8
+        self.flows: Dict[int, Flow] = {}
+        self._flow_ids = itertools.count(1)
+
+    def open(self, kind: str) -> Flow:
+        """Yeni akışı kaydet ve payları yeniden dağıt"""
+        flow = Flow(next(self._flow_ids), kind, FLOW_WEIGHTS.get(kind, 1))
+        self.flows[flow.flow_id] = flow
+        self._rebalance()
+        return flow
+
+    def close(self, flow: Optional[Flow]):
+        """Biten akışı çıkar, payını diğerlerine dağıt"""
+        if flow and self.flows.pop(flow.flow_id, None):
+            self._rebalance()
+
+    def _rebalance(self):
+        """
+        Ağırlıklı max-min adil paylaşım: her akış önce tabanını alır,
+        kalan bant ağırlıklara göre dağıtılır; üst sınıra takılanların artanı diğerlerine geçer.
+        """
+        flows = list(self.flows.values())
+        if not flows:
+            return
+
+        if not self.total:
+            for flow in flows:
+                flow.pacer.set_rate(self.cap)
+            return
+
+        floor = min(self.floor, self.total / len(flows))
+        rates = {flow.flow_id: floor for flow in flows}
+        budget = self.total - floor * len(flows)
+        open_flows = list(flows)
+
+        while open_flows and budget > 0:
+            share = budget / sum(flow.weight for flow in open_flows)
+            capped = [
+                flow for flow in open_flows
+                if self.cap and rates[flow.flow_id] + share * flow.weight >= self.cap
+            ]
+            if not capped:
+                for flow in open_flows:
+                    rates[flow.flow_id] += share * flow.weight
+                break
+            for flow in capped:
+                budget -= self.cap - rates[flow.flow_id]
+                rates[flow.flow_id] = self.cap
+                open_flows.remove(flow)
+
+        for flow in flows:
+            flow.pacer.set_rate(rates[flow.flow_id])
+
+    def get_status(self) -> Dict:
+        """Aktif akışlar ve payları (Mbps)"""
+        return {
+            'total_mbps': round(self.total * 8 / 1_000_000, 1),
+            'flows': [
+                {
+                    'kind': flow.kind,
+                    'weight': flow.weight,
+                    'rate_mbps': round(flow.pacer.rate * 8 / 1_000_000, 2)
+                }
+                for flow in self.flows.values()
+            ]
+        }
+
+
+# Global instance
+bandwidth_manager = BandwidthManager()
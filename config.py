@@ -51,6 +51,89 @@ SUPPORTED_FORMATS = ['mp4', 'mp3', 'm4a', 'webm', 'mkv', 'avi']
 # Video süre sınırı (saniye)
 MAX_VIDEO_DURATION = int(os.getenv('MAX_VIDEO_DURATION', '3600'))  # 1 saat
 
+# İndirme havuzu (aynı anda çalışan yt-dlp işi sayısı)
+DOWNLOAD_WORKERS = int(os.getenv('DOWNLOAD_WORKERS', '3'))
+
+# İş izolasyonu: 'thread' veya 'process' (her iş ayrı süreçte, limitli)
+# Thread modunda yalnızca süre sınırı geçerlidir (iş başarısız sayılır, thread sonraki ilerlemede durur);
+# bellek ve CPU limitleri süreç bazlı olduğundan yalnızca process modunda uygulanır
+DOWNLOAD_POOL_MODE = os.getenv('DOWNLOAD_POOL_MODE', 'thread').lower()
+DOWNLOAD_JOB_TIMEOUT = int(os.getenv('DOWNLOAD_JOB_TIMEOUT', '900'))  # 15 dakika
+DOWNLOAD_JOB_MAX_MEMORY_MB = int(os.getenv('DOWNLOAD_JOB_MAX_MEMORY_MB', '1024'))  # Süreç grubunun RSS'i (ffmpeg dahil)
+DOWNLOAD_JOB_MAX_CPU_SECONDS = int(os.getenv('DOWNLOAD_JOB_MAX_CPU_SECONDS', '600'))
+
+# Hedged metadata çıkarma: en iyi K strateji kısa aralıklarla aynı anda denenir
+HEDGED_EXTRACTION = os.getenv('HEDGED_EXTRACTION', 'true').lower() == 'true'
+HEDGE_FANOUT = int(os.getenv('HEDGE_FANOUT', '3'))
+HEDGE_STAGGER = float(os.getenv('HEDGE_STAGGER', '1.5'))  # saniye
+
+# Gecikme profili: 'auto' (platform/giriş noktasına göre) ya da fast / balanced / stealth
+LATENCY_PROFILE = os.getenv('LATENCY_PROFILE', 'auto').lower()
+STEALTH_ERROR_THRESHOLD = int(os.getenv('STEALTH_ERROR_THRESHOLD', '3'))  # bu kadar bot koruması hatası olursa
+STEALTH_WINDOW = int(os.getenv('STEALTH_WINDOW', '600'))  # saniye içinde -> stealth
+
+# HLS/DASH parça eşzamanlılığı (ölçülen hıza göre AIMD ile ayarlanır)
+FRAGMENT_BUDGET = int(os.getenv('FRAGMENT_BUDGET', '8'))  # tüm işler için toplam
+FRAGMENT_INITIAL = int(os.getenv('FRAGMENT_INITIAL', '2'))
+FRAGMENT_MAX_PER_JOB = int(os.getenv('FRAGMENT_MAX_PER_JOB', '8'))
+
+# Bant genişliği: toplam (Mbps, 0 = sınırsız), akış başına taban (kbps) ve üst sınır (Mbps, 0 = yok)
+BANDWIDTH_TOTAL_MBPS = float(os.getenv('BANDWIDTH_TOTAL_MBPS', '0'))
+BANDWIDTH_FLOOR_KBPS = float(os.getenv('BANDWIDTH_FLOOR_KBPS', '512'))
+BANDWIDTH_CAP_MBPS = float(os.getenv('BANDWIDTH_CAP_MBPS', '0'))
+
+# İş zamanlayıcısı: aynı anda çalışan toplam iş ve kullanıcı başına iş sınırı
+SCHEDULER_MAX_ACTIVE = int(os.getenv('SCHEDULER_MAX_ACTIVE', str(DOWNLOAD_WORKERS)))
+MAX_JOBS_PER_USER = int(os.getenv('MAX_JOBS_PER_USER', '1'))
+
+# Dönüştürme havuzu: CPU bütçesi (çekirdek), iş başına ffmpeg thread'i, nice ve ffmpeg süreç limitleri
+TRANSCODE_CPU_BUDGET = int(os.getenv('TRANSCODE_CPU_BUDGET', str(os.cpu_count() or 1)))
+TRANSCODE_THREADS = int(os.getenv('TRANSCODE_THREADS', '1'))
+TRANSCODE_NICE = int(os.getenv('TRANSCODE_NICE', '10'))
+TRANSCODE_MAX_CPU_SECONDS = int(os.getenv('TRANSCODE_MAX_CPU_SECONDS', '600'))
+TRANSCODE_MAX_MEMORY_MB = int(os.getenv('TRANSCODE_MAX_MEMORY_MB', '512'))
+
+# Yük kontrolü: aşama slotları ve kuyruk eşiği (aşılırsa yeni işler reddedilir)
+# Dönüştürme slotları varsayılan olarak CPU bütçesine sığan iş sayısıdır
+DOWNLOAD_SLOTS = int(os.getenv('DOWNLOAD_SLOTS', str(DOWNLOAD_WORKERS)))
+TRANSCODE_SLOTS = int(os.getenv('TRANSCODE_SLOTS', str(max(1, TRANSCODE_CPU_BUDGET // max(1, TRANSCODE_THREADS)))))
+UPLOAD_SLOTS = int(os.getenv('UPLOAD_SLOTS', '2'))
+MAX_QUEUE_BACKLOG = int(os.getenv('MAX_QUEUE_BACKLOG', '20'))
+
+# Akışlı MP3 dönüştürme: kaynak ses diske yazılmadan indirilirken ffmpeg'e aktarılır
+STREAMING_TRANSCODE = os.getenv('STREAMING_TRANSCODE', 'true').lower() == 'true'
+
+# İş çalışma alanları: her indirme kendi geçici klasöründe, iş bitince silinir
+WORKSPACE_ROOT = os.getenv('WORKSPACE_ROOT', '/tmp/jobs')
+
+# Kalıcı iş kaydı (SQLite): bitmemiş işler yeniden başlatmada sürdürülür, en fazla JOB_MAX_RESUMES kez
+# Deploy sonrası da sürmesi için bu dosya ve WORKSPACE_ROOT kalıcı diskte olmalı
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', 'jobs.db')
+JOB_MAX_RESUMES = int(os.getenv('JOB_MAX_RESUMES', '3'))
+
+# Disk kotası: iş klasörleri + medya önbelleği (MB, 0 = kota yok) ve her zaman boş bırakılacak alan
+STORAGE_QUOTA_MB = int(os.getenv('STORAGE_QUOTA_MB', '4096'))
+STORAGE_MIN_FREE_MB = int(os.getenv('STORAGE_MIN_FREE_MB', '256'))
+
+# Medya önbelleği (aynı video/format/kalite tekrar indirilmez)
+ENABLE_MEDIA_CACHE = os.getenv('ENABLE_MEDIA_CACHE', 'true').lower() == 'true'
+MEDIA_CACHE_DIR = os.getenv('MEDIA_CACHE_DIR', '/tmp/media_cache')
+MEDIA_CACHE_MAX_MB = int(os.getenv('MEDIA_CACHE_MAX_MB', '2048'))
+
+# Thumbnail önbelleği (320px JPEG, video id'sine göre)
+THUMBNAIL_CACHE_DIR = os.getenv('THUMBNAIL_CACHE_DIR', '/tmp/thumb_cache')
+THUMBNAIL_CACHE_MAX_MB = int(os.getenv('THUMBNAIL_CACHE_MAX_MB', '50'))
+
+# Aynı ilerleme mesajının iki düzenlemesi arasındaki en kısa süre (saniye)
+PROGRESS_EDIT_INTERVAL = float(os.getenv('PROGRESS_EDIT_INTERVAL', '5'))
+
+# Telegram gönderim sınırları: global (istek/sn), özel sohbet (istek/sn), grup (istek/dk)
+# ve beklenecek en uzun FloodWait (saniye; daha uzunsa istek hata verir)
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', '30'))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', '1'))
+TELEGRAM_GROUP_RATE_PER_MINUTE = int(os.getenv('TELEGRAM_GROUP_RATE_PER_MINUTE', '20'))
+TELEGRAM_MAX_FLOOD_WAIT = int(os.getenv('TELEGRAM_MAX_FLOOD_WAIT', '300'))
+
 # Özellik durumları
 ENABLE_VIDEO_DOWNLOAD = os.getenv('ENABLE_VIDEO_DOWNLOAD', 'true').lower() == 'true'
 ENABLE_GUI_CONTROL = os.getenv('ENABLE_GUI_CONTROL', 'false').lower() == 'true'
@@ -0,0 +1,532 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+⚙️ Naofumi Bot İndirme Yürütücüsü
+yt-dlp çıkarma, indirme ve dönüştürme işlerini (akışlı MP3 dahil) event loop dışında çalıştırır
+"""
+
+import asyncio
+import builtins
+import itertools
+import logging
+import json
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from yt_dlp import YoutubeDL
+from yt_dlp.utils import DownloadError
+
+from bandwidth_manager import Pacer
+from config import (
+    DOWNLOAD_WORKERS, DOWNLOAD_POOL_MODE, DOWNLOAD_JOB_TIMEOUT,
+    DOWNLOAD_JOB_MAX_MEMORY_MB, DOWNLOAD_JOB_MAX_CPU_SECONDS
+)
+from media_probe import AdmissionError
+from process_limits import group_rss, kill_group, psutil
+
+logger = logging.getLogger(__name__)
+
+# İlerleme olaylarında taşınan alanlar (pipe üzerinden gönderilebilir olmalı)
+PROGRESS_FIELDS = (
+    'status', 'filename', 'downloaded_bytes', 'total_bytes',
+    'total_bytes_estimate', 'speed', 'eta', 'elapsed',
+    'fragment_index', 'fragment_count'
+)
+
+
+class JobTimeoutError(Exception):
+    """İş süre sınırını aştı ve öldürüldü"""
+
+
+class WorkerCrashedError(Exception):
+    """İşçi süreç sonuç göndermeden sonlandı"""
+
+
+class JobCancelledError(Exception):
+    """İş iptal edildi (örn. hedged çıkarmada kaybeden deneme)"""
+
+
+class JobMemoryError(Exception):
+    """İş (ffmpeg alt süreçleri dahil) bellek sınırını aştı ve öldürüldü"""
+
+
+# İşçi süreçten gelen hatalar ana süreçte aynı sınıfla yeniden fırlatılır (thread moduyla aynı davranış)
+CHILD_ERRORS = {
+    'DownloadError': DownloadError,
+    'AdmissionError': AdmissionError,
+    'JobMemoryError': JobMemoryError
+}
+
+
+def child_error(type_name: str, message: str) -> Exception:
+    """İşçi süreçteki hatayı sınıf adına göre yeniden oluştur (bilinmeyen sınıflar için Exception)"""
+    error_class = CHILD_ERRORS.get(type_name) or getattr(builtins, type_name, None)
+    if isinstance(error_class, type) and issubclass(error_class, Exception):
+        return error_class(message)
+    return Exception(f"{type_name}: {message}")
+
+
+def run_ytdlp(ydl_opts: Dict, url: str, download: bool = True, info: Optional[Dict] = None) -> Tuple[Dict, str]:
+    """
+    yt-dlp'yi çalıştır, (info_dict, dosya adı) döndür.
+    info verilirse çıkarma atlanır ve mevcut metadata ile indirilir.
+    İndirmede dosya adı, son işlemlerden (dönüştürme/birleştirme) sonraki gerçek yoldur.
+    """
+    with YoutubeDL(ydl_opts) as ydl:
+        if info is not None:
+            info_dict = ydl.process_ie_result(info, download=download)
+        else:
+            info_dict = ydl.extract_info(url, download=download)
+        file_name = output_path(info_dict) or ydl.prepare_filename(info_dict)
+    return info_dict, file_name
+
+
+def run_task(ydl_opts: Dict, url: str, download: bool, info: Optional[Dict],
+             stream_bitrate: Optional[int], progress_callback: Optional[Callable[[Dict], None]],
+             pacer: Optional[Pacer]) -> Tuple[Dict, str]:
+    """İşi çalıştır: stream_bitrate verilirse akışlı MP3 dönüştürme (audio_stream), yoksa yt-dlp"""
+    if stream_bitrate:
+        # audio_stream bu modülü içe aktarır; döngüsel import olmasın diye burada
+        from audio_stream import run_stream
+        return run_stream(ydl_opts, info, stream_bitrate, progress_callback, pacer)
+
+    if progress_callback:
+        ydl_opts = with_event_hooks(ydl_opts, progress_callback)
+    if pacer:
+        ydl_opts = with_progress_hook(ydl_opts, pacer.progress_hook)
+    return run_ytdlp(ydl_opts, url, download, info)
+
+
+def output_path(info_dict: Dict) -> Optional[str]:
+    """yt-dlp'nin son işlemcilerden sonra güncellediği çıktı yolu (requested_downloads)"""
+    downloads = info_dict.get('requested_downloads') or []
+    if downloads and downloads[-1].get('filepath'):
+        return downloads[-1]['filepath']
+    return None
+
+
+def progress_event(data: Dict) -> Dict:
+    """yt-dlp hook verisini sade bir ilerleme olayına çevir"""
+    return {key: data.get(key) for key in PROGRESS_FIELDS if data.get(key) is not None}
+
+
+def postprocessor_event(data: Dict) -> Dict:
+    """yt-dlp işlemci hook verisini (Merger, FFmpegExtractAudio...) ilerleme olayına çevir"""
+    return {
+        'status': 'postprocessing',
+        'postprocessor': data.get('postprocessor'),
+        'postprocessor_status': data.get('status')
+    }
+
+
+def with_progress_hook(ydl_opts: Dict, hook: Callable[[Dict], None]) -> Dict:
+    """ydl_opts kopyasına ilerleme hook'u ekle"""
+    opts = dict(ydl_opts)
+    opts['progress_hooks'] = list(opts.get('progress_hooks') or []) + [hook]
+    return opts
+
+
+def with_event_hooks(ydl_opts: Dict, callback: Callable[[Dict], None]) -> Dict:
+    """İndirme ve işlemci hook'larını tek olay akışına bağla"""
+    opts = with_progress_hook(ydl_opts, lambda d: callback(progress_event(d)))
+    opts['postprocessor_hooks'] = list(opts.get('postprocessor_hooks') or []) + [
+        lambda d: callback(postprocessor_event(d))
+    ]
+    return opts
+
+
+def _apply_child_limits(max_cpu_seconds: int):
+    """
+    Çocuk süreçte CPU limitini uygula (ffmpeg alt süreçleri de miras alır).
+    Bellek sınırı RLIMIT_AS ile değil, ana süreçte gerçek bellek (RSS) izlenerek uygulanır:
+    sanal adres alanı thread yığınları ve malloc arenaları yüzünden gerçek kullanımdan çok büyüktür.
+    """
+    try:
+        import resource
+    except ImportError:
+        return
+
+    if max_cpu_seconds > 0:
+        resource.setrlimit(resource.RLIMIT_CPU, (max_cpu_seconds, max_cpu_seconds + 5))
+
+
+def _worker_main(result_fd: int):
+    """
+    İşçi süreç giriş noktası.
+    İş tanımını stdin'in ilk satırından JSON olarak okur, ilerleme ve sonucu result_fd'ye satır satır yazar.
+    Sonraki stdin satırları ana süreçten gelen bant genişliği güncellemeleridir.
+    """
+    job = json.loads(sys.stdin.readline())
+    _apply_child_limits(job['max_cpu_seconds'])
+
+    pacer = Pacer(job.get('rate') or 0) if job.get('paced') else None
+
+    def read_rate_updates():
+        for line in sys.stdin:
+            try:
+                pacer.set_rate(json.loads(line)['rate'])
+            except Exception:
+                pass
+
+    if pacer:
+        threading.Thread(target=read_rate_updates, daemon=True).start()
+
+    out = os.fdopen(result_fd, 'w', encoding='utf-8', buffering=1)
+
+    def send(kind, payload):
+        out.write(json.dumps([kind, payload], ensure_ascii=False, default=str) + '\n')
+        out.flush()
+
+    def send_progress(event):
+        try:
+            send('progress', event)
+        except Exception:
+            pass
+
+    try:
+        info_dict, file_name = run_task(
+            job['ydl_opts'], job['url'], job['download'], job.get('info'),
+            job.get('stream_bitrate'), send_progress, pacer
+        )
+        send('result', [YoutubeDL.sanitize_info(info_dict), file_name])
+    except BaseException as e:
+        try:
+            send('error', [type(e).__name__, str(e)])
+        except Exception:
+            pass
+    finally:
+        out.close()
+
+
+class DownloadJob:
+    def __init__(self, job_id: int, url: str, future: asyncio.Future):
+        """Havuzdaki tek bir işin awaitable handle'ı"""
+        self.job_id = job_id
+        self.url = url
+        self.future = future
+        self.state = 'queued'
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.pid: Optional[int] = None
+        self.cancel_requested = False
+        self.timed_out = False
+
+    def __await__(self):
+        return self.future.__await__()
+
+    def done(self) -> bool:
+        """İş bitti mi"""
+        return self.future.done()
+
+    def to_dict(self) -> Dict:
+        """İş durumunu sözlük olarak döndür"""
+        return {
+            'job_id': self.job_id,
+            'url': self.url,
+            'state': self.state,
+            'pid': self.pid,
+            'wait_seconds': round((self.started_at or time.time()) - self.created_at, 2),
+            'error': self.error
+        }
+
+
+class DownloadExecutor:
+    def __init__(self, max_workers: int = DOWNLOAD_WORKERS, mode: str = DOWNLOAD_POOL_MODE):
+        """İndirme yürütücüsünü başlat"""
+        self.max_workers = max(1, max_workers)
+        self.mode = mode if mode in ('thread', 'process') else 'thread'
+        self.job_timeout = DOWNLOAD_JOB_TIMEOUT
+        self.max_memory_mb = DOWNLOAD_JOB_MAX_MEMORY_MB
+        self.max_cpu_seconds = DOWNLOAD_JOB_MAX_CPU_SECONDS
+
+        # Process modunda havuz thread'leri çocuk süreçleri denetler
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ytdlp')
+        self._job_ids = itertools.count(1)
+
+        # Aktif işler ve sayaçlar
+        self.active_jobs: Dict[int, DownloadJob] = {}
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'killed': 0,
+            'crashed': 0,
+            'abandoned': 0
+        }
+
+    def submit(self, ydl_opts: Dict, url: str, download: bool = True,
+               progress_callback: Optional[Callable[[Dict], None]] = None,
+               info: Optional[Dict] = None, pacer: Optional[Pacer] = None,
+               stream_bitrate: Optional[int] = None) -> DownloadJob:
+        """
+        yt-dlp işini havuza gönder ve handle döndür.
+        progress_callback işçi thread'inden çağrılır.
+        pacer verilirse indirme hızı onun anlık payına göre sınırlanır.
+        stream_bitrate verilirse info'daki kaynak akışlı olarak MP3'e dönüştürülür.
+        """
+        loop = asyncio.get_running_loop()
+        job_id = next(self._job_ids)
+        future = loop.create_future()
+        job = DownloadJob(job_id, url, future)
+
+        self.active_jobs[job_id] = job
+        self.stats['submitted'] += 1
+
+        pool_future = loop.run_in_executor(
+            self._pool, self._run_job, job, ydl_opts, url, download, progress_callback, info, pacer, stream_bitrate
+        )
+        pool_future.add_done_callback(lambda f: self._finish_job(job, f))
+        return job
+
+    async def extract_info(self, ydl_opts: Dict, url: str, download: bool = True,
+                           progress_callback: Optional[Callable[[Dict], None]] = None,
+                           pacer: Optional[Pacer] = None) -> Tuple[Dict, str]:
+        """İşi havuzda çalıştır ve sonucunu bekle"""
+        return await self.submit(ydl_opts, url, download, progress_callback, pacer=pacer)
+
+    async def download_info(self, ydl_opts: Dict, info_dict: Dict,
+                            progress_callback: Optional[Callable[[Dict], None]] = None,
+                            pacer: Optional[Pacer] = None) -> Tuple[Dict, str]:
+        """Önceden çıkarılmış metadata ile yeniden çıkarma yapmadan indir"""
+        url = info_dict.get('webpage_url') or info_dict.get('original_url') or ''
+        return await self.submit(ydl_opts, url, True, progress_callback, info=info_dict, pacer=pacer)
+
+    async def stream_mp3(self, ydl_opts: Dict, info_dict: Dict, bitrate: int,
+                         progress_callback: Optional[Callable[[Dict], None]] = None,
+                         pacer: Optional[Pacer] = None) -> Tuple[Dict, str]:
+        """Kaynağı indirirken ffmpeg'e aktarıp MP3'e dönüştür (havuz sınırı ve süreç izolasyonu geçerli)"""
+        url = info_dict.get('webpage_url') or info_dict.get('original_url') or ''
+        return await self.submit(
+            ydl_opts, url, True, progress_callback, info=info_dict, pacer=pacer, stream_bitrate=bitrate
+        )
+
+    def cancel(self, job: DownloadJob):
+        """
+        İşi iptal et. Sırada bekleyen iş hiç başlamaz, process modunda
+        çalışan süreç öldürülür; thread modunda çalışan iş sonucu yok sayılır.
+        """
+        job.cancel_requested = True
+        if not job.future.done():
+            job.future.cancel()
+
+    def _run_job(self, job: DownloadJob, ydl_opts: Dict, url: str, download: bool,
+                 progress_callback: Optional[Callable[[Dict], None]], info: Optional[Dict],
+                 pacer: Optional[Pacer] = None, stream_bitrate: Optional[int] = None) -> Tuple[Dict, str]:
+        """Havuz thread'inde çalışır"""
+        if job.cancel_requested:
+            raise JobCancelledError(f"İş {job.job_id} başlamadan iptal edildi")
+
+        job.state = 'running'
+        job.started_at = time.time()
+
+        if self.mode == 'process':
+            return self._run_in_process(job, ydl_opts, url, download, progress_callback, info, pacer, stream_bitrate)
+
+        # Thread öldürülemez: süre dolunca iş event loop'ta başarısız sayılır (slot bırakılır),
+        # thread ise bir sonraki ilerleme olayında durdurulur
+        if self.job_timeout > 0:
+            job.future.get_loop().call_soon_threadsafe(self._watch_timeout, job)
+        return run_task(ydl_opts, url, download, info, stream_bitrate, self._guarded(job, progress_callback), pacer)
+
+    def _guarded(self, job: DownloadJob,
+                 progress_callback: Optional[Callable[[Dict], None]]) -> Callable[[Dict], None]:
+        """İlerleme callback'i; süresi dolan thread modu işini yt-dlp/ffmpeg döngüsünden hata ile çıkarır"""
+        def callback(event):
+            if job.timed_out:
+                raise JobTimeoutError(f"İş {self.job_timeout} saniyede bitmedi ve durduruldu")
+            if progress_callback:
+                progress_callback(event)
+        return callback
+
+    def _watch_timeout(self, job: DownloadJob):
+        """Thread modu işinin süre sınırını event loop'ta kur (iş bitince iptal edilir)"""
+        if job.future.done():
+            return
+        loop = job.future.get_loop()
+        remaining = job.started_at + self.job_timeout - time.time()
+        handle = loop.call_at(loop.time() + max(0, remaining), self._expire, job)
+        job.future.add_done_callback(lambda _: handle.cancel())
+
+    def _expire(self, job: DownloadJob):
+        """Süresi dolan thread modu işini başarısız say; thread bitene kadar havuz işçisini tutar"""
+        if job.future.done():
+            return
+        job.timed_out = True
+        job.error = f"İş {self.job_timeout} saniyede bitmedi"
+        self.stats['abandoned'] += 1
+        logger.warning(f"İndirme işi {job.job_id} süre sınırını aştı, thread modunda arka planda durdurulacak")
+        job.future.set_exception(JobTimeoutError(f"İş {self.job_timeout} saniyede bitmedi ve sonlandırıldı"))
+
+    def _run_in_process(self, job: DownloadJob, ydl_opts: Dict, url: str, download: bool,
+                        progress_callback: Optional[Callable[[Dict], None]],
+                        info: Optional[Dict], pacer: Optional[Pacer] = None,
+                        stream_bitrate: Optional[int] = None) -> Tuple[Dict, str]:
+        """İşi ayrı süreçte çalıştır, zaman aşımında süreç grubunu SIGKILL ile öldür"""
+        # Fonksiyon içeren hook'lar sürece aktarılamaz, çocukta yeniden kurulur
+        child_opts = {k: v for k, v in ydl_opts.items() if k not in ('progress_hooks', 'postprocessor_hooks')}
+        job_spec = {
+            'ydl_opts': child_opts,
+            'url': url,
+            'download': download,
+            'info': info,
+            'stream_bitrate': stream_bitrate,
+            'max_cpu_seconds': self.max_cpu_seconds,
+            'paced': pacer is not None,
+            'rate': pacer.rate if pacer else 0
+        }
+
+        read_fd, write_fd = os.pipe()
+        try:
+            # Yeni oturum: zaman aşımında ffmpeg dahil tüm grubu öldürebilmek için
+            process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--worker', str(write_fd)],
+                stdin=subprocess.PIPE,
+                pass_fds=(write_fd,),
+                start_new_session=True,
+                cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+        finally:
+            os.close(write_fd)
+
+        job.pid = process.pid
+        deadline = time.time() + self.job_timeout
+        memory_limit = self.max_memory_mb * 1024 * 1024 if psutil else 0
+        next_memory_check = 0.0
+        buffer = b''
+        sent_rate = job_spec['rate']
+
+        try:
+            process.stdin.write(json.dumps(job_spec, default=str).encode('utf-8') + b'\n')
+            process.stdin.flush()
+            if not pacer:
+                process.stdin.close()
+
+            while True:
+                # Bant genişliği payı değiştiyse çocuğa bildir
+                if pacer and pacer.rate != sent_rate:
+                    sent_rate = pacer.rate
+                    try:
+                        process.stdin.write(json.dumps({'rate': sent_rate}).encode('utf-8') + b'\n')
+                        process.stdin.flush()
+                    except (BrokenPipeError, ValueError):
+                        pass
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    kill_group(process)
+                    self.stats['killed'] += 1
+                    raise JobTimeoutError(f"İş {self.job_timeout} saniyede bitmedi ve sonlandırıldı")
+
+                if job.cancel_requested:
+                    kill_group(process)
+                    raise JobCancelledError(f"İş {job.job_id} iptal edildi")
+
+                # Bellek en fazla saniyede bir ölçülür (ilerleme olayları sık gelir)
+                if memory_limit and time.time() >= next_memory_check:
+                    next_memory_check = time.time() + 1.0
+                    if group_rss(process.pid) > memory_limit:
+                        kill_group(process)
+                        self.stats['killed'] += 1
+                        raise JobMemoryError(f"İş {self.max_memory_mb}MB bellek sınırını aştı ve sonlandırıldı")
+
+                readable, _, _ = select.select([read_fd], [], [], min(remaining, 1.0))
+                if not readable:
+                    continue
+
+                chunk = os.read(read_fd, 65536)
+                if not chunk:
+                    # Pipe kapandı ama sonuç gelmedi
+                    exit_code = process.wait(timeout=5)
+                    self.stats['crashed'] += 1
+                    raise WorkerCrashedError(
+                        f"İndirme süreci beklenmedik şekilde sonlandı (exit code: {exit_code})"
+                    )
+
+                buffer += chunk
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    kind, payload = json.loads(line.decode('utf-8'))
+
+                    if kind == 'progress':
+                        if progress_callback:
+                            try:
+                                progress_callback(payload)
+                            except Exception as e:
+                                logger.error(f"İlerleme callback hatası: {e}")
+                    elif kind == 'result':
+                        return payload[0], payload[1]
+                    elif kind == 'error':
+                        raise child_error(*payload)
+        finally:
+            os.close(read_fd)
+            try:
+                process.stdin.close()
+            except (BrokenPipeError, ValueError):
+                pass
+            if process.poll() is None:
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    kill_group(process)
+                    process.wait()
+
+    def _finish_job(self, job: DownloadJob, pool_future: asyncio.Future):
+        """İş bittiğinde handle'ı sonuçlandır"""
+        job.finished_at = time.time()
+        self.active_jobs.pop(job.job_id, None)
+
+        if pool_future.cancelled():
+            job.state = 'cancelled'
+            if not job.future.done():
+                job.future.cancel()
+            return
+
+        error = pool_future.exception()
+        if isinstance(error, JobCancelledError) or job.cancel_requested:
+            job.state = 'cancelled'
+            self.stats['cancelled'] += 1
+            if not job.future.done():
+                job.future.cancel()
+        elif error is not None:
+            job.state = 'failed'
+            job.error = str(error)
+            self.stats['failed'] += 1
+            if not job.future.done():
+                job.future.set_exception(error)
+        else:
+            job.state = 'done'
+            self.stats['completed'] += 1
+            if not job.future.done():
+                job.future.set_result(pool_future.result())
+
+    def get_status(self) -> Dict[str, Any]:
+        """Havuz durumunu döndür (health/metrics için)"""
+        running = sum(1 for job in self.active_jobs.values() if job.state == 'running')
+        return {
+            'mode': self.mode,
+            'workers': self.max_workers,
+            'running': running,
+            'queued': len(self.active_jobs) - running,
+            **self.stats
+        }
+
+    def shutdown(self, wait: bool = False):
+        """Havuzu kapat"""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global instance
+download_executor = DownloadExecutor()
+
+if __name__ == "__main__" and len(sys.argv) == 3 and sys.argv[1] == '--worker':
+    _worker_main(int(sys.argv[2]))
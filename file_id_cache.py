@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+📨 Naofumi Bot Telegram file_id Önbelleği
+Daha önce yüklenen medyayı yeniden yüklemeden file_id ile gönderebilmek için saklar
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from json_file import JsonFile
+
+# Yüklemeler art arda bittiğinde kayıtlar tek yazmada toplanır (saniye)
+SAVE_DELAY = 5
+
+
+class FileIdCache:
+    def __init__(self):
+        """file_id önbelleğini başlat"""
+        self.cache_file = "telegram_file_ids.json"
+        self.lock = threading.Lock()
+        self.store = JsonFile(self.cache_file, "file_id önbelleği", lambda: self.entries, SAVE_DELAY, self.lock)
+
+        # {cache_key: {'file_id', 'media_type', 'file_name', 'file_size', 'title', 'created', 'hits'}}
+        self.entries = self.store.load()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidated': 0}
+
+    def flush(self):
+        """Bekleyen kaydı hemen yaz"""
+        self.store.flush()
+
+    def get(self, cache_key: Optional[str]) -> Optional[Dict]:
+        """Kayıtlı file_id bilgisini döndür"""
+        if not cache_key:
+            return None
+
+        with self.lock:
+            entry = self.entries.get(cache_key)
+            if not entry:
+                self.stats['misses'] += 1
+                return None
+            entry['hits'] = entry.get('hits', 0) + 1
+            self.stats['hits'] += 1
+            return dict(entry)
+
+    def put(self, cache_key: Optional[str], sent_message, title: str):
+        """Yükleme sonrası dönen mesajdan file_id'yi kaydet"""
+        if not cache_key or sent_message is None:
+            return
+
+        for media_type in ('video', 'audio', 'document'):
+            media = getattr(sent_message, media_type, None)
+            if media:
+                break
+        else:
+            return
+
+        with self.lock:
+            self.entries[cache_key] = {
+                'file_id': media.file_id,
+                'media_type': media_type,
+                'file_name': getattr(media, 'file_name', None),
+                'file_size': getattr(media, 'file_size', 0) or 0,
+                'title': title,
+                'created': time.time(),
+                'hits': 0
+            }
+            self.store.schedule()
+
+    def invalidate(self, cache_key: Optional[str]):
+        """Telegram'ın reddettiği file_id'yi sil"""
+        with self.lock:
+            if self.entries.pop(cache_key, None) is not None:
+                self.stats['invalidated'] += 1
+                self.store.schedule()
+
+    def get_status(self) -> Dict:
+        """Önbellek durumunu döndür"""
+        with self.lock:
+            return {'entries': len(self.entries), **self.stats}
+
+
+# Global instance
+file_id_cache = FileIdCache()
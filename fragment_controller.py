@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+🧩 Naofumi Bot Parça Eşzamanlılık Kontrolü
+HLS/DASH indirmelerinde paralel parça sayısını medya sunucusu (host) başına ölçülen hıza göre (AIMD) ayarlar
+"""
+
+import asyncio
+import threading
+import time
+import logging
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from config import FRAGMENT_BUDGET, FRAGMENT_INITIAL, FRAGMENT_MAX_PER_JOB
+from json_file import JsonFile
+
+logger = logging.getLogger(__name__)
+
+# İstatistik dosyası her iş bitiminde değil, en fazla bu aralıkla yazılır (saniye)
+SAVE_DELAY = 30
+
+
+def media_host(info_dict: Dict) -> Optional[str]:
+    """
+    Seçilen formatın (birleştirmede ilk formatın) indirildiği sunucu. CDN'lerin numaralı uç
+    sunucuları (örn. rr3---sn-abc.googlevideo.com) aynı anahtarda toplanır: ilk etiket rakam
+    içeriyorsa atılır.
+    """
+    formats = info_dict.get('requested_formats') or [info_dict]
+    url = formats[0].get('fragment_base_url') or formats[0].get('url') or ''
+    host = urlparse(url).hostname
+    if not host:
+        return None
+    labels = host.split('.')
+    if len(labels) > 2 and any(char.isdigit() for char in labels[0]):
+        labels = labels[1:]
+    return '.'.join(labels)
+
+
+class FragmentTicket:
+    def __init__(self, host: str, level: int):
+        """Tek bir indirme işine ayrılan parça eşzamanlılığı"""
+        self.host = host
+        self.level = level
+        self.started_at = time.time()
+        self.finished_bytes = 0      # Tamamlanan formatların toplam boyutu
+        self.current_bytes = 0       # İndirilmekte olan formatın inen kısmı
+        self.fragmented = False      # HLS/DASH parçalı indirme mi?
+
+    def observe(self, event: Dict):
+        """İlerleme olayını işle (işçi thread'inden çağrılır)"""
+        if event.get('fragment_count'):
+            self.fragmented = True
+        if event.get('status') == 'finished':
+            self.finished_bytes += event.get('total_bytes') or event.get('downloaded_bytes') or 0
+            self.current_bytes = 0
+        elif event.get('status') == 'downloading':
+            self.current_bytes = event.get('downloaded_bytes') or 0
+
+    @property
+    def downloaded_bytes(self) -> int:
+        return self.finished_bytes + self.current_bytes
+
+
+class FragmentController:
+    def __init__(self):
+        """Parça kontrolcüsünü başlat"""
+        self.stats_file = "fragment_stats.json"
+        self.lock = threading.Lock()
+        self.stats_store = JsonFile(self.stats_file, "Parça istatistikleri", lambda: self.stats, SAVE_DELAY, self.lock)
+
+        self.budget = max(1, FRAGMENT_BUDGET)              # Tüm işler için toplam parça işçisi
+        self.initial_level = max(1, FRAGMENT_INITIAL)
+        self.max_level = max(1, FRAGMENT_MAX_PER_JOB)
+        self.alpha = 0.3                                   # Hız EWMA ağırlığı
+        self.in_use = 0
+        self.waiters: List[asyncio.Future] = []           # Bütçe boşalmasını bekleyen işler
+
+        # {host: {'level', 'throughput', 'jobs', 'by_level': {level: {'throughput', 'jobs'}}}}
+        self.stats = self.stats_store.load()
+
+    def flush(self):
+        """Bekleyen istatistik kaydını hemen yaz (kapanışta)"""
+        self.stats_store.flush()
+
+    def _entry(self, host: str) -> Dict:
+        return self.stats.setdefault(host, {
+            'level': self.initial_level,
+            'throughput': None,
+            'jobs': 0,
+            'by_level': {}
+        })
+
+    async def acquire(self, host: Optional[str], cap: Optional[int] = None) -> FragmentTicket:
+        """
+        İş için parça sayısı ayır: sunucunun (media_host) öğrenilmiş seviyesi,
+        profil sınırı (cap) ve global bütçede kalan yer ile sınırlı.
+        Bütçe kesin sınırdır: boş yer yoksa başka bir iş parça bırakana kadar beklenir.
+        """
+        host = host or 'unknown'
+        with self.lock:
+            level = self._entry(host)['level']
+        if cap:
+            level = min(level, cap)
+
+        while self.in_use >= self.budget:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                self.waiters.remove(waiter)
+        level = max(1, min(level, self.budget - self.in_use))
+
+        self.in_use += level
+        return FragmentTicket(host, level)
+
+    def release(self, ticket: FragmentTicket, success: bool):
+        """İş bitince bütçeyi geri ver (bekleyenleri uyandır), ölçülen hıza göre seviyeyi güncelle"""
+        self.in_use -= ticket.level
+        for waiter in self.waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        with self.lock:
+            entry = self._entry(ticket.host)
+
+            duration = max(0.001, time.time() - ticket.started_at)
+            throughput = ticket.downloaded_bytes / duration
+            previous = entry['throughput']
+
+            # AIMD: hız korunuyor/artıyorsa +1, belirgin düşüş ya da hata varsa yarıya
+            if ticket.fragmented:
+                if not success:
+                    entry['level'] = max(1, ticket.level // 2)
+                elif previous is None or throughput >= previous * 0.9:
+                    entry['level'] = min(self.max_level, ticket.level + 1)
+                elif throughput < previous * 0.75:
+                    entry['level'] = max(1, ticket.level // 2)
+
+            if success and ticket.downloaded_bytes:
+                entry['throughput'] = throughput if previous is None else (1 - self.alpha) * previous + self.alpha * throughput
+                entry['jobs'] += 1
+                level_stats = entry['by_level'].setdefault(str(ticket.level), {'throughput': throughput, 'jobs': 0})
+                level_stats['throughput'] = (1 - self.alpha) * level_stats['throughput'] + self.alpha * throughput
+                level_stats['jobs'] += 1
+
+        logger.info(
+            f"İndirme hızı ({ticket.host}, {ticket.level} parça): "
+            f"{throughput / (1024*1024):.2f} MB/s, {ticket.downloaded_bytes / (1024*1024):.1f} MB "
+            f"-> yeni seviye {entry['level']}"
+        )
+        self.stats_store.schedule()
+
+    def get_status(self) -> Dict:
+        """Bütçe kullanımı ve sunucu bazında seviye/hız"""
+        return {
+            'budget': self.budget,
+            'in_use': self.in_use,
+            'waiting': len(self.waiters),
+            'hosts': {
+                host: {
+                    'level': entry['level'],
+                    'throughput_mbps': round((entry['throughput'] or 0) * 8 / 1_000_000, 2),
+                    'jobs': entry['jobs']
+                }
+                for host, entry in list(self.stats.items())
+            }
+        }
+
+
+# Global instance
+fragment_controller = FragmentController()
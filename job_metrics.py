@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+⏱️ Naofumi Bot İş Metrikleri
+İndirme işlerinin aşamalarını (metadata, slot bekleme, indirme, işleme, dönüştürme, yükleme)
+ilerleme olaylarından izler; aktif işlerin durumu ve aşama başına ortalama süreler /health'te görünür
+"""
+
+import itertools
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# İlerleme olayı durumu -> aşama
+EVENT_STAGES = {
+    'download_queued': 'download_wait',
+    'downloading': 'downloading',
+    'postprocessing': 'postprocessing',
+    'transcode_queued': 'transcode_wait',
+    'transcoding': 'transcoding',
+    'uploading': 'uploading'
+}
+
+
+class JobTimeline:
+    def __init__(self, job_id: int, label: str, metrics: 'JobMetrics'):
+        """Tek işin aşama zaman çizelgesi ve son ilerleme bilgisi"""
+        self.job_id = job_id
+        self.label = label
+        self.metrics = metrics
+        self.started_at = time.time()
+        self.stage_name: Optional[str] = None
+        self.stage_started = self.started_at
+        self.progress: Dict = {}
+
+    def stage(self, name: str):
+        """Yeni aşamaya geç, öncekinin süresini kaydet"""
+        if name == self.stage_name:
+            return
+        now = time.time()
+        if self.stage_name:
+            self.metrics.record(self.stage_name, now - self.stage_started)
+        self.stage_name, self.stage_started = name, now
+
+    def observe(self, event: Dict):
+        """İlerleme olayını işle (işçi thread'inden çağrılabilir)"""
+        with self.metrics.lock:
+            stage = EVENT_STAGES.get(event.get('status'))
+            if stage:
+                self.stage(stage)
+            self.progress = event
+
+    def to_dict(self) -> Dict:
+        event = self.progress
+        return {
+            'job': self.label,
+            'stage': self.stage_name,
+            'stage_seconds': round(time.time() - self.stage_started, 1),
+            'total_seconds': round(time.time() - self.started_at, 1),
+            'transferred_mb': round((event.get('downloaded_bytes') or 0) / (1024 * 1024), 1),
+            'speed_kbps': round((event.get('speed') or 0) / 1024),
+            'eta': event.get('eta'),
+            'fragment': f"{event['fragment_index']}/{event.get('fragment_count') or '?'}" if event.get('fragment_index') else None
+        }
+
+
+class JobMetrics:
+    def __init__(self):
+        """İş metriklerini başlat"""
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.active: Dict[int, JobTimeline] = {}
+
+        # {aşama: [adet, toplam süre]}
+        self.stage_totals: Dict[str, list] = {}
+        self.stats = {'started': 0, 'completed': 0, 'failed': 0}
+
+    def start(self, label: str, stage: str = 'metadata') -> JobTimeline:
+        """Yeni işi izlemeye başla"""
+        timeline = JobTimeline(next(self.ids), label, self)
+        timeline.stage(stage)
+        self.active[timeline.job_id] = timeline
+        self.stats['started'] += 1
+        return timeline
+
+    def finish(self, timeline: JobTimeline, success: bool):
+        """İş bitti: son aşamayı kapat"""
+        with self.lock:
+            timeline.stage(None)
+        self.active.pop(timeline.job_id, None)
+        self.stats['completed' if success else 'failed'] += 1
+
+    def record(self, stage: str, seconds: float):
+        """Aşama süresini ekle"""
+        totals = self.stage_totals.setdefault(stage, [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+
+    def get_status(self) -> Dict:
+        """Aktif işler ve aşama başına ortalama süre"""
+        with self.lock:
+            return {
+                'active': [timeline.to_dict() for timeline in list(self.active.values())],
+                'stages': {
+                    stage: {'count': count, 'avg_seconds': round(total / count, 2)}
+                    for stage, (count, total) in self.stage_totals.items() if count
+                },
+                **self.stats
+            }
+
+
+# Global instance
+job_metrics = JobMetrics()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+📋 Naofumi Bot İş Zamanlayıcısı
+Kullanıcı bazlı kuyruklar, kullanıcılar arası sıralı (round-robin) adalet ve admin önceliği
+"""
+
+import asyncio
+import itertools
+import logging
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from config import SCHEDULER_MAX_ACTIVE, MAX_JOBS_PER_USER, MAX_QUEUE_BACKLOG
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Kuyruk eşiği aşıldı, iş kabul edilmedi"""
+    def __init__(self, retry_after: int):
+        super().__init__(f"Kuyruk dolu, {retry_after} saniye sonra tekrar deneyin")
+        self.retry_after = retry_after
+
+
+class ScheduledJob:
+    def __init__(self, job_id: int, user_id: int, factory: Callable[[], Awaitable[None]],
+                 is_admin: bool, on_position: Optional[Callable[[int], Awaitable[None]]]):
+        """Zamanlayıcıdaki tek bir iş"""
+        self.job_id = job_id
+        self.user_id = user_id
+        self.factory = factory
+        self.is_admin = is_admin
+        self.on_position = on_position
+        self.position = 0          # 0 = çalışıyor, N = kuyrukta N. sırada
+        self.enqueued_at = time.time()
+        self.started_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        # İş bitince sonuçlanır; factory'nin hatası burada taşınır
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def __await__(self):
+        return self.future.__await__()
+
+
+class JobScheduler:
+    def __init__(self, max_active: int = SCHEDULER_MAX_ACTIVE, per_user_limit: int = MAX_JOBS_PER_USER,
+                 max_backlog: int = MAX_QUEUE_BACKLOG):
+        """
+        İş zamanlayıcısını başlat.
+        Deficit round-robin: her kullanıcının turu bir iş (quantum = 1 iş),
+        adminler ayrı öncelik kuyruğundan önce çalışır.
+        """
+        self.max_active = max(1, max_active)
+        self.per_user_limit = max(1, per_user_limit)
+        self.max_backlog = max_backlog
+        self.avg_duration = 60.0     # İş süresi EWMA (saniye), retry-after tahmini için
+
+        self.admin_queue: Deque[ScheduledJob] = deque()
+        self.user_queues: Dict[int, Deque[ScheduledJob]] = {}
+        self.round_robin: Deque[int] = deque()       # Kuyruğunda iş olan kullanıcılar, sıra ile
+        self.active_per_user: Dict[int, int] = {}
+        self.active = 0
+
+        self._job_ids = itertools.count(1)
+        self._notify_tasks: Set[asyncio.Task] = set()
+        self.stats = {'submitted': 0, 'started': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'max_wait': 0.0}
+
+    def submit(self, user_id: int, factory: Callable[[], Awaitable[None]], is_admin: bool = False,
+               on_position: Optional[Callable[[int], Awaitable[None]]] = None) -> ScheduledJob:
+        """
+        İşi kuyruğa ekle; boş yer varsa hemen başlar.
+        Dönen işin position değeri 0 ise iş başlamıştır, değilse kuyruktaki sırasıdır.
+        Dönen iş await edilebilir; factory hata verirse hata orada yeniden fırlatılır.
+        on_position kuyruk ilerledikçe yeni sıra ile çağrılır.
+        Kuyruk eşiği aşılmışsa (admin hariç) QueueFullError fırlatır.
+        """
+        if not is_admin and self.max_backlog and self.queued_count() >= self.max_backlog:
+            self.stats['rejected'] += 1
+            retry_after = self.retry_after()
+            logger.warning(f"Kuyruk dolu ({self.queued_count()}), iş reddedildi - kullanıcı {user_id}")
+            raise QueueFullError(retry_after)
+
+        job = ScheduledJob(next(self._job_ids), user_id, factory, is_admin, on_position)
+        self.stats['submitted'] += 1
+
+        if is_admin:
+            self.admin_queue.append(job)
+        else:
+            if user_id not in self.user_queues:
+                self.user_queues[user_id] = deque()
+                self.round_robin.append(user_id)
+            self.user_queues[user_id].append(job)
+
+        self._dispatch()
+        self._update_positions(notify_job=job)
+        return job
+
+    def _can_start(self, user_id: int) -> bool:
+        return self.active_per_user.get(user_id, 0) < self.per_user_limit
+
+    def _next_job(self) -> Optional[ScheduledJob]:
+        """Sıradaki başlatılabilir işi kuyruktan çıkar"""
+        # Admin öncelik kuyruğu
+        for job in self.admin_queue:
+            if self._can_start(job.user_id):
+                self.admin_queue.remove(job)
+                return job
+
+        # Kullanıcılar arasında sırayla
+        for _ in range(len(self.round_robin)):
+            user_id = self.round_robin[0]
+            self.round_robin.rotate(-1)
+            if not self._can_start(user_id):
+                continue
+            queue = self.user_queues[user_id]
+            job = queue.popleft()
+            if not queue:
+                del self.user_queues[user_id]
+                self.round_robin.remove(user_id)
+            return job
+        return None
+
+    def _dispatch(self):
+        """Boş yer oldukça kuyruktaki işleri başlat"""
+        while self.active < self.max_active:
+            job = self._next_job()
+            if job is None:
+                return
+            self._start(job)
+
+    def _start(self, job: ScheduledJob):
+        self.active += 1
+        self.active_per_user[job.user_id] = self.active_per_user.get(job.user_id, 0) + 1
+        job.position = 0
+        job.started_at = time.time()
+        self.stats['started'] += 1
+        self.stats['max_wait'] = max(self.stats['max_wait'], job.started_at - job.enqueued_at)
+        job.task = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: ScheduledJob):
+        try:
+            await job.factory()
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.error(f"Zamanlanmış iş hatası (kullanıcı {job.user_id}): {e}", exc_info=True)
+            job.future.set_exception(e)
+            # Hata loglandı; işi bekleyen yoksa asyncio "exception was never retrieved" diye tekrar loglamasın
+            job.future.exception()
+        else:
+            self.stats['completed'] += 1
+            job.future.set_result(None)
+        finally:
+            self.avg_duration = 0.8 * self.avg_duration + 0.2 * (time.time() - job.started_at)
+            self.active -= 1
+            self.active_per_user[job.user_id] -= 1
+            if not self.active_per_user[job.user_id]:
+                del self.active_per_user[job.user_id]
+            self._dispatch()
+            self._update_positions()
+
+    def queued_count(self) -> int:
+        """Kuyrukta bekleyen iş sayısı"""
+        return len(self.admin_queue) + sum(len(queue) for queue in self.user_queues.values())
+
+    def retry_after(self) -> int:
+        """Kuyruğun boşalması için tahmini süre (saniye)"""
+        rounds = math.ceil((self.queued_count() + 1) / self.max_active)
+        return int(rounds * self.avg_duration)
+
+    def queued_jobs(self) -> List[ScheduledJob]:
+        """Kuyruktaki işleri tahmini başlama sırasına göre döndür"""
+        order = list(self.admin_queue)
+        queues = [list(self.user_queues[user_id]) for user_id in self.round_robin]
+        for round_jobs in itertools.zip_longest(*queues):
+            order.extend(job for job in round_jobs if job is not None)
+        return order
+
+    def _update_positions(self, notify_job: Optional[ScheduledJob] = None):
+        """Sırası değişen işlere yeni sıralarını bildir"""
+        for position, job in enumerate(self.queued_jobs(), 1):
+            if job.position == position:
+                continue
+            job.position = position
+            # Yeni eklenen işin ilk sırası submit() dönüşünden okunur
+            if job.on_position and job is not notify_job:
+                # Görev referansı tutulur (aksi halde bitmeden çöp toplanabilir)
+                task = asyncio.create_task(self._notify(job, position))
+                self._notify_tasks.add(task)
+                task.add_done_callback(self._notify_tasks.discard)
+
+    async def _notify(self, job: ScheduledJob, position: int):
+        try:
+            await job.on_position(position)
+        except Exception as e:
+            logger.error(f"Kuyruk sırası bildirilemedi: {e}")
+
+    def get_status(self) -> Dict:
+        """Zamanlayıcı durumunu döndür"""
+        return {
+            'active': self.active,
+            'max_active': self.max_active,
+            'per_user_limit': self.per_user_limit,
+            'queued': self.queued_count(),
+            'queued_users': len(self.user_queues),
+            'max_backlog': self.max_backlog,
+            'avg_duration': round(self.avg_duration, 1),
+            **self.stats
+        }
+
+
+# Global instance
+job_scheduler = JobScheduler()
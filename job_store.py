@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+🗃️ Naofumi Bot Kalıcı İş Kaydı
+İndirme işlerini ve aşamalarını SQLite'a yazar; yeniden başlatma/deploy sonrası
+bitmemiş işler aynı kayıt ve aynı çalışma klasörüyle kaldığı yerden sürdürülür
+"""
+
+import contextvars
+import json
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from config import JOB_STORE_PATH, JOB_MAX_RESUMES
+
+logger = logging.getLogger(__name__)
+
+# İş durumları; 'done' ve 'failed' dışındakiler yeniden başlatmada sürdürülür
+JOB_STATES = ('queued', 'extracting', 'downloading', 'transcoding', 'uploading', 'done', 'failed')
+FINAL_STATES = ('done', 'failed')
+
+# İlerleme olayı durumu -> iş durumu
+EVENT_STATES = {
+    'download_queued': 'downloading',
+    'downloading': 'downloading',
+    'postprocessing': 'transcoding',
+    'transcode_queued': 'transcoding',
+    'transcoding': 'transcoding',
+    'uploading': 'uploading'
+}
+
+# Biten işlerin kayıtları bu kadar gün tutulur
+FINISHED_RETENTION_DAYS = 7
+
+# Çalışan görevin iş kaydı (schedule_download ayarlar)
+_current_job: contextvars.ContextVar = contextvars.ContextVar('current_job', default=None)
+
+
+class JobStore:
+    def __init__(self, path: str = JOB_STORE_PATH):
+        """İş kaydını başlat (tablo yoksa oluştur, eski biten işleri sil)"""
+        self.path = path
+        self.lock = threading.Lock()
+        self.states: Dict[int, str] = {}       # Son yazılan durum (gereksiz yazmayı önler)
+
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        with self.lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    chat_id INTEGER NOT NULL,
+                    message_id INTEGER NOT NULL,
+                    args TEXT NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'queued',
+                    workspace TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    UNIQUE (chat_id, message_id, kind, args)
+                )
+            """)
+            self.db.execute(
+                "DELETE FROM jobs WHERE state IN ('done', 'failed') AND updated < ?",
+                (time.time() - FINISHED_RETENTION_DAYS * 86400,)
+            )
+
+    def create(self, kind: str, user_id: int, chat_id: int, message_id: int, args: List) -> Tuple[int, bool]:
+        """
+        İşi kaydet. Aynı mesaj/iş/parametre için bitmemiş kayıt varsa onu döndürür (yeni=False);
+        biten bir kayıt varsa sıfırlanıp yeniden kuyruğa alınır. (job_id, yeni mi) döndürür.
+        """
+        args_json = json.dumps(args, ensure_ascii=False)
+        now = time.time()
+        with self.lock:
+            row = self.db.execute(
+                "SELECT id, state FROM jobs WHERE chat_id = ? AND message_id = ? AND kind = ? AND args = ?",
+                (chat_id, message_id, kind, args_json)
+            ).fetchone()
+            if row and row['state'] not in FINAL_STATES:
+                return row['id'], False
+            if row:
+                self.db.execute(
+                    "UPDATE jobs SET state = 'queued', user_id = ?, workspace = NULL, attempts = 0, "
+                    "error = NULL, updated = ? WHERE id = ?",
+                    (user_id, now, row['id'])
+                )
+                job_id = row['id']
+            else:
+                job_id = self.db.execute(
+                    "INSERT INTO jobs (kind, user_id, chat_id, message_id, args, created, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (kind, user_id, chat_id, message_id, args_json, now, now)
+                ).lastrowid
+        self.states[job_id] = 'queued'
+        return job_id, True
+
+    def set_state(self, job_id: Optional[int], state: str):
+        """Durumu güncelle (aynıysa yazılmaz; işçi thread'lerinden çağrılabilir)"""
+        if job_id is None or self.states.get(job_id) == state:
+            return
+        self.states[job_id] = state
+        with self.lock:
+            self.db.execute("UPDATE jobs SET state = ?, updated = ? WHERE id = ?", (state, time.time(), job_id))
+
+    def observe(self, job_id: Optional[int], event: Dict):
+        """İlerleme olayından iş durumunu güncelle"""
+        state = EVENT_STATES.get(event.get('status'))
+        if state:
+            self.set_state(job_id, state)
+
+    def set_workspace(self, job_id: int, path: str):
+        """İşin çalışma klasörünü kaydet (yarım .part dosyaları yeniden başlatmada bu klasörde kalır)"""
+        with self.lock:
+            self.db.execute("UPDATE jobs SET workspace = ?, updated = ? WHERE id = ?", (path, time.time(), job_id))
+
+    def finish(self, job_id: int, error: Optional[str] = None):
+        """İş bitti (hata verildiyse 'failed')"""
+        state = 'failed' if error else 'done'
+        with self.lock:
+            self.db.execute(
+                "UPDATE jobs SET state = ?, error = ?, updated = ? WHERE id = ?",
+                (state, error and error[:500], time.time(), job_id)
+            )
+        self.states.pop(job_id, None)
+
+    def get(self, job_id: Optional[int]) -> Optional[Dict]:
+        """İş kaydını döndür"""
+        if job_id is None:
+            return None
+        with self.lock:
+            row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def unfinished(self) -> List[Dict]:
+        """Bitmemiş işler (eskiden yeniye)"""
+        placeholders = ', '.join('?' * len(FINAL_STATES))
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT * FROM jobs WHERE state NOT IN ({placeholders}) ORDER BY id", FINAL_STATES
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def workspaces(self) -> List[str]:
+        """Bitmemiş işlerin çalışma klasörleri (başlangıç temizliğinde silinmez)"""
+        return [job['workspace'] for job in self.unfinished() if job['workspace']]
+
+    def resume(self, job_id: int) -> bool:
+        """
+        Yeniden başlatmada işi tekrar kuyruğa al. Deneme sınırı aşıldıysa (her açılışta çöken iş)
+        'failed' yapılır ve False döner.
+        """
+        job = self.get(job_id)
+        if job is None or job['state'] in FINAL_STATES:
+            return False
+        if job['attempts'] >= JOB_MAX_RESUMES:
+            self.finish(job_id, error=f"{job['attempts']} kez sürdürüldü, bırakıldı")
+            return False
+        with self.lock:
+            self.db.execute(
+                "UPDATE jobs SET state = 'queued', attempts = attempts + 1, updated = ? WHERE id = ?",
+                (time.time(), job_id)
+            )
+        self.states[job_id] = 'queued'
+        return True
+
+    def attach(self, job_id: int) -> contextvars.Token:
+        """Çalışan görevi işe bağla (workspace ve aşama güncellemeleri bu kayda gider)"""
+        return _current_job.set(job_id)
+
+    def detach(self, token: contextvars.Token):
+        _current_job.reset(token)
+
+    def current(self) -> Optional[int]:
+        """Çalışan görevin iş id'si"""
+        return _current_job.get()
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job['args'] = json.loads(job['args'])
+        return job
+
+    def get_status(self) -> Dict:
+        """Durum başına iş sayısı"""
+        with self.lock:
+            rows = self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return {
+            'path': self.path,
+            'states': {state: count for state, count in rows}
+        }
+
+
+# Global instance
+job_store = JobStore()
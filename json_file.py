@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+💾 Naofumi Bot JSON Durum Dosyası
+İstatistik/tercih/önbellek dosyalarını geçici dosyaya yazıp os.replace ile değiştirir
+(çökmede yarım dosya kalmaz); sık gelen değişiklikler gecikmeli tek yazmada toplanır
+"""
+
+import json
+import os
+import threading
+from typing import Any, Callable, Optional
+
+
+class JsonFile:
+    def __init__(self, path: str, label: str, get_data: Callable[[], Any],
+                 delay: float = 5, lock: Optional[threading.Lock] = None):
+        """
+        path: dosya yolu, label: hata mesajlarındaki ad, get_data: yazılacak veriyi döndürür.
+        lock verilirse veri serileştirilirken tutulur (sahibi veriyi bu kilitle değiştirmeli).
+        """
+        self.path = path
+        self.label = label
+        self.get_data = get_data
+        self.delay = delay
+        self.lock = lock or threading.Lock()
+        self.write_lock = threading.Lock()
+        self.timer_lock = threading.Lock()
+        self.timer: Optional[threading.Timer] = None
+
+    def load(self) -> Any:
+        """Dosyayı oku; yoksa ya da bozuksa boş sözlük"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"{self.label} yükleme hatası: {e}")
+        return {}
+
+    def save(self):
+        """Veriyi hemen yaz (bekleyen gecikmeli yazma iptal edilir)"""
+        with self.timer_lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        with self.write_lock:
+            try:
+                with self.lock:
+                    text = json.dumps(self.get_data(), indent=2, ensure_ascii=False)
+                temp_file = self.path + ".tmp"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(temp_file, self.path)
+            except Exception as e:
+                print(f"{self.label} kaydetme hatası: {e}")
+
+    def schedule(self):
+        """Yazmayı delay saniye ertele; bu sürede gelen değişiklikler aynı yazmaya girer (kilit altında çağrılabilir)"""
+        with self.timer_lock:
+            if self.timer is None:
+                self.timer = threading.Timer(self.delay, self.save)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        """Bekleyen yazma varsa hemen yap (kapanışta)"""
+        if self.timer is not None:
+            self.save()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+⏱️ Naofumi Bot Gecikme Profilleri
+yt-dlp bekleme/hız ayarlarını platforma ve giriş noktasına göre seçer,
+bot koruması hataları artınca otomatik olarak gizli (stealth) moda geçer
+"""
+
+import time
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from config import LATENCY_PROFILE, STEALTH_ERROR_THRESHOLD, STEALTH_WINDOW
+
+logger = logging.getLogger(__name__)
+
+# Profil ayarları (yt-dlp seçenekleri)
+# concurrent_fragment_downloads üst sınırdır; gerçek değeri fragment_controller belirler
+LATENCY_PROFILES = {
+    'fast': {
+        'concurrent_fragment_downloads': 8
+    },
+    'balanced': {
+        'sleep_interval': 1,
+        'max_sleep_interval': 3,
+        'sleep_interval_requests': 1,
+        'concurrent_fragment_downloads': 4
+    },
+    'stealth': {
+        'sleep_interval': 5,
+        'max_sleep_interval': 20,
+        'sleep_interval_requests': 5,
+        'sleep_interval_subtitles': 5,
+        'concurrent_fragment_downloads': 1,
+        'throttled_rate': '500K'
+    }
+}
+
+# Platform bazlı varsayılan profil (listede olmayanlar 'fast')
+PLATFORM_PROFILES = {
+    'youtube': 'balanced'
+}
+
+# Giriş noktası bazlı profil (platform ayarını geçersiz kılar)
+ENTRY_POINT_PROFILES = {
+    'fast_download': 'fast'
+}
+
+# Bot korumasına işaret eden hata metinleri
+BOT_DETECTION_MARKERS = ('sign in to confirm', 'not a bot', '429', 'too many requests')
+
+
+class LatencyProfiles:
+    def __init__(self):
+        """Gecikme profili seçicisini başlat"""
+        # {platform: bot koruması hata zamanları}
+        self.bot_errors: Dict[str, Deque[float]] = {}
+
+    def _recent_errors(self, platform: str, now: float) -> int:
+        """Pencere içindeki bot koruması hatası sayısı"""
+        errors = self.bot_errors.get(platform)
+        if not errors:
+            return 0
+        while errors and now - errors[0] > STEALTH_WINDOW:
+            errors.popleft()
+        return len(errors)
+
+    def stealth_active(self, platform: Optional[str]) -> bool:
+        """Platformda bot koruması hataları eşiği aştı mı?"""
+        return self._recent_errors(platform or 'unknown', time.time()) >= STEALTH_ERROR_THRESHOLD
+
+    def select(self, platform: Optional[str], entry_point: Optional[str] = None) -> str:
+        """Kullanılacak profil adını seç"""
+        if LATENCY_PROFILE in LATENCY_PROFILES:
+            return LATENCY_PROFILE
+        if self.stealth_active(platform):
+            return 'stealth'
+        if entry_point in ENTRY_POINT_PROFILES:
+            return ENTRY_POINT_PROFILES[entry_point]
+        return PLATFORM_PROFILES.get(platform, 'fast')
+
+    def options(self, platform: Optional[str], entry_point: Optional[str] = None) -> Dict:
+        """Seçilen profilin yt-dlp seçenekleri"""
+        return dict(LATENCY_PROFILES[self.select(platform, entry_point)])
+
+    def record_error(self, platform: Optional[str], error: Exception):
+        """Başarısız denemeyi kaydet; bot koruması hatasıysa stealth sayacına ekle"""
+        message = str(error).lower()
+        if not any(marker in message for marker in BOT_DETECTION_MARKERS):
+            return
+
+        platform = platform or 'unknown'
+        was_active = self.stealth_active(platform)
+        self.bot_errors.setdefault(platform, deque()).append(time.time())
+        if not was_active and self.stealth_active(platform):
+            logger.warning(f"{platform}: bot koruması hataları artıyor, stealth profiline geçildi")
+
+    def get_status(self) -> Dict:
+        """Platform bazında aktif profil ve son hata sayıları"""
+        now = time.time()
+        return {
+            platform: {
+                'recent_bot_errors': self._recent_errors(platform, now),
+                'profile': self.select(platform)
+            }
+            for platform in list(self.bot_errors)
+        }
+
+
+# Global instance
+latency_profiles = LatencyProfiles()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+🚦 Naofumi Bot Yük Kontrolü
+İndirme, dönüştürme ve yükleme aşamaları için global eşzamanlılık slotları
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from config import DOWNLOAD_SLOTS, TRANSCODE_SLOTS, UPLOAD_SLOTS
+
+logger = logging.getLogger(__name__)
+
+
+class LoadControl:
+    def __init__(self):
+        """Aşama slotlarını başlat"""
+        self.limits = {
+            'download': max(1, DOWNLOAD_SLOTS),
+            'transcode': max(1, TRANSCODE_SLOTS),
+            'upload': max(1, UPLOAD_SLOTS)
+        }
+        self.semaphores = {stage: asyncio.Semaphore(limit) for stage, limit in self.limits.items()}
+        self.active = {stage: 0 for stage in self.limits}
+        self.waiting = {stage: 0 for stage in self.limits}
+
+    @asynccontextmanager
+    async def slot(self, stage: str):
+        """Aşama için slot al; slot yoksa boşalana kadar bekle"""
+        semaphore = self.semaphores[stage]
+        self.waiting[stage] += 1
+        try:
+            if semaphore.locked():
+                logger.info(f"{stage} slotları dolu, bekleniyor ({self.active[stage]}/{self.limits[stage]})")
+            await semaphore.acquire()
+        finally:
+            self.waiting[stage] -= 1
+
+        self.active[stage] += 1
+        try:
+            yield
+        finally:
+            self.active[stage] -= 1
+            semaphore.release()
+
+    def saturation(self) -> float:
+        """En dolu aşamanın doluluk oranı (1.0 = tüm slotlar kullanımda)"""
+        return max(self.active[stage] / limit for stage, limit in self.limits.items())
+
+    def get_status(self) -> Dict:
+        """Aşama bazında slot kullanımını döndür"""
+        return {
+            stage: {
+                'limit': limit,
+                'active': self.active[stage],
+                'waiting': self.waiting[stage],
+                'saturation': round(self.active[stage] / limit, 2)
+            }
+            for stage, limit in self.limits.items()
+        }
+
+
+# Global instance
+load_control = LoadControl()
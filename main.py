@@ -21,11 +21,32 @@ import requests
 import threading
 from flask import Flask, jsonify, request
 from datetime import datetime, timedelta
-from file_finder import find_downloaded_file # Dosya bulma modülü
+from workspace import workspaces # İş bazlı geçici klasörler
+from storage_manager import storage_manager # Disk kotası ve boş alan kontrolü
+from thumbnail_cache import thumbnail_cache # Küçültülmüş thumbnail önbelleği
+from progress_renderer import progress_renderer # Birleştirilmiş durum mesajı güncellemeleri
+from telegram_api import telegram_api # FloodWait ve hız sınırlı Telegram gönderimi
+from job_metrics import job_metrics # İş aşamalarının süreleri ve canlı ilerlemesi
+from job_store import job_store # Yeniden başlatmada sürdürülen kalıcı iş kaydı
+from download_executor import download_executor # yt-dlp iş havuzu
+from strategy_registry import strategy_registry # Bypass strateji sıralaması
+from media_probe import AdmissionError, admit, audio_bitrate, audio_codec, audio_format, estimate, video_format # İndirme öncesi limit kontrolü
+from media_cache import media_cache # İndirilen medya önbelleği
+from file_id_cache import file_id_cache # Telegram file_id önbelleği
+from single_flight import single_flight # Aynı anda gelen aynı indirmeleri birleştirme
+from job_scheduler import job_scheduler, QueueFullError # Kullanıcılar arası adil iş sıralaması
+from load_control import load_control # İndirme/dönüştürme/yükleme slotları
+from rate_limiter import rate_limiter # Kullanıcı/sohbet hız sınırı
+from latency_profiles import latency_profiles # Platform/giriş noktası gecikme profilleri
+from fragment_controller import fragment_controller, media_host # Uyarlanabilir parça eşzamanlılığı
+from bandwidth_manager import bandwidth_manager # Ağırlıklı adil bant genişliği paylaşımı
+import audio_stream # Ara dosyasız akışlı MP3 dönüştürme
+from user_preferences import user_preferences, AUDIO_MODES # Kullanıcı bazlı indirme tercihleri
+from transcode_pool import transcode_pool # CPU bütçeli ffmpeg dönüştürme aşaması
 
-from pyrogram import Client, filters
+from pyrogram import Client, filters, idle
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from yt_dlp import YoutubeDL
+from pyrogram.errors import BadRequest
 # MoviePy import'u kaldırıldı - Render.com'da sorun çıkarıyor
 MOVIEPY_AVAILABLE = False
 
@@ -108,6 +129,9 @@ TEMP_DIR = "/tmp/temp"
 os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 os.makedirs(TEMP_DIR, exist_ok=True)
 
+# send_audio ile gönderilecek dosya uzantıları (MP3 ve orijinal ses modları)
+AUDIO_EXTENSIONS = ('.mp3', '.m4a', '.opus', '.ogg', '.aac', '.flac', '.wav')
+
 # FFmpeg kontrolü
 def check_ffmpeg():
     """FFmpeg'in yüklü olup olmadığını kontrol et"""
@@ -116,6 +140,13 @@ def check_ffmpeg():
         result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
         if result.returncode == 0:
             logger.info("✅ FFmpeg yüklü ve çalışıyor")
+            # Kodlayıcılar başlangıçta bir kez tespit edilir (dönüştürme havuzu kullanır)
+            encoders = transcode_pool.detect_encoders()
+            for codec in ('mp3', 'aac', 'opus'):
+                try:
+                    logger.info(f"🎛️ {codec} kodlayıcısı: {transcode_pool.encoder(codec)}")
+                except RuntimeError:
+                    logger.warning(f"⚠️ {codec} kodlayıcısı bulunamadı ({len(encoders)} kodlayıcı mevcut)")
             return True
         else:
             logger.error("❌ FFmpeg yüklü değil veya çalışmıyor")
@@ -132,6 +163,9 @@ if not check_ffmpeg():
 
 app = Client("kosemtra_bot", api_id=API_ID, api_hash=API_HASH, bot_token=BOT_TOKEN)
 
+# Giden tüm istekler sohbet/global hız sınırı ve FloodWait yönetiminden geçer
+telegram_api.install(app)
+
 # Flask uygulaması (Render.com için)
 web_app = Flask(__name__)
 
@@ -158,6 +192,26 @@ def health_check():
         'last_keep_alive_ago': int(current_time - bot_stats.get('last_keep_alive', current_time)),
         'timestamp': current_time,
         'memory_usage': 'N/A',  # Render.com'da psutil kullanımı sınırlı
+        'download_pool': download_executor.get_status(),
+        'media_cache': media_cache.get_status(),
+        'file_id_cache': file_id_cache.get_status(),
+        'single_flight': single_flight.get_status(),
+        'scheduler': job_scheduler.get_status(),
+        'load': load_control.get_status(),
+        'rate_limiter': rate_limiter.get_status(),
+        'latency_profiles': latency_profiles.get_status(),
+        'fragments': fragment_controller.get_status(),
+        'bandwidth': bandwidth_manager.get_status(),
+        'transcode': transcode_pool.get_status(),
+        'workspaces': workspaces.get_status(),
+        'storage': storage_manager.get_status(),
+        'thumbnails': thumbnail_cache.get_status(),
+        'progress': progress_renderer.get_status(),
+        'telegram': telegram_api.get_status(),
+        'jobs': job_metrics.get_status(),
+        'job_store': job_store.get_status(),
+        'saturation': round(max(load_control.saturation(), job_scheduler.active / job_scheduler.max_active), 2),
+        'queue_length': job_scheduler.queued_count(),
         'version': '2.0.0'
     })
 
@@ -313,90 +367,499 @@ def get_cached_url(url_id: str) -> str:
         logger.warning(f"URL cache'de bulunamadı: {url_id}")
     return url
 
+def get_user_id(message) -> int:
+    """Mesajı gönderen kullanıcının ID'si (anonim gönderimlerde sohbet ID'si)"""
+    return message.from_user.id if message.from_user else message.chat.id
+
+def get_audio_mode(user_id: int) -> str:
+    """Ses teslim modu: kullanıcı tercihi, yoksa admin ayarı ('mp3' ya da 'native')"""
+    default = admin_panel.settings.get('audio_delivery', 'mp3') if ADMIN_PANEL_ENABLED else 'mp3'
+    mode = user_preferences.get(user_id, 'audio_mode', default)
+    return mode if mode in AUDIO_MODES else 'mp3'
+
 ######################################
 #          FONKSİYONLAR             #
 ######################################
 
-async def send_file(client, chat_id, video_file, video_title, waiting_message, thumbnail_file=None):
+class UploadError(Exception):
+    """Dosya gönderilemedi (kullanıcıya bekleme mesajında zaten bildirildi)"""
+
+async def send_cached_file(client, chat_id, cache_key, waiting_message):
     """
-    📤 İndirilen video dosyasını Telegram üzerinden gönderir.
-    ⏱️ Video süresi, çözünürlük vb. bilgileri otomatik tespit edilir.
+    📨 Daha önce yüklenmiş medyayı file_id ile yeniden yüklemeden gönderir.
+    Telegram file_id'yi reddederse kayıt silinir. Gönderildiyse True döndürür.
     """
+    entry = file_id_cache.get(cache_key)
+    if not entry:
+        return False
+    
+    caption = f"🎬 **{entry['title']}**\n\n"
+    if entry.get('file_name'):
+        caption += f"📁 **Dosya:** {entry['file_name']}\n"
+    caption += f"📊 **Boyut:** {entry['file_size'] / (1024 * 1024):.1f} MB"
+    
+    send_methods = {
+        'video': client.send_video,
+        'audio': client.send_audio,
+        'document': client.send_document
+    }
     try:
-        start_time = time.time()
-        last_update_time = start_time
+        await send_methods[entry['media_type']](chat_id, entry['file_id'], caption=caption)
+    except BadRequest as e:
+        logger.warning(f"file_id reddedildi, kayıt siliniyor ({cache_key}): {e}")
+        file_id_cache.invalidate(cache_key)
+        return False
+    except Exception as e:
+        logger.error(f"file_id ile gönderim hatası ({cache_key}): {e}")
+        return False
+    
+    # İstatistikleri güncelle
+    bot_stats['total_downloads'] += 1
+    bot_stats['total_users'].add(chat_id)
+    
+    try:
+        await waiting_message.delete()
+    except Exception:
+        pass
+    
+    logger.info(f"file_id ile gönderildi: {entry['title']}")
+    return True
 
-        duration = 0
-        width = 0
-        height = 0
+async def send_file(client, chat_id, video_file, video_title, waiting_message, thumbnail_file=None, cache_key=None, info_dict=None):
+    """
+    📤 İndirilen dosyayı Telegram üzerinden tek bir yüklemeyle gönderir.
+    🖼️ Thumbnail medyanın kendi küçük resmi olarak eklenir, ayrı fotoğraf mesajı atılmaz.
+    🎵 Ses dosyaları send_audio ile (sanatçı/başlık/süre), videolar send_video ile gönderilir.
+    cache_key verilirse dönen file_id sonraki istekler için saklanır.
+    Gönderilemezse kullanıcıya bildirilir ve UploadError fırlatılır (iş kaydı 'failed' olur).
+    """
+    try:
+        start_time = time.time()
+        
+        info_dict = info_dict or {}
+        is_audio = os.path.splitext(video_file)[1].lower() in AUDIO_EXTENSIONS
+        duration = int(info_dict.get('duration') or 0)
+        width = int(info_dict.get('width') or 0)
+        height = int(info_dict.get('height') or 0)
+        
+        # Yükleme de bant genişliği payına tabi (indirmeler tarafından aç bırakılmaz)
+        upload_flow = None
+        uploaded = 0
 
         async def progress_callback(current, total):
-            nonlocal last_update_time
+            nonlocal uploaded
+            if upload_flow:
+                await upload_flow.pacer.athrottle(current - uploaded)
+                uploaded = current
+            timeline.observe({'status': 'uploading', 'downloaded_bytes': current, 'total_bytes': total})
             elapsed_time = time.time() - start_time
             percent_complete = current / total * 100
             eta = (total - current) / (current / elapsed_time) if current > 0 else 0
 
-            if time.time() - last_update_time >= 5:
-                try:
-                    await waiting_message.edit_text(
-                        f"📤 Video gönderiliyor...\n"
-                        f"İlerleme: {percent_complete:.1f}%\n"
-                        f"⏱️ ETA: {int(eta)} saniye"
-                    )
-                    last_update_time = time.time()
-                except Exception as e:
-                    logger.error(f"İlerleme mesajı güncellenirken hata: {e}")
+            # Düzenleme sıklığı ve flood bütçesi progress_renderer'da
+            progress_renderer.update(
+                waiting_message,
+                f"📤 {'Ses' if is_audio else 'Video'} gönderiliyor...\n"
+                f"İlerleme: {percent_complete:.0f}%\n"
+                f"⏱️ ETA: {int(eta)} saniye"
+            )
 
         # Dosya boyutunu al
         file_size = os.path.getsize(video_file)
         file_size_mb = file_size / (1024 * 1024)
         
-        # Thumbnail varsa gönder
-        if thumbnail_file and os.path.exists(thumbnail_file):
-            try:
-                await client.send_photo(
-                    chat_id=chat_id,
-                    photo=thumbnail_file,
-                    caption=f"🎬 **{video_title}**\n\n"
-                           f"📁 **Dosya:** {os.path.basename(video_file)}\n"
-                           f"📊 **Boyut:** {file_size_mb:.1f} MB"
-                )
-            except Exception as e:
-                logger.error(f"Thumbnail gönderilirken hata: {e}")
-
-        # Video dosyasını gönder
-        await client.send_video(
-            chat_id=chat_id,
-            video=video_file,
-            caption=f"🎬 **{video_title}**\n\n"
-                   f"📁 **Dosya:** {os.path.basename(video_file)}\n"
-                   f"📊 **Boyut:** {file_size_mb:.1f} MB",
-            progress=progress_callback
+        caption = (
+            f"🎬 **{video_title}**\n\n"
+            f"📁 **Dosya:** {os.path.basename(video_file)}\n"
+            f"📊 **Boyut:** {file_size_mb:.1f} MB"
         )
+        thumb = thumbnail_file if thumbnail_file and os.path.exists(thumbnail_file) else None
+
+        # Dosyayı gönder (thumbnail ve açıklama aynı istekte)
+        timeline = job_metrics.start('upload', stage='upload_wait')
+        job_store.set_state(job_store.current(), 'uploading')
+        async with load_control.slot('upload'):
+            timeline.observe({'status': 'uploading'})
+            upload_flow = bandwidth_manager.open('upload')
+            try:
+                if is_audio:
+                    sent_message = await client.send_audio(
+                        chat_id=chat_id,
+                        audio=video_file,
+                        caption=caption,
+                        duration=duration,
+                        performer=info_dict.get('artist') or info_dict.get('uploader') or info_dict.get('channel'),
+                        title=info_dict.get('track') or info_dict.get('title') or video_title,
+                        thumb=thumb,
+                        progress=progress_callback
+                    )
+                else:
+                    sent_message = await client.send_video(
+                        chat_id=chat_id,
+                        video=video_file,
+                        caption=caption,
+                        duration=duration,
+                        width=width,
+                        height=height,
+                        thumb=thumb,
+                        supports_streaming=True,
+                        progress=progress_callback
+                    )
+            except BaseException:
+                job_metrics.finish(timeline, False)
+                raise
+            finally:
+                bandwidth_manager.close(upload_flow)
+        job_metrics.finish(timeline, True)
+        file_id_cache.put(cache_key, sent_message, video_title)
 
         # İstatistikleri güncelle
         bot_stats['total_downloads'] += 1
         bot_stats['total_users'].add(chat_id)
 
         # Bekleme mesajını sil
+        progress_renderer.forget(waiting_message)
         try:
             await waiting_message.delete()
         except Exception:
             pass
 
-        logger.info(f"Video başarıyla gönderildi: {video_title}")
+        logger.info(f"{'Ses' if is_audio else 'Video'} başarıyla gönderildi: {video_title}")
 
     except Exception as e:
-        logger.error(f"Video gönderilirken hata: {e}")
+        logger.error(f"Dosya gönderilirken hata: {e}")
         try:
-            await waiting_message.edit_text(f"❌ Video gönderilemedi: {e}")
+            await progress_renderer.edit(waiting_message, f"❌ Dosya gönderilemedi: {e}")
         except Exception:
             pass
+        raise UploadError(str(e)) from e
+
+async def run_strategy_chain(target, platform, format_opts, log_prefix="", exclude=(), progress_callback=None, pacer=None):
+    """
+    🧭 Bypass stratejilerini başarı skoruna göre sırayla dener.
+    İlk başarılı denemenin (info_dict, file_name) sonucunu döndürür.
+    """
+    for index, strategy in enumerate(strategy_registry.ordered(platform), 1):
+        if strategy['name'] in exclude:
+            continue
+        
+        logger.info(f"{log_prefix}{index}. Deneme - {strategy['label']}")
+        ydl_opts = strategy_registry.build_options(strategy['name'], format_opts)
+        attempt_start = time.time()
+        
+        try:
+            info_dict, file_name = await download_executor.extract_info(ydl_opts, target, True, progress_callback, pacer)
+        except Exception as e:
+            strategy_registry.record(platform, strategy['name'], False, time.time() - attempt_start)
+            latency_profiles.record_error(platform, e)
+            logger.warning(f"{log_prefix}{index}. Deneme başarısız ({strategy['label']}): {e}")
+            continue
+        
+        strategy_registry.record(platform, strategy['name'], True, time.time() - attempt_start)
+        logger.info(f"✅ {log_prefix}{index}. Deneme başarılı - {strategy['label']}")
+        return info_dict, file_name
+    
+    raise Exception("Tüm bypass yöntemleri başarısız oldu. YouTube bot koruması çok güçlü.")
+
+async def extract_metadata(target, platform, format_opts, log_prefix=""):
+    """
+    ⚡ Hedged metadata çıkarma: en iyi HEDGE_FANOUT stratejiyi HEDGE_STAGGER
+    aralıklarla aynı anda başlatır, ilk geçerli info_dict'i alır, diğerlerini iptal eder.
+    Hepsi başarısız olursa sıradaki stratejilerle devam eder.
+    Hedged mod kapalıysa stratejiler tek tek denenir.
+    (info_dict, strategy) döndürür.
+    """
+    strategies = strategy_registry.ordered(platform)
+    fanout = max(1, HEDGE_FANOUT) if HEDGED_EXTRACTION else 1
+    
+    for wave_start in range(0, len(strategies), fanout):
+        wave = strategies[wave_start:wave_start + fanout]
+        jobs = []
+        
+        async def attempt(position, strategy):
+            await asyncio.sleep(position * HEDGE_STAGGER)
+            logger.info(f"{log_prefix}Metadata denemesi - {strategy['label']}")
+            ydl_opts = strategy_registry.build_options(strategy['name'], format_opts)
+            attempt_start = time.time()
+            job = download_executor.submit(ydl_opts, target, download=False)
+            jobs.append(job)
+            
+            try:
+                info_dict, _ = await job
+            except Exception as e:
+                strategy_registry.record(platform, strategy['name'], False, time.time() - attempt_start)
+                latency_profiles.record_error(platform, e)
+                logger.warning(f"{log_prefix}Metadata denemesi başarısız ({strategy['label']}): {e}")
+                return None
+            
+            # Arama sonuçları (ytsearch1:) playlist olarak döner
+            if info_dict and info_dict.get('_type') == 'playlist' and info_dict.get('entries'):
+                info_dict = next((entry for entry in info_dict['entries'] if entry), None)
+            
+            if not info_dict or not (info_dict.get('formats') or info_dict.get('url')):
+                strategy_registry.record(platform, strategy['name'], False, time.time() - attempt_start)
+                logger.warning(f"{log_prefix}Metadata denemesi geçersiz sonuç döndü ({strategy['label']})")
+                return None
+            
+            strategy_registry.record(platform, strategy['name'], True, time.time() - attempt_start)
+            logger.info(f"✅ {log_prefix}Metadata alındı - {strategy['label']}")
+            return info_dict, strategy
+        
+        tasks = [asyncio.create_task(attempt(position, strategy)) for position, strategy in enumerate(wave)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result:
+                    return result
+        finally:
+            # Kaybeden denemeleri iptal et
+            for task in tasks:
+                task.cancel()
+            for job in jobs:
+                download_executor.cancel(job)
+    
+    raise Exception("Tüm bypass yöntemleri başarısız oldu. YouTube bot koruması çok güçlü.")
+
+async def fetch_media(target, platform, format_opts, log_prefix="", progress_callback=None, entry_point=None, workspace=None):
+    """
+    📥 Medyayı iki aşamada indirir: önce metadata çıkarılır ve süre/boyut
+    limitleri kontrol edilir, baytlar yalnızca kabul edilen işler için
+    kazanan stratejiyle indirilir. (info_dict, file_name) döndürür.
+    progress_callback indirme işçisinin thread'inden çağrılır; bayt/hız/ETA/parça
+    olaylarının yanında aşama olayları da (sıra bekleme, işleme, dönüştürme) gelir.
+    entry_point gecikme profilini seçmek için kullanılır (örn. 'fast_download').
+    workspace verilirse çıktı o işin klasörüne yazılır.
+    """
+    # Aşama süreleri ve aktif işin ilerlemesi metrik katmanına ve kalıcı iş kaydına da gider
+    timeline = job_metrics.start(entry_point or platform)
+    job_id = job_store.current()
+    job_store.set_state(job_id, 'extracting')
+    
+    def on_event(event):
+        timeline.observe(event)
+        job_store.observe(job_id, event)
+        if progress_callback:
+            progress_callback(event)
+    
+    try:
+        result = await run_fetch_stages(target, platform, format_opts, log_prefix, on_event, entry_point, workspace)
+    except BaseException:
+        job_metrics.finish(timeline, False)
+        raise
+    job_metrics.finish(timeline, True)
+    return result
+
+async def run_fetch_stages(target, platform, format_opts, log_prefix, progress_callback, entry_point, workspace):
+    """
+    🧩 fetch_media aşamaları: metadata, kabul, disk ayırma, indirme ve dönüştürme.
+    """
+    # Bekleme/parça ayarları platforma ve giriş noktasına göre (bot koruması artarsa stealth)
+    profile = latency_profiles.select(platform, entry_point)
+    logger.info(f"{log_prefix}Gecikme profili: {profile}")
+    format_opts = {**latency_profiles.options(platform, entry_point), **format_opts}
+    if workspace:
+        format_opts['outtmpl'] = workspace.outtmpl
+    
+    info_dict, strategy = await extract_metadata(target, platform, format_opts, log_prefix)
+    
+    # Limit aşan işler bayt indirilmeden reddedilir ya da küçük formata düşürülür
+    format_opts = admit(info_dict, format_opts)
+    
+    # Disk kotası ve boş alan kontrolü (gerekirse önbellekten LRU ile yer açılır)
+    if workspace:
+        await asyncio.to_thread(storage_manager.reserve, workspace, estimate(info_dict, format_opts)[1])
+    
+    # Thumbnail medya indirilirken arka planda hazırlanır (reddedilen işler için hiç indirilmez)
+    thumbnail_cache.prefetch(info_dict)
+    
+    # MP3 dönüştürmesi indirmeden ayrı aşamada (transcode_pool) yapılır: yt-dlp yalnızca
+    # kaynağı indirir, indirme slotu bırakıldıktan sonra dönüştürme CPU bütçesi sırasına girer
+    bitrate = audio_bitrate(format_opts)
+    download_opts = format_opts
+    if bitrate is not None:
+        download_opts = {
+            **format_opts,
+            'postprocessors': [
+                postprocessor for postprocessor in format_opts.get('postprocessors') or []
+                if postprocessor.get('key') != 'FFmpegExtractAudio'
+            ]
+        }
+    
+    progress_callback({'status': 'download_queued'})
+    async with load_control.slot('download'):
+        progress_callback({'status': 'downloading'})
+        # Paralel parça sayısı medya sunucusunun ölçülen hızına ve global bütçeye göre
+        ticket = await fragment_controller.acquire(
+            media_host(info_dict) or platform, download_opts.get('concurrent_fragment_downloads')
+        )
+        download_opts = {**download_opts, 'concurrent_fragment_downloads': ticket.level}
+        
+        def on_progress(event):
+            ticket.observe(event)
+            progress_callback(event)
+        
+        # Bant genişliği payı: kısa ses işleri videolardan daha yüksek ağırlık alır
+        flow = bandwidth_manager.open('audio' if audio_codec(format_opts) is not None else 'video')
+        
+        ydl_opts = strategy_registry.build_options(strategy['name'], download_opts)
+        download_start = time.time()
+        success = False
+        try:
+            # MP3: tek parça HTTP kaynağı indirilirken ffmpeg'e aktarılır, kaynak dosya yazılmaz
+            if STREAMING_TRANSCODE and bitrate is not None and audio_stream.can_stream(info_dict):
+                try:
+                    async with load_control.slot('transcode'):
+                        result = await audio_stream.transcode(ydl_opts, info_dict, bitrate, on_progress, flow.pacer)
+                    success = True
+                    return result
+                except Exception as e:
+                    logger.warning(f"{log_prefix}Akışlı dönüştürme başarısız, normal indirmeye geçiliyor: {e}")
+            
+            info_dict, file_name = await download_executor.download_info(ydl_opts, info_dict, on_progress, flow.pacer)
+            success = True
+        except Exception as e:
+            strategy_registry.record(platform, strategy['name'], False, time.time() - download_start)
+            latency_profiles.record_error(platform, e)
+            logger.warning(f"{log_prefix}İndirme başarısız ({strategy['label']}), diğer stratejiler deneniyor: {e}")
+            info_dict, file_name = await run_strategy_chain(
+                target, platform, download_opts, log_prefix,
+                exclude=(strategy['name'],), progress_callback=on_progress, pacer=flow.pacer
+            )
+            success = True
+        finally:
+            bandwidth_manager.close(flow)
+            fragment_controller.release(ticket, success)
+    
+    if bitrate is not None:
+        progress_callback({'status': 'transcode_queued'})
+        file_name = await transcode_pool.to_mp3(file_name, bitrate, progress_callback=progress_callback)
+    return info_dict, file_name
+
+# yt-dlp işlemcilerinin kullanıcıya gösterilen adları
+POSTPROCESSOR_LABELS = {
+    'Merger': 'Video ve ses birleştiriliyor',
+    'FFmpegExtractAudio': 'Ses çıkarılıyor',
+    'FFmpegVideoConvertor': 'Video dönüştürülüyor',
+    'FFmpegVideoRemuxer': 'Video paketleniyor',
+    'FFmpegFixupM3u8': 'Video düzeltiliyor',
+    'FFmpegFixupM4a': 'Ses düzeltiliyor'
+}
+
+def download_progress_text(event):
+    """
+    ⬇️ İlerleme olayını (yt-dlp hook'ları ve aşama olayları) durum mesajı metnine çevirir.
+    Yüzde tam sayıya yuvarlanır; değişmeyen metin için düzenleme yapılmaz.
+    """
+    status = event.get('status')
+    if status == 'download_queued':
+        return "⏳ **İndirme sırası bekleniyor...**"
+    if status == 'finished':
+        return "✅ **İndirme bitti, işleniyor...**"
+    if status == 'postprocessing':
+        label = POSTPROCESSOR_LABELS.get(event.get('postprocessor'), 'İşleniyor')
+        return f"🔄 **{label}...**\n\nLütfen bekleyin..."
+    if status == 'transcode_queued':
+        return "⏳ **Dönüştürme sırası bekleniyor...**"
+    if status == 'transcoding':
+        return "🔄 **MP3'e dönüştürülüyor...**\n\nLütfen bekleyin..."
+    
+    downloaded = event.get('downloaded_bytes') or 0
+    total = event.get('total_bytes') or event.get('total_bytes_estimate')
+    text = "⬇️ **İndiriliyor...**\n\n"
+    if total:
+        text += f"İlerleme: {downloaded / total * 100:.0f}% ({total / (1024 * 1024):.0f} MB)\n"
+    else:
+        text += f"İndirilen: {downloaded / (1024 * 1024):.0f} MB\n"
+    if event.get('speed'):
+        text += f"🚀 Hız: {event['speed'] / (1024 * 1024):.1f} MB/sn\n"
+    if event.get('fragment_index') and event.get('fragment_count'):
+        text += f"🧩 Parça: {event['fragment_index']}/{event['fragment_count']}\n"
+    if event.get('eta') is not None:
+        text += f"⏱️ ETA: {int(event['eta'])} saniye"
+    return text
+
+async def show_download_progress(status_msg, event):
+    """
+    ⬇️ Paylaşılan indirme ilerlemesini kullanıcının durum mesajına yansıtır.
+    """
+    progress_renderer.update(status_msg, download_progress_text(event))
+
+async def schedule_download(message, user_id, kind, *args, job_id=None):
+    """
+    📋 İndirme işini kalıcı iş kaydına yazar ve adil zamanlayıcıya gönderir, handler'ı bekletmez.
+    kind JOB_HANDLERS'taki handler'dır, args ona (client, message'dan sonra) verilir.
+    İş hemen başlayamazsa kullanıcıya kuyruktaki sırası bildirilir ve sıra ilerledikçe güncellenir.
+    job_id verilirse (yeniden başlatma sonrası) mevcut kayıt sürdürülür.
+    """
+    if job_id is None:
+        job_id, created = job_store.create(kind, user_id, message.chat.id, message.id, list(args))
+        if not created:
+            # Aynı istek zaten kuyrukta ya da çalışıyor
+            logger.info(f"İş {job_id} zaten sürüyor, tekrar kuyruğa alınmadı")
+            return
+    
+    queue_msg = None
+    started = False
+    
+    def queue_text(position):
+        return f"⏳ **Sıraya alındı**\n\n📋 Sıranız: {position}\nSıranız geldiğinde indirme otomatik başlayacak."
+    
+    async def on_position(position):
+        if queue_msg and not started:
+            await queue_msg.edit_text(queue_text(position))
+    
+    async def run():
+        nonlocal started
+        started = True
+        if queue_msg:
+            try:
+                await queue_msg.delete()
+            except Exception:
+                pass
+        
+        token = job_store.attach(job_id)
+        try:
+            await JOB_HANDLERS[kind](app, message, *args)
+        except asyncio.CancelledError:
+            # Kapanışta kesildi: kayıt ve çalışma klasörü kalır, yeniden başlatmada devam eder
+            raise
+        except BaseException as e:
+            job_store.finish(job_id, error=str(e))
+            workspaces.remove_job(job_id)
+            raise
+        else:
+            job_store.finish(job_id)
+            # İş klasörü (indirilen dosya ve thumbnail) silinir
+            workspaces.remove_job(job_id)
+        finally:
+            job_store.detach(token)
+    
+    is_admin = ADMIN_PANEL_ENABLED and admin_panel.is_admin(user_id)
+    try:
+        job = job_scheduler.submit(user_id, run, is_admin=is_admin, on_position=on_position)
+    except QueueFullError as e:
+        # Aşırı yükte yeni iş hemen reddedilir
+        job_store.finish(job_id, error=str(e))
+        await message.reply_text(
+            "🚦 **Bot Şu Anda Çok Yoğun**\n\n"
+            f"Sırada çok fazla indirme var ({job_scheduler.queued_count()}).\n"
+            f"⏱️ Lütfen yaklaşık {max(1, math.ceil(e.retry_after / 60))} dakika sonra tekrar deneyin."
+        )
+        return
+    if job.position:
+        shown_position = job.position
+        queue_msg = await message.reply_text(queue_text(shown_position))
+        # Mesaj gönderilirken iş başladıysa ya da sıra değiştiyse düzelt
+        if started:
+            await queue_msg.delete()
+        elif job.position != shown_position:
+            await on_position(job.position)
 
 async def download_video(client, message, url, format_type, quality=None):
     """
     📥 Video indirme fonksiyonu
     """
+    workspace = workspaces.create('download')
     try:
         logger.info(f"Video indirme başladı: {url}")
         
@@ -405,76 +868,11 @@ async def download_video(client, message, url, format_type, quality=None):
         if ADVANCED_FEATURES_ENABLED:
             platform = advanced_features.detect_platform(url)
         
-        # yt-dlp ayarları - YouTube bot koruması bypass (Alternatif yöntem)
-        ydl_opts = {
-            'outtmpl': '/tmp/%(title)s.%(ext)s',  # Render.com'da /tmp kullan
-            'noplaylist': True,
-            'extract_flat': False,
-            'writethumbnail': False,
-            'writeinfojson': False,
-            'socket_timeout': 120,
-            'retries': 3,
-            'fragment_retries': 3,
-            'skip_unavailable_fragments': True,
-            'keep_fragments': False,
-            'no_warnings': True,
-            'ignoreerrors': False,
-            'quiet': True,
-            # YouTube bot koruması için alternatif ayarlar
-            'extractor_args': {
-                'youtube': {
-                    'player_client': ['android_music', 'android_creator', 'android', 'web'],
-                    'comment_sort': ['top'],
-                    'max_comments': [0],
-                    'include_live_chat': False,
-                    'skip_download': False,
-                    'age_limit': [0],
-                    'geo_bypass': True,
-                    'geo_bypass_country': 'US'
-                }
-            },
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Referer': 'https://www.youtube.com/',
-                'Origin': 'https://www.youtube.com',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Upgrade-Insecure-Requests': '1',
-                'Cache-Control': 'no-cache',
-                'Pragma': 'no-cache'
-            },
-            'sleep_interval': 5,
-            'max_sleep_interval': 20,
-            'sleep_interval_requests': 5,
-            'sleep_interval_subtitles': 5,
-            'concurrent_fragment_downloads': 1,
-            'throttled_rate': '500K',
-            # Alternatif çözümler
-            'cookiesfrombrowser': None,
-            'cookiefile': None,
-            'no_check_certificate': True,
-            'prefer_insecure': False,
-        }
-        
         # Format ayarları
         if format_type == 'mp3':
-            ydl_opts['format'] = 'bestaudio[ext=m4a]/bestaudio/best'
-            ydl_opts['postprocessors'] = [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': quality or DEFAULT_MP3_QUALITY,
-            }]
+            format_opts = audio_format('mp3', quality or DEFAULT_MP3_QUALITY)
         else:  # mp4
-            if quality:
-                ydl_opts['format'] = f'bestvideo[ext=mp4][height<={quality}]+bestaudio[ext=m4a]/best[ext=mp4][height<={quality}]/best'
-            else:
-                ydl_opts['format'] = 'best[ext=mp4]/best'
+            format_opts = {'format': video_format(quality)}
         
         # Platform emojisi
         platform_emoji = "🎬"
@@ -485,113 +883,80 @@ async def download_video(client, message, url, format_type, quality=None):
         
         start_time = time.time()
         
-        # İlk deneme - normal yt-dlp
-        try:
-            with YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(url, download=True)
-                file_name = ydl.prepare_filename(info_dict)
-        except Exception as e:
-            logger.warning(f"İlk yt-dlp denemesi başarısız: {e}")
-            
-            # İkinci deneme - farklı ayarlarla
-            logger.info("Alternatif yt-dlp ayarları deneniyor...")
-            ydl_opts_alt = ydl_opts.copy()
-            ydl_opts_alt['extractor_args']['youtube']['player_client'] = ['android', 'web']
-            ydl_opts_alt['http_headers']['User-Agent'] = 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_7_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1'
-            
-            try:
-                with YoutubeDL(ydl_opts_alt) as ydl:
-                    info_dict = ydl.extract_info(url, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-            except Exception as e2:
-                logger.warning(f"İkinci yt-dlp denemesi başarısız: {e2}")
-                
-                # Üçüncü deneme - minimal ayarlarla
-                logger.info("Minimal yt-dlp ayarları deneniyor...")
-                ydl_opts_minimal = {
-                    'outtmpl': '/tmp/%(title)s.%(ext)s',
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'writethumbnail': False,
-                    'writeinfojson': False,
-                    'socket_timeout': 60,
-                    'retries': 2,
-                    'no_warnings': True,
-                    'quiet': True,
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['android', 'web']
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
-                    }
-                }
+        if format_type == 'mp3':
+            quality = quality or DEFAULT_MP3_QUALITY
+        cache_key = media_cache.make_key(url, format_type, quality)
+        
+        # Daha önce Telegram'a yüklendiyse file_id ile gönder
+        if await send_cached_file(client, message.chat.id, cache_key, status_msg):
+            return
+        
+        # Önbellekte varsa metadata çıkarma ve indirme tamamen atlanır
+        # Dosya iş klasörüne bağlanarak alınır (yükleme sürerken önbellekten silinebilir)
+        cached = await asyncio.to_thread(media_cache.get, cache_key, workspace.adopt) if ENABLE_MEDIA_CACHE else None
+        
+        if cached:
+            info_dict, file_name = cached['info'], cached['path']
+        else:
+            async def produce(progress_callback):
+                # Bypass stratejileri - hedged modda önce metadata, sonra tek indirme
+                # Dosya iş klasörüne yazılır, dönen yol yt-dlp'nin bildirdiği gerçek çıktıdır
+                info_dict, file_name = await fetch_media(
+                    url, platform, format_opts, progress_callback=progress_callback,
+                    entry_point='download', workspace=workspace
+                )
                 
-                with YoutubeDL(ydl_opts_minimal) as ydl:
-                    info_dict = ydl.extract_info(url, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-            
-            # Dosya uzantısını düzelt
-            if format_type == 'mp3':
-                file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-            else:
-                file_name = file_name.rsplit(".", 1)[0] + ".mp4"
-            
-            # Render.com uyumlu dosya kontrolü - Video indirme
-            try:
-                file_name = find_downloaded_file(file_name, "Video indirme")
-            except Exception as e:
-                logger.error(f"Video indirme - Dosya bulunamadı: {e}")
-                raise Exception(f"Dosya bulunamadı: {file_name}")
-            
-            # Dosya boyutu kontrolü
-            file_size = os.path.getsize(file_name)
-            if file_size > MAX_FILE_SIZE:
-                raise Exception(f"Dosya çok büyük! Maksimum {MAX_FILE_SIZE / (1024*1024*1024):.1f}GB desteklenir.")
+                if ENABLE_MEDIA_CACHE:
+                    await asyncio.to_thread(media_cache.put, cache_key, file_name, info_dict)
+                return info_dict, file_name
             
-            # Thumbnail indirme
-            thumbnail_url = info_dict.get('thumbnail')
-            thumbnail_file = None
-            if thumbnail_url:
-                try:
-                    thumbnail_file = f"/tmp/{os.path.basename(file_name)}_thumb.jpg"
-                    response = requests.get(thumbnail_url)
-                    with open(thumbnail_file, 'wb') as f:
-                        f.write(response.content)
-                except:
-                    thumbnail_file = None
-            
-            # Dosya boyutu ve süre
-            elapsed_time = time.time() - start_time
-            file_size_mb = file_size / (1024 * 1024)
-            
-            await status_msg.edit_text(
-                f"✅ **İndirme Tamamlandı!** ✅\n\n"
-                f"📁 **Dosya:** {os.path.basename(file_name)}\n"
-                f"📊 **Boyut:** {file_size_mb:.1f} MB\n"
-                f"⏱️ **Süre:** {int(elapsed_time)} saniye\n"
-                f"📤 **Gönderiliyor...**"
+            # Aynı link/format/kalite zaten indiriliyorsa o işin sonucu beklenir
+            info_dict, file_name = await single_flight.run(
+                single_flight.make_key(url, format_type, quality), produce,
+                lambda event: show_download_progress(status_msg, event)
             )
+            file_name = workspace.adopt(file_name)
+        
+        # Dosya boyutu kontrolü
+        file_size = os.path.getsize(file_name)
+        if file_size > MAX_FILE_SIZE:
+            raise Exception(f"Dosya çok büyük! Maksimum {MAX_FILE_SIZE / (1024*1024*1024):.1f}GB desteklenir.")
+        
+        # Thumbnail (indirmeyle aynı anda çekildi; tekrar isteklerde önbellekten gelir)
+        thumbnail_file = await thumbnail_cache.get(info_dict)
+        if thumbnail_file:
+            thumbnail_file = workspace.adopt(thumbnail_file)
+        
+        # Dosya boyutu ve süre
+        elapsed_time = time.time() - start_time
+        file_size_mb = file_size / (1024 * 1024)
+        
+        await progress_renderer.edit(
+            status_msg,
+            f"✅ **İndirme Tamamlandı!** ✅\n\n"
+            f"📁 **Dosya:** {os.path.basename(file_name)}\n"
+            f"📊 **Boyut:** {file_size_mb:.1f} MB\n"
+            f"⏱️ **Süre:** {int(elapsed_time)} saniye\n"
+            f"📤 **Gönderiliyor...**"
+        )
+        
+        # Dosya gönderme
+        title = info_dict.get('title', 'Video')
+        await send_file(client, message.chat.id, file_name, title, status_msg, thumbnail_file, cache_key, info_dict)
+        
             
-            # Dosya gönderme
-            title = info_dict.get('title', 'Video')
-            await send_file(client, message.chat.id, file_name, title, status_msg, thumbnail_file)
-            
-            # Geçici dosyaları temizle
-            try:
-                if thumbnail_file and os.path.exists(thumbnail_file):
-                    os.remove(thumbnail_file)
-            except:
-                pass
-                
+    except UploadError:
+        # send_file kullanıcıya bildirdi; iş kaydına hata olarak geçsin
+        raise
     except Exception as e:
         logger.error(f"Video indirme hatası: {e}", exc_info=True)
         bot_stats['total_errors'] += 1
         
         # Hata türüne göre özel mesaj
         error_msg = str(e).lower()
-        if "sign in to confirm" in error_msg or "bot" in error_msg:
+        if isinstance(e, AdmissionError):
+            await message.reply_text(str(e))
+        elif "sign in to confirm" in error_msg or "bot" in error_msg:
             await message.reply_text(
                 "❌ **YouTube Bot Koruması Tespit Edildi**\n\n"
                 "YouTube geçici olarak bot erişimini engelliyor.\n\n"
@@ -626,11 +991,54 @@ async def download_video(client, message, url, format_type, quality=None):
                 f"• Farklı bir video linki kullanın\n"
                 f"• Sorun devam ederse admin ile iletişime geçin"
             )
+        raise
 
 ######################################
 #           MESAJ HANDLERS           #
 ######################################
 
+def is_rate_limited(user_id: int, chat_id: int):
+    """
+    🚦 Kullanıcı/sohbet hız sınırını kontrol eder (adminler muaf).
+    (sınırlandı mı, uyarı gönderilsin mi) döndürür.
+    """
+    if ADMIN_PANEL_ENABLED and admin_panel.is_admin(user_id):
+        return False, False
+    allowed, warn = rate_limiter.check(user_id, chat_id)
+    return not allowed, warn
+
+@app.on_message(filters.text & ~filters.create(lambda _, __, message: message.text.startswith('/')), group=-1)
+async def rate_limit_messages(client, message):
+    """
+    🚦 İndirme başlatan mesajlar handler'lara ulaşmadan önce hız sınırından geçer.
+    """
+    limited, warn = is_rate_limited(get_user_id(message), message.chat.id)
+    if not limited:
+        return
+    
+    logger.info(f"Hız sınırı aşıldı: kullanıcı {get_user_id(message)}, sohbet {message.chat.id}")
+    if warn:
+        try:
+            await message.reply_text(ERROR_MESSAGES['rate_limited'])
+        except Exception as e:
+            logger.error(f"Hız sınırı mesajı gönderilemedi: {e}")
+    message.stop_propagation()
+
+@app.on_callback_query(filters.create(lambda _, __, query: (query.data or '').startswith(('mp3_', 'mp4_'))), group=-1)
+async def rate_limit_callbacks(client, callback_query):
+    """
+    🚦 İndirme butonları da aynı hız sınırına tabidir.
+    """
+    limited, _ = is_rate_limited(callback_query.from_user.id, callback_query.message.chat.id)
+    if not limited:
+        return
+    
+    try:
+        await callback_query.answer(ERROR_MESSAGES['rate_limited'], show_alert=True)
+    except Exception as e:
+        logger.error(f"Hız sınırı mesajı gönderilemedi: {e}")
+    callback_query.stop_propagation()
+
 @app.on_message(filters.command("start"))
 async def start(client, message):
     """
@@ -773,7 +1181,7 @@ async def send_format_buttons(client, message):
             and not text.startswith('•')
             and not text.startswith('Örnek:')):
             # URL değilse ve hata mesajı değilse, sanatçı ismi olarak kabul et
-            await handle_artist_search(client, message, text)
+            await schedule_download(message, get_user_id(message), "artist_search", text)
             return
         
         # Instagram kontrolü
@@ -795,7 +1203,7 @@ async def send_format_buttons(client, message):
         # Hızlı indirme modu kontrolü
         if text.lower().startswith(("fast:", "hızlı:", "quick:")):
             url = text.split(":", 1)[1].strip()
-            await handle_fast_download(client, message, url)
+            await schedule_download(message, get_user_id(message), "fast_download", url)
             return
         
         # URL'yi text olarak kullan
@@ -823,7 +1231,7 @@ async def send_format_buttons(client, message):
             return
         
         # ReisMp3_bot gibi direkt indirme yap
-        await handle_direct_download(client, message, url, platform)
+        await schedule_download(message, get_user_id(message), "direct_download", url, platform)
         
     except Exception as e:
         logger.error(f"Format butonları gönderilirken hata: {e}")
@@ -833,6 +1241,7 @@ async def handle_direct_download(client, message, url, platform):
     """
     🚀 ReisMp3_bot gibi direkt indirme - format seçimi yapmadan
     """
+    workspace = workspaces.create('direct')
     try:
         logger.info(f"Direkt indirme: {url}")
         
@@ -844,338 +1253,55 @@ async def handle_direct_download(client, message, url, platform):
         # İndirme mesajı gönder
         status_msg = await message.reply_text(f"{platform_emoji} **Video indiriliyor...**\n\nLütfen bekleyin...")
         
-        # yt-dlp ayarları - YouTube bot koruması bypass (Alternatif yöntem)
-        ydl_opts = {
-            'outtmpl': '/tmp/%(title)s.%(ext)s',  # Render.com'da /tmp kullan
-            'noplaylist': True,
-            'extract_flat': False,
-            'writethumbnail': False,
-            'writeinfojson': False,
-            'socket_timeout': 120,
-            'retries': 3,
-            'fragment_retries': 3,
-            'skip_unavailable_fragments': True,
-            'keep_fragments': False,
-            'no_warnings': True,
-            'ignoreerrors': False,
-            'quiet': True,
-            # YouTube bot koruması için alternatif ayarlar
-            'extractor_args': {
-                'youtube': {
-                    'player_client': ['android_music', 'android_creator', 'android', 'web'],
-                    'comment_sort': ['top'],
-                    'max_comments': [0],
-                    'include_live_chat': False,
-                    'skip_download': False,
-                    'age_limit': [0],
-                    'geo_bypass': True,
-                    'geo_bypass_country': 'US'
-                }
-            },
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Referer': 'https://www.youtube.com/',
-                'Origin': 'https://www.youtube.com',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Upgrade-Insecure-Requests': '1',
-                'Cache-Control': 'no-cache',
-                'Pragma': 'no-cache'
-            },
-            'sleep_interval': 5,
-            'max_sleep_interval': 20,
-            'sleep_interval_requests': 5,
-            'sleep_interval_subtitles': 5,
-            'concurrent_fragment_downloads': 1,
-            'throttled_rate': '500K',
-            # Alternatif çözümler
-            'cookiesfrombrowser': None,
-            'cookiefile': None,
-            'no_check_certificate': True,
-            'prefer_insecure': False,
-        }
-        
-        # Format ayarları - MP3 olarak indir (Render.com için optimize)
-        ydl_opts['format'] = 'bestaudio[ext=m4a]/bestaudio/best'
-        ydl_opts['postprocessors'] = [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }]
-        # FFmpeg yolu belirt
-        ydl_opts['ffmpeg_location'] = '/usr/bin/ffmpeg'
+        # Kullanıcının ses teslim moduna göre MP3 ya da orijinal ses (Render.com için optimize)
+        audio_mode = get_audio_mode(get_user_id(message))
+        format_opts = audio_format(audio_mode)
         
         start_time = time.time()
         
-        # Gelişmiş bypass sistemi - 5 farklı yöntem
-        success = False
-        info_dict = None
-        file_name = None
-        
-        # 1. Deneme - Android Music Client
-        if not success:
-            try:
-                logger.info("1. Deneme - Android Music Client")
-                ydl_opts_1 = {
-                    'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'outtmpl': '/tmp/%(title)s.%(ext)s',
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'writethumbnail': False,
-                    'writeinfojson': False,
-                    'socket_timeout': 180,
-                    'retries': 3,
-                    'no_warnings': True,
-                    'quiet': True,
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['android_music'],
-                            'geo_bypass': True,
-                            'geo_bypass_country': 'US'
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (Linux; Android 10; SM-G973F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Accept-Encoding': 'gzip, deflate',
-                        'Connection': 'keep-alive',
-                        'Referer': 'https://www.youtube.com/',
-                        'Origin': 'https://www.youtube.com'
-                    }
-                }
-                
-                with YoutubeDL(ydl_opts_1) as ydl:
-                    info_dict = ydl.extract_info(url, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-                    file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-                    success = True
-                    logger.info("✅ 1. Deneme başarılı - Android Music Client")
-            except Exception as e:
-                logger.warning(f"1. Deneme başarısız: {e}")
+        cache_key = media_cache.make_key(url, audio_mode, '192')
         
-        # 2. Deneme - iPhone Safari
-        if not success:
-            try:
-                logger.info("2. Deneme - iPhone Safari")
-                ydl_opts_2 = {
-                    'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'outtmpl': '/tmp/%(title)s.%(ext)s',
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'writethumbnail': False,
-                    'writeinfojson': False,
-                    'socket_timeout': 180,
-                    'retries': 3,
-                    'no_warnings': True,
-                    'quiet': True,
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['ios'],
-                            'geo_bypass': True,
-                            'geo_bypass_country': 'US'
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 15_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'Connection': 'keep-alive',
-                        'Referer': 'https://www.youtube.com/',
-                        'Origin': 'https://www.youtube.com'
-                    }
-                }
-                
-                with YoutubeDL(ydl_opts_2) as ydl:
-                    info_dict = ydl.extract_info(url, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-                    file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-                    success = True
-                    logger.info("✅ 2. Deneme başarılı - iPhone Safari")
-            except Exception as e:
-                logger.warning(f"2. Deneme başarısız: {e}")
-        
-        # 3. Deneme - Googlebot
-        if not success:
-            try:
-                logger.info("3. Deneme - Googlebot")
-                ydl_opts_3 = {
-                    'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'outtmpl': '/tmp/%(title)s.%(ext)s',
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'writethumbnail': False,
-                    'writeinfojson': False,
-                    'socket_timeout': 180,
-                    'retries': 3,
-                    'no_warnings': True,
-                    'quiet': True,
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['web'],
-                            'geo_bypass': True,
-                            'geo_bypass_country': 'US'
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Accept-Encoding': 'gzip, deflate',
-                        'Connection': 'keep-alive',
-                        'Referer': 'https://www.google.com/',
-                        'Origin': 'https://www.google.com'
-                    }
-                }
-                
-                with YoutubeDL(ydl_opts_3) as ydl:
-                    info_dict = ydl.extract_info(url, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-                    file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-                    success = True
-                    logger.info("✅ 3. Deneme başarılı - Googlebot")
-            except Exception as e:
-                logger.warning(f"3. Deneme başarısız: {e}")
+        # Daha önce Telegram'a yüklendiyse file_id ile gönder
+        if await send_cached_file(client, message.chat.id, cache_key, status_msg):
+            return
         
-        # 4. Deneme - Firefox
-        if not success:
-            try:
-                logger.info("4. Deneme - Firefox")
-                ydl_opts_4 = {
-                    'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'outtmpl': '/tmp/%(title)s.%(ext)s',
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'writethumbnail': False,
-                    'writeinfojson': False,
-                    'socket_timeout': 180,
-                    'retries': 3,
-                    'no_warnings': True,
-                    'quiet': True,
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['web'],
-                            'geo_bypass': True,
-                            'geo_bypass_country': 'US'
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:91.0) Gecko/20100101 Firefox/91.0',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                        'Accept-Language': 'en-US,en;q=0.5',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'Connection': 'keep-alive',
-                        'Referer': 'https://www.youtube.com/',
-                        'Origin': 'https://www.youtube.com',
-                        'DNT': '1',
-                        'Upgrade-Insecure-Requests': '1'
-                    }
-                }
-                
-                with YoutubeDL(ydl_opts_4) as ydl:
-                    info_dict = ydl.extract_info(url, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-                    file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-                    success = True
-                    logger.info("✅ 4. Deneme başarılı - Firefox")
-            except Exception as e:
-                logger.warning(f"4. Deneme başarısız: {e}")
+        # Önbellekte varsa metadata çıkarma ve indirme tamamen atlanır
+        # Dosya iş klasörüne bağlanarak alınır (yükleme sürerken önbellekten silinebilir)
+        cached = await asyncio.to_thread(media_cache.get, cache_key, workspace.adopt) if ENABLE_MEDIA_CACHE else None
         
-        # 5. Deneme - Minimal ayarlar
-        if not success:
-            try:
-                logger.info("5. Deneme - Minimal ayarlar")
-                ydl_opts_5 = {
-                    'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'outtmpl': '/tmp/%(title)s.%(ext)s',
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'writethumbnail': False,
-                    'writeinfojson': False,
-                    'socket_timeout': 60,
-                    'retries': 1,
-                    'no_warnings': True,
-                    'quiet': True,
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['android', 'web']
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (Linux; Android 8.0; SM-G960F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36'
-                    }
-                }
+        if cached:
+            info_dict, file_name = cached['info'], cached['path']
+        else:
+            async def produce(progress_callback):
+                # Gelişmiş bypass sistemi - en başarılı stratejiden başla
+                info_dict, file_name = await fetch_media(
+                    url, platform, format_opts, progress_callback=progress_callback,
+                    entry_point='direct', workspace=workspace
+                )
                 
-                with YoutubeDL(ydl_opts_5) as ydl:
-                    info_dict = ydl.extract_info(url, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-                    file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-                    success = True
-                    logger.info("✅ 5. Deneme başarılı - Minimal ayarlar")
-            except Exception as e:
-                logger.warning(f"5. Deneme başarısız: {e}")
-        
-        # Eğer hiçbir deneme başarılı olmadıysa
-        if not success:
-            raise Exception("Tüm bypass yöntemleri başarısız oldu. YouTube bot koruması çok güçlü.")
-        
-        # Render.com uyumlu dosya kontrolü
-        try:
-            file_name = find_downloaded_file(file_name, "İndirme")
-        except Exception as e:
-            logger.error(f"İndirme - Dosya bulunamadı: {e}")
-            raise Exception("Dosya indirilemedi!")
+                if ENABLE_MEDIA_CACHE:
+                    await asyncio.to_thread(media_cache.put, cache_key, file_name, info_dict)
+                return info_dict, file_name
+            
+            # Aynı link zaten indiriliyorsa o işin sonucu beklenir
+            info_dict, file_name = await single_flight.run(
+                single_flight.make_key(url, audio_mode, '192'), produce,
+                lambda event: show_download_progress(status_msg, event)
+            )
+            file_name = workspace.adopt(file_name)
         
-        # Thumbnail indirme
-        thumbnail_url = info_dict.get('thumbnail')
-        thumbnail_file = None
-        if thumbnail_url:
-            try:
-                thumbnail_file = f"/tmp/{os.path.basename(file_name)}_thumb.jpg"
-                response = requests.get(thumbnail_url)
-                with open(thumbnail_file, 'wb') as f:
-                    f.write(response.content)
-            except:
-                thumbnail_file = None
+        # Thumbnail (indirmeyle aynı anda çekildi; tekrar isteklerde önbellekten gelir)
+        thumbnail_file = await thumbnail_cache.get(info_dict)
+        if thumbnail_file:
+            thumbnail_file = workspace.adopt(thumbnail_file)
         
         # Dosya boyutu ve süre
         file_size = os.path.getsize(file_name)
         elapsed_time = time.time() - start_time
         file_size_mb = file_size / (1024 * 1024)
         
-        await status_msg.edit_text(
+        await progress_renderer.edit(
+            status_msg,
             f"✅ **İndirme Tamamlandı!** ✅\n\n"
             f"🎵 **Başlık:** {info_dict.get('title', 'Audio')}\n"
             f"📁 **Dosya:** {os.path.basename(file_name)}\n"
@@ -1185,16 +1311,12 @@ async def handle_direct_download(client, message, url, platform):
         )
         
         # Dosya gönderme
-        title = f"{info_dict.get('title', 'Audio')} - MP3"
-        await send_file(client, message.chat.id, file_name, title, status_msg, thumbnail_file)
+        title = f"{info_dict.get('title', 'Audio')} - {file_name.rsplit('.', 1)[-1].upper()}"
+        await send_file(client, message.chat.id, file_name, title, status_msg, thumbnail_file, cache_key, info_dict)
         
-        # Geçici dosyaları temizle
-        try:
-            if thumbnail_file and os.path.exists(thumbnail_file):
-                os.remove(thumbnail_file)
-        except:
-            pass
             
+    except UploadError:
+        raise
     except Exception as e:
         logger.error(f"Direkt indirme hatası: {e}", exc_info=True)
         bot_stats['total_errors'] += 1
@@ -1202,7 +1324,9 @@ async def handle_direct_download(client, message, url, platform):
         # Hata türüne göre özel mesaj - sadece bir kez gönder
         try:
             error_msg = str(e).lower()
-            if "sign in to confirm" in error_msg or "bot" in error_msg:
+            if isinstance(e, AdmissionError):
+                await message.reply_text(str(e))
+            elif "sign in to confirm" in error_msg or "bot" in error_msg:
                 await message.reply_text(
                     "❌ **YouTube Bot Koruması Tespit Edildi**\n\n"
                     "YouTube geçici olarak bot erişimini engelliyor.\n\n"
@@ -1232,12 +1356,14 @@ async def handle_direct_download(client, message, url, platform):
         except Exception as reply_error:
             logger.error(f"Hata mesajı gönderilemedi: {reply_error}")
             # Hata mesajı gönderilemezse sessizce geç
+        raise
 
 
 async def handle_artist_search(client, message, artist_name):
     """
     🎵 Sanatçı ismi ile YouTube'da arama yapıp en popüler sonucu indirir
     """
+    workspace = workspaces.create('artist_search')
     try:
         logger.info(f"Sanatçı arama: {artist_name}")
         
@@ -1247,346 +1373,30 @@ async def handle_artist_search(client, message, artist_name):
         # YouTube'da arama yap
         search_query = f"ytsearch1:{artist_name}"
         
-        # yt-dlp ile arama
-        ydl_opts = {
-            'format': 'bestaudio[ext=m4a]/bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'outtmpl': '/tmp/%(title)s.%(ext)s',
-            'noplaylist': True,
-            'extract_flat': False,
-            'writethumbnail': False,
-            'writeinfojson': False,
-            'socket_timeout': 120,
-            'retries': 3,
-            'fragment_retries': 3,
-            'skip_unavailable_fragments': True,
-            'keep_fragments': False,
-            'no_warnings': True,
-            'ignoreerrors': False,
-            'quiet': True,
-            'extractor_args': {
-                'youtube': {
-                    'player_client': ['android_music', 'android_creator', 'android', 'web'],
-                    'comment_sort': ['top'],
-                    'max_comments': [0],
-                    'include_live_chat': False,
-                    'skip_download': False,
-                    'age_limit': [0],
-                    'geo_bypass': True,
-                    'geo_bypass_country': 'US'
-                }
-            },
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Referer': 'https://www.youtube.com/',
-                'Origin': 'https://www.youtube.com',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Upgrade-Insecure-Requests': '1',
-                'Cache-Control': 'no-cache',
-                'Pragma': 'no-cache'
-            },
-            'sleep_interval': 5,
-            'max_sleep_interval': 20,
-            'sleep_interval_requests': 5,
-            'sleep_interval_subtitles': 5,
-            'concurrent_fragment_downloads': 1,
-            'throttled_rate': '500K',
-            'cookiesfrombrowser': None,
-            'cookiefile': None,
-            'no_check_certificate': True,
-            'prefer_insecure': False,
-        }
+        # Kullanıcının ses teslim moduna göre MP3 ya da orijinal ses (Render.com için optimize)
+        format_opts = audio_format(get_audio_mode(get_user_id(message)))
         
         start_time = time.time()
         
-        # Gelişmiş bypass sistemi - 5 farklı yöntem
-        success = False
-        info_dict = None
-        file_name = None
-        
-        # 1. Deneme - Android Music Client
-        if not success:
-            try:
-                logger.info("Sanatçı arama - 1. Deneme - Android Music Client")
-                ydl_opts_1 = {
-                    'format': 'bestaudio/best',
-                    'outtmpl': '/tmp/%(title)s.%(ext)s',
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'writethumbnail': False,
-                    'writeinfojson': False,
-                    'socket_timeout': 60,
-                    'retries': 2,
-                    'no_warnings': False,  # Uyarıları göster
-                    'quiet': False,  # Çıktıyı göster
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['android_music']
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (Linux; Android 10; SM-G973F) AppleWebKit/537.36'
-                    }
-                }
-                
-                with YoutubeDL(ydl_opts_1) as ydl:
-                    info_dict = ydl.extract_info(search_query, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-                    # Dosya adındaki boşlukları düzelt
-                    file_name = file_name.replace(' ', '_').rsplit(".", 1)[0] + ".mp3"
-                    
-                    # Dosya gerçekten indirildi mi kontrol et
-                    if os.path.exists(file_name):
-                        success = True
-                        logger.info("✅ Sanatçı arama - 1. Deneme başarılı - Android Music Client")
-                    else:
-                        # /tmp klasöründeki tüm dosyaları listele
-                        try:
-                            tmp_files = os.listdir('/tmp')
-                            logger.info(f"📁 /tmp klasöründeki tüm dosyalar: {tmp_files}")
-                            
-                            # En son oluşturulan medya dosyasını bul
-                            media_files = []
-                            for file in tmp_files:
-                                if any(file.lower().endswith(ext) for ext in ['.mp3', '.m4a', '.webm', '.mp4', '.wav', '.aac']):
-                                    media_files.append(file)
-                            
-                            if media_files:
-                                # En son oluşturulan dosyayı bul
-                                latest_file = max(media_files, key=lambda x: os.path.getctime(os.path.join('/tmp', x)))
-                                file_name = f"/tmp/{latest_file}"
-                                success = True
-                                logger.info(f"✅ En son medya dosyası bulundu: {file_name}")
-                            else:
-                                logger.error(f"❌ /tmp klasöründe hiç medya dosyası yok")
-                        except Exception as e:
-                            logger.error(f"❌ /tmp klasörü listelenemedi: {e}")
-            except Exception as e:
-                logger.warning(f"Sanatçı arama - 1. Deneme başarısız: {e}")
-        
-        # 2. Deneme - iPhone Safari
-        if not success:
-            try:
-                logger.info("Sanatçı arama - 2. Deneme - iPhone Safari")
-                ydl_opts_2 = {
-                    'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'outtmpl': '/tmp/%(title)s.%(ext)s',
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'writethumbnail': False,
-                    'writeinfojson': False,
-                    'socket_timeout': 180,
-                    'retries': 3,
-                    'no_warnings': True,
-                    'quiet': True,
-                    'ffmpeg_location': '/usr/bin/ffmpeg',  # FFmpeg yolu
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['ios'],
-                            'geo_bypass': True,
-                            'geo_bypass_country': 'US'
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 15_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'Connection': 'keep-alive',
-                        'Referer': 'https://www.youtube.com/',
-                        'Origin': 'https://www.youtube.com'
-                    }
-                }
-                
-                with YoutubeDL(ydl_opts_2) as ydl:
-                    info_dict = ydl.extract_info(search_query, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-                    file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-                    success = True
-                    logger.info("✅ Sanatçı arama - 2. Deneme başarılı - iPhone Safari")
-            except Exception as e:
-                logger.warning(f"Sanatçı arama - 2. Deneme başarısız: {e}")
-        
-        # 3. Deneme - Googlebot
-        if not success:
-            try:
-                logger.info("Sanatçı arama - 3. Deneme - Googlebot")
-                ydl_opts_3 = {
-                    'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'outtmpl': '/tmp/%(title)s.%(ext)s',
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'writethumbnail': False,
-                    'writeinfojson': False,
-                    'socket_timeout': 180,
-                    'retries': 3,
-                    'no_warnings': True,
-                    'quiet': True,
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['web'],
-                            'geo_bypass': True,
-                            'geo_bypass_country': 'US'
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Accept-Encoding': 'gzip, deflate',
-                        'Connection': 'keep-alive',
-                        'Referer': 'https://www.google.com/',
-                        'Origin': 'https://www.google.com'
-                    }
-                }
-                
-                with YoutubeDL(ydl_opts_3) as ydl:
-                    info_dict = ydl.extract_info(search_query, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-                    file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-                    success = True
-                    logger.info("✅ Sanatçı arama - 3. Deneme başarılı - Googlebot")
-            except Exception as e:
-                logger.warning(f"Sanatçı arama - 3. Deneme başarısız: {e}")
-        
-        # 4. Deneme - Firefox
-        if not success:
-            try:
-                logger.info("Sanatçı arama - 4. Deneme - Firefox")
-                ydl_opts_4 = {
-                    'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'outtmpl': '/tmp/%(title)s.%(ext)s',
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'writethumbnail': False,
-                    'writeinfojson': False,
-                    'socket_timeout': 180,
-                    'retries': 3,
-                    'no_warnings': True,
-                    'quiet': True,
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['web'],
-                            'geo_bypass': True,
-                            'geo_bypass_country': 'US'
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:91.0) Gecko/20100101 Firefox/91.0',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                        'Accept-Language': 'en-US,en;q=0.5',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'Connection': 'keep-alive',
-                        'Referer': 'https://www.youtube.com/',
-                        'Origin': 'https://www.youtube.com',
-                        'DNT': '1',
-                        'Upgrade-Insecure-Requests': '1'
-                    }
-                }
-                
-                with YoutubeDL(ydl_opts_4) as ydl:
-                    info_dict = ydl.extract_info(search_query, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-                    file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-                    success = True
-                    logger.info("✅ Sanatçı arama - 4. Deneme başarılı - Firefox")
-            except Exception as e:
-                logger.warning(f"Sanatçı arama - 4. Deneme başarısız: {e}")
-        
-        # 5. Deneme - Minimal ayarlar
-        if not success:
-            try:
-                logger.info("Sanatçı arama - 5. Deneme - Minimal ayarlar")
-                ydl_opts_5 = {
-                    'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'outtmpl': '/tmp/%(title)s.%(ext)s',
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'writethumbnail': False,
-                    'writeinfojson': False,
-                    'socket_timeout': 60,
-                    'retries': 1,
-                    'no_warnings': True,
-                    'quiet': True,
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['android', 'web']
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (Linux; Android 8.0; SM-G960F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36'
-                    }
-                }
-                
-                with YoutubeDL(ydl_opts_5) as ydl:
-                    info_dict = ydl.extract_info(search_query, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-                    file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-                    success = True
-                    logger.info("✅ Sanatçı arama - 5. Deneme başarılı - Minimal ayarlar")
-            except Exception as e:
-                logger.warning(f"Sanatçı arama - 5. Deneme başarısız: {e}")
-        
-        # Eğer hiçbir deneme başarılı olmadıysa
-        if not success:
-            raise Exception("Tüm bypass yöntemleri başarısız oldu. YouTube bot koruması çok güçlü.")
-        
-        # Render.com uyumlu dosya kontrolü
-        try:
-            file_name = find_downloaded_file(file_name, "İndirme")
-        except Exception as e:
-            logger.error(f"İndirme - Dosya bulunamadı: {e}")
-            raise Exception("Dosya indirilemedi!")
+        # Gelişmiş bypass sistemi - en başarılı stratejiden başla
+        info_dict, file_name = await fetch_media(
+            search_query, 'youtube', format_opts, "Sanatçı arama - ",
+            progress_renderer.hook(search_msg, download_progress_text),
+            entry_point='artist_search', workspace=workspace
+        )
         
-        # Thumbnail indirme
-        thumbnail_url = info_dict.get('thumbnail')
-        thumbnail_file = None
-        if thumbnail_url:
-            try:
-                thumbnail_file = f"/tmp/{os.path.basename(file_name)}_thumb.jpg"
-                response = requests.get(thumbnail_url)
-                with open(thumbnail_file, 'wb') as f:
-                    f.write(response.content)
-            except:
-                thumbnail_file = None
+        # Thumbnail (indirmeyle aynı anda çekildi; tekrar isteklerde önbellekten gelir)
+        thumbnail_file = await thumbnail_cache.get(info_dict)
+        if thumbnail_file:
+            thumbnail_file = workspace.adopt(thumbnail_file)
         
         # Dosya boyutu ve süre
         file_size = os.path.getsize(file_name)
         elapsed_time = time.time() - start_time
         file_size_mb = file_size / (1024 * 1024)
         
-        await search_msg.edit_text(
+        await progress_renderer.edit(
+            search_msg,
             f"✅ **Arama Tamamlandı!** ✅\n\n"
             f"🎵 **Sanatçı:** {artist_name}\n"
             f"📁 **Dosya:** {os.path.basename(file_name)}\n"
@@ -1597,15 +1407,11 @@ async def handle_artist_search(client, message, artist_name):
         
         # Dosya gönderme
         title = f"{info_dict.get('title', 'Audio')} - {artist_name}"
-        await send_file(client, message.chat.id, file_name, title, search_msg, thumbnail_file)
+        await send_file(client, message.chat.id, file_name, title, search_msg, thumbnail_file, info_dict=info_dict)
         
-        # Geçici dosyaları temizle
-        try:
-            if thumbnail_file and os.path.exists(thumbnail_file):
-                os.remove(thumbnail_file)
-        except:
-            pass
             
+    except UploadError:
+        raise
     except Exception as e:
         logger.error(f"Sanatçı arama hatası: {e}", exc_info=True)
         bot_stats['total_errors'] += 1
@@ -1613,7 +1419,9 @@ async def handle_artist_search(client, message, artist_name):
         # Hata türüne göre özel mesaj - sadece bir kez gönder
         try:
             error_msg = str(e).lower()
-            if "sign in to confirm" in error_msg or "bot" in error_msg:
+            if isinstance(e, AdmissionError):
+                await message.reply_text(str(e))
+            elif "sign in to confirm" in error_msg or "bot" in error_msg:
                 await message.reply_text(
                     "❌ **YouTube Bot Koruması Tespit Edildi**\n\n"
                     "YouTube geçici olarak bot erişimini engelliyor.\n\n"
@@ -1644,79 +1452,22 @@ async def handle_artist_search(client, message, artist_name):
         except Exception as reply_error:
             logger.error(f"Hata mesajı gönderilemedi: {reply_error}")
             # Hata mesajı gönderilemezse sessizce geç
+        raise
 
 async def handle_fast_download(client, message, url):
     """
     ⚡ Hızlı indirme modu - ReisMp3_bot gibi tek tıkla indirme
     """
+    workspace = workspaces.create('fast_download')
     try:
         # Platform tespiti
         platform = None
         if ADVANCED_FEATURES_ENABLED:
             platform = advanced_features.detect_platform(url)
         
-        # Hızlı indirme için varsayılan ayarlar
-        ydl_opts = {
-            'format': 'bestaudio[ext=m4a]/bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'outtmpl': '%(title)s.%(ext)s',
-            'noplaylist': True,
-            'extract_flat': False,
-            'writethumbnail': False,
-            'writeinfojson': False,
-            'socket_timeout': 120,
-            'retries': 3,
-            'fragment_retries': 3,
-            'skip_unavailable_fragments': True,
-            'keep_fragments': False,
-            'no_warnings': True,
-            'ignoreerrors': False,
-            'quiet': True,
-            # YouTube bot koruması için alternatif ayarlar
-            'extractor_args': {
-                'youtube': {
-                    'player_client': ['android_music', 'android_creator', 'android', 'web'],
-                    'comment_sort': ['top'],
-                    'max_comments': [0],
-                    'include_live_chat': False,
-                    'skip_download': False,
-                    'age_limit': [0],
-                    'geo_bypass': True,
-                    'geo_bypass_country': 'US'
-                }
-            },
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Referer': 'https://www.youtube.com/',
-                'Origin': 'https://www.youtube.com',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Upgrade-Insecure-Requests': '1',
-                'Cache-Control': 'no-cache',
-                'Pragma': 'no-cache'
-            },
-            'sleep_interval': 5,
-            'max_sleep_interval': 20,
-            'sleep_interval_requests': 5,
-            'sleep_interval_subtitles': 5,
-            'concurrent_fragment_downloads': 1,
-            'throttled_rate': '500K',
-            # Alternatif çözümler
-            'cookiesfrombrowser': None,
-            'cookiefile': None,
-            'no_check_certificate': True,
-            'prefer_insecure': False,
-        }
+        # Hızlı indirme için varsayılan ayarlar (kullanıcının ses teslim moduna göre)
+        audio_mode = get_audio_mode(get_user_id(message))
+        format_opts = audio_format(audio_mode)
         
         # Platform emojisi
         platform_emoji = "🎬"
@@ -1727,105 +1478,60 @@ async def handle_fast_download(client, message, url):
         
         start_time = time.time()
         
-        # İlk deneme - normal yt-dlp
-        try:
-            with YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(url, download=True)
-                file_name = ydl.prepare_filename(info_dict)
-                file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-        except Exception as e:
-            logger.warning(f"Hızlı indirme - İlk yt-dlp denemesi başarısız: {e}")
-            
-            # İkinci deneme - farklı ayarlarla
-            logger.info("Hızlı indirme - Alternatif yt-dlp ayarları deneniyor...")
-            ydl_opts_alt = ydl_opts.copy()
-            ydl_opts_alt['extractor_args']['youtube']['player_client'] = ['android', 'web']
-            ydl_opts_alt['http_headers']['User-Agent'] = 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_7_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1'
-            
-            try:
-                with YoutubeDL(ydl_opts_alt) as ydl:
-                    info_dict = ydl.extract_info(url, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-                    file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-            except Exception as e2:
-                logger.warning(f"Hızlı indirme - İkinci yt-dlp denemesi başarısız: {e2}")
-                
-                # Üçüncü deneme - minimal ayarlarla
-                logger.info("Hızlı indirme - Minimal yt-dlp ayarları deneniyor...")
-                ydl_opts_minimal = {
-                    'format': 'bestaudio[ext=m4a]/bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'outtmpl': '%(title)s.%(ext)s',
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'writethumbnail': False,
-                    'writeinfojson': False,
-                    'socket_timeout': 60,
-                    'retries': 2,
-                    'no_warnings': True,
-                    'quiet': True,
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['android', 'web']
-                        }
-                    },
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
-                    }
-                }
-                
-                with YoutubeDL(ydl_opts_minimal) as ydl:
-                    info_dict = ydl.extract_info(url, download=True)
-                    file_name = ydl.prepare_filename(info_dict)
-                    file_name = file_name.rsplit(".", 1)[0] + ".mp3"
-            
-            # Render.com uyumlu dosya kontrolü - Hızlı indirme
-            try:
-                file_name = find_downloaded_file(file_name, "Hızlı indirme")
-            except Exception as e:
-                logger.error(f"Hızlı indirme - Dosya bulunamadı: {e}")
-                raise Exception("Dosya indirilemedi!")
-            
-            # Thumbnail indirme
-            thumbnail_url = info_dict.get('thumbnail')
-            thumbnail_file = None
-            if thumbnail_url:
-                try:
-                    thumbnail_file = f"{file_name}_thumb.jpg"
-                    response = requests.get(thumbnail_url)
-                    with open(thumbnail_file, 'wb') as f:
-                        f.write(response.content)
-                except:
-                    thumbnail_file = None
-            
-            # Dosya boyutu ve süre
-            file_size = os.path.getsize(file_name)
-            elapsed_time = time.time() - start_time
-            file_size_mb = file_size / (1024 * 1024)
-            
-            await status_msg.edit_text(
-                f"✅ **İndirme Tamamlandı!** ✅\n\n"
-                f"📁 **Dosya:** {os.path.basename(file_name)}\n"
-                f"📊 **Boyut:** {file_size_mb:.1f} MB\n"
-                f"⏱️ **Süre:** {int(elapsed_time)} saniye\n"
-                f"📤 **Gönderiliyor...**"
+        # Daha önce Telegram'a yüklendiyse file_id ile gönder
+        cache_key = media_cache.make_key(url, audio_mode, '192')
+        if await send_cached_file(client, message.chat.id, cache_key, status_msg):
+            return
+        
+        async def produce(progress_callback):
+            # Bypass stratejileri - önce metadata ve limit kontrolü, sonra indirme
+            info_dict, file_name = await fetch_media(
+                url, platform, format_opts, "Hızlı indirme - ", progress_callback,
+                entry_point='fast_download', workspace=workspace
             )
-            
-            # Dosya gönderme
-            title = f"{info_dict.get('title', 'Audio')} - Hızlı İndirme"
-            await send_file(client, message.chat.id, file_name, title, status_msg, thumbnail_file)
-            
+            return info_dict, file_name
+        
+        # Aynı link zaten indiriliyorsa o işin sonucu beklenir
+        info_dict, file_name = await single_flight.run(
+            single_flight.make_key(url, audio_mode, '192'), produce,
+            lambda event: show_download_progress(status_msg, event)
+        )
+        file_name = workspace.adopt(file_name)
+        
+        # Thumbnail (indirmeyle aynı anda çekildi; tekrar isteklerde önbellekten gelir)
+        thumbnail_file = await thumbnail_cache.get(info_dict)
+        if thumbnail_file:
+            thumbnail_file = workspace.adopt(thumbnail_file)
+        
+        # Dosya boyutu ve süre
+        file_size = os.path.getsize(file_name)
+        elapsed_time = time.time() - start_time
+        file_size_mb = file_size / (1024 * 1024)
+        
+        await progress_renderer.edit(
+            status_msg,
+            f"✅ **İndirme Tamamlandı!** ✅\n\n"
+            f"📁 **Dosya:** {os.path.basename(file_name)}\n"
+            f"📊 **Boyut:** {file_size_mb:.1f} MB\n"
+            f"⏱️ **Süre:** {int(elapsed_time)} saniye\n"
+            f"📤 **Gönderiliyor...**"
+        )
+        
+        # Dosya gönderme
+        title = f"{info_dict.get('title', 'Audio')} - Hızlı İndirme"
+        await send_file(client, message.chat.id, file_name, title, status_msg, thumbnail_file, cache_key, info_dict)
+        
+    except UploadError:
+        raise
     except Exception as e:
         logger.error(f"Hızlı indirme hatası: {e}", exc_info=True)
         bot_stats['total_errors'] += 1
         
         # Hata türüne göre özel mesaj
         error_msg = str(e).lower()
-        if "sign in to confirm" in error_msg or "bot" in error_msg:
+        if isinstance(e, AdmissionError):
+            await message.reply_text(str(e))
+        elif "sign in to confirm" in error_msg or "bot" in error_msg:
             await message.reply_text(
                 "❌ **YouTube Bot Koruması Tespit Edildi**\n\n"
                 "YouTube geçici olarak bot erişimini engelliyor.\n\n"
@@ -1851,6 +1557,38 @@ async def handle_fast_download(client, message, url):
                 f"• Lütfen tekrar deneyin\n"
                 f"• Farklı bir video linki kullanın"
             )
+        raise
+
+# Kalıcı iş türleri -> handler (yeniden başlatmada kayıttan sürdürülebilmesi için)
+JOB_HANDLERS = {
+    'download_video': download_video,
+    'direct_download': handle_direct_download,
+    'artist_search': handle_artist_search,
+    'fast_download': handle_fast_download
+}
+
+async def resume_jobs():
+    """
+    🔁 Yeniden başlatma/deploy öncesi bitmemiş işleri kaldığı yerden sürdürür.
+    İşler aynı kayıt ve çalışma klasörüyle yeniden kuyruğa alınır; yarım .part dosyaları devam eder.
+    """
+    for job in job_store.unfinished():
+        if job['kind'] not in JOB_HANDLERS:
+            job_store.finish(job['id'], error=f"Bilinmeyen iş türü: {job['kind']}")
+            continue
+        if not job_store.resume(job['id']):
+            continue
+        try:
+            message = await app.get_messages(job['chat_id'], job['message_id'])
+            if not message or message.empty:
+                raise Exception("Mesaj bulunamadı")
+            await message.reply_text("🔁 **Bot yeniden başlatıldı**\n\nYarım kalan indirmeniz kaldığı yerden devam ediyor...")
+        except Exception as e:
+            logger.warning(f"İş {job['id']} sürdürülemedi: {e}")
+            job_store.finish(job['id'], error=str(e))
+            continue
+        logger.info(f"İş {job['id']} sürdürülüyor ({job['kind']}, {job['state']})")
+        await schedule_download(message, job['user_id'], job['kind'], *job['args'], job_id=job['id'])
 
 ######################################
 #         CALLBACK HANDLERS          #
@@ -1977,6 +1715,30 @@ async def handle_callback_query(client, callback_query):
             await callback_query.answer("⚙️ Ayarlar")
             return
         
+        elif data == "settings_download" or data.startswith("audio_mode_"):
+            # Ses teslim modu: MP3 (yeniden kodlama) ya da orijinal ses (akış kopyası)
+            if data.startswith("audio_mode_"):
+                mode = data[len("audio_mode_"):]
+                user_preferences.set(user_id, 'audio_mode', mode if mode in AUDIO_MODES else None)
+            
+            current = get_audio_mode(user_id)
+            keyboard = [
+                [InlineKeyboardButton(f"{'✅ ' if current == 'mp3' else ''}🎵 MP3 (192kbps)", callback_data="audio_mode_mp3")],
+                [InlineKeyboardButton(f"{'✅ ' if current == 'native' else ''}⚡ Orijinal Ses (M4A/Opus)", callback_data="audio_mode_native")],
+                [InlineKeyboardButton("♻️ Varsayılana Dön", callback_data="audio_mode_default")],
+                [InlineKeyboardButton("🔙 Geri", callback_data="settings_menu")]
+            ]
+            await callback_query.edit_message_text(
+                "📁 **İndirme Ayarları**\n\n"
+                "🎧 **Ses Teslim Modu:**\n"
+                "• **MP3:** Her cihazda çalışır, dönüştürme nedeniyle daha yavaştır\n"
+                "• **Orijinal Ses:** Yeniden kodlanmaz (AAC → .m4a, Opus → .opus), çok daha hızlıdır\n\n"
+                f"Şu anki mod: **{'MP3' if current == 'mp3' else 'Orijinal Ses'}**",
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+            await callback_query.answer("📁 İndirme ayarları")
+            return
+        
         elif data == "start_menu":
             # Ana menüye dön
             keyboard = [
@@ -2118,6 +1880,13 @@ async def handle_callback_query(client, callback_query):
                 await callback_query.answer("👥 Kullanıcı listesi")
             return
         
+        elif data == "vk_admin_strategies":
+            if ADMIN_PANEL_ENABLED and admin_panel.is_admin(user_id):
+                strategies_text = admin_panel.get_strategy_stats()
+                await callback_query.edit_message_text(strategies_text)
+                await callback_query.answer("🧭 Strateji istatistikleri")
+            return
+        
         elif data == "vk_admin_settings":
             if ADMIN_PANEL_ENABLED and admin_panel.is_admin(user_id):
                 settings_text = admin_panel.get_settings()
@@ -2125,6 +1894,16 @@ async def handle_callback_query(client, callback_query):
                 await callback_query.answer("⚙️ Ayarlar")
             return
         
+        elif data == "vk_admin_audio":
+            if ADMIN_PANEL_ENABLED and admin_panel.is_admin(user_id):
+                # Tercih belirtmemiş kullanıcılar için varsayılan ses teslim modunu değiştir
+                mode = 'native' if admin_panel.settings.get('audio_delivery', 'mp3') == 'mp3' else 'mp3'
+                admin_panel.update_setting('audio_delivery', mode)
+                await callback_query.answer(
+                    f"🎧 Varsayılan ses modu: {'Orijinal Ses' if mode == 'native' else 'MP3'}", show_alert=True
+                )
+            return
+        
         # ======================
         # İNDİRME CALLBACKS
         # ======================
@@ -2148,7 +1927,7 @@ async def handle_callback_query(client, callback_query):
                     return
                 
                 await callback_query.answer("📥 İndirme başlıyor...")
-                await download_video(client, message, url, format_type, quality)
+                await schedule_download(message, user_id, "download_video", url, format_type, quality)
             return
         
         # ======================
@@ -2170,6 +1949,12 @@ def signal_handler(sig, frame):
     🔔 Kapatma sinyalleri alındığında botu düzgün şekilde sonlandırır.
     """
     print("\n🚪 Kapat komutu alındı. Bot durduruluyor...")
+    download_executor.shutdown(wait=False)
+    # Ertelenmiş JSON kayıtlarını yaz
+    strategy_registry.flush()
+    user_preferences.flush()
+    file_id_cache.flush()
+    fragment_controller.flush()
     if app:
         try:
             # Çalışan loop'u kullan
@@ -2182,11 +1967,18 @@ def signal_handler(sig, frame):
             print(f"⚠️ Durdurma uyarısı: {e}")
     sys.exit(0)
 
+async def run_app():
+    """Bot'u başlat, yarım kalan işleri sürdür ve kapatılana kadar çalış"""
+    await app.start()
+    await resume_jobs()
+    await idle()
+    await app.stop()
+
 def run_bot():
     """Bot'u çalıştır"""
     try:
         logger.info("🚀 Bot başlatılıyor...")
-        app.run()
+        app.run(run_app())
         logger.info("✅ Bot başarıyla başlatıldı!")
     except Exception as e:
         error_msg = str(e)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+🗄️ Naofumi Bot Medya Önbelleği
+İndirilen dosyaları (platform, video id, format, kalite) anahtarıyla diskte saklar
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import logging
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+from config import MEDIA_CACHE_DIR, MEDIA_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+# YouTube video id'leri 11 karakterdir
+YOUTUBE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+# Önbellekten sunarken gönderim (başlık, performer, video boyutları) ve thumbnail için gereken alanlar
+INFO_FIELDS = (
+    'id', 'extractor_key', 'title', 'duration', 'thumbnail',
+    'width', 'height', 'artist', 'track', 'uploader', 'channel'
+)
+
+
+def canonical_media_id(url: str) -> Optional[Tuple[str, str]]:
+    """
+    URL'den (platform, video id) çıkar.
+    youtu.be, youtube.com/watch, /shorts/, /embed/, /live/ ve music.youtube.com
+    linkleri aynı id'ye normalize edilir. Tanınmayan linkler için None döner.
+    """
+    try:
+        url = url.strip()
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        parsed = urlparse(url)
+    except Exception:
+        return None
+
+    domain = parsed.netloc.lower().split(':')[0]
+    for prefix in ('www.', 'm.', 'music.', 'mobile.'):
+        if domain.startswith(prefix):
+            domain = domain[len(prefix):]
+    parts = [part for part in parsed.path.split('/') if part]
+
+    video_id = None
+    if domain == 'youtu.be' and parts:
+        video_id = parts[0]
+    elif domain in ('youtube.com', 'youtube-nocookie.com'):
+        if parts and parts[0] in ('shorts', 'embed', 'live', 'v') and len(parts) > 1:
+            video_id = parts[1]
+        else:
+            video_id = (parse_qs(parsed.query).get('v') or [None])[0]
+    if video_id:
+        return ('youtube', video_id) if YOUTUBE_ID_PATTERN.match(video_id) else None
+
+    # TikTok: /@kullanici/video/<id>
+    if domain == 'tiktok.com' and 'video' in parts:
+        index = parts.index('video')
+        if index + 1 < len(parts) and parts[index + 1].isdigit():
+            return 'tiktok', parts[index + 1]
+
+    # Twitter / X: /<kullanici>/status/<id>
+    if domain in ('twitter.com', 'x.com') and 'status' in parts:
+        index = parts.index('status')
+        if index + 1 < len(parts) and parts[index + 1].isdigit():
+            return 'twitter', parts[index + 1]
+
+    return None
+
+
+class MediaCache:
+    def __init__(self, cache_dir: str = MEDIA_CACHE_DIR, max_mb: int = MEDIA_CACHE_MAX_MB):
+        """Medya önbelleğini başlat"""
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb * 1024 * 1024
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # {key: {'path', 'size', 'sha256', 'mtime', 'info', 'created', 'last_access', 'hits'}}
+        self.index = self.load_index()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'corrupt': 0}
+
+    def load_index(self) -> Dict:
+        """Önbellek indeksini yükle"""
+        try:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Medya önbelleği indeksi yükleme hatası: {e}")
+        return {}
+
+    def save_index(self):
+        """Önbellek indeksini kaydet (yarım yazılmış dosya kalmasın diye önce geçici dosyaya)"""
+        try:
+            temp_file = self.index_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=2, ensure_ascii=False)
+            os.replace(temp_file, self.index_file)
+        except Exception as e:
+            print(f"Medya önbelleği indeksi kaydetme hatası: {e}")
+
+    def make_key(self, url: str, format_type: str, quality: Optional[str] = None) -> Optional[str]:
+        """(platform, video id, format, kalite) önbellek anahtarı; URL tanınmazsa None"""
+        media_id = canonical_media_id(url)
+        if not media_id:
+            return None
+        platform, video_id = media_id
+        return f"{platform}:{video_id}:{format_type}:{quality or 'default'}"
+
+    @staticmethod
+    def _file_hash(path: str) -> str:
+        """Dosyanın SHA-256 özetini hesapla"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _verify(self, entry: Dict) -> bool:
+        """Dosya mevcut ve bozulmamış mı? (boyut her seferinde, özet dosya değiştiyse kontrol edilir)"""
+        path = entry['path']
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size != entry['size']:
+            return False
+        if stat.st_mtime != entry['mtime']:
+            if self._file_hash(path) != entry['sha256']:
+                return False
+            entry['mtime'] = stat.st_mtime
+        return True
+
+    def _drop(self, key: str):
+        """Girdiyi ve dosyasını sil (kilit tutulurken çağrılır)"""
+        entry = self.index.pop(key, None)
+        if entry:
+            shutil.rmtree(os.path.dirname(entry['path']), ignore_errors=True)
+
+    def get(self, key: Optional[str], adopt: Optional[Callable[[str], str]] = None) -> Optional[Dict]:
+        """
+        Önbellekteki dosyayı döndür: {'path': ..., 'info': {...}} ya da None.
+        adopt verilirse (örn. Workspace.adopt) dosya kilit altında iş klasörüne bağlanır ve o yol döner;
+        başka bir işin shrink'i yükleme sürerken önbellek kopyasını silse de iş kendi bağlantısını kullanır.
+        """
+        if not key:
+            return None
+
+        with self.lock:
+            entry = self.index.get(key)
+            if not entry:
+                self.stats['misses'] += 1
+                return None
+
+            if not self._verify(entry):
+                logger.warning(f"Önbellek girdisi bozuk, siliniyor: {key}")
+                self._drop(key)
+                self.stats['corrupt'] += 1
+                self.stats['misses'] += 1
+                self.save_index()
+                return None
+
+            path = entry['path']
+            if adopt:
+                try:
+                    path = adopt(path)
+                except OSError as e:
+                    logger.error(f"Önbellek dosyası iş klasörüne alınamadı ({key}): {e}")
+                    self.stats['misses'] += 1
+                    return None
+
+            entry['last_access'] = time.time()
+            entry['hits'] = entry.get('hits', 0) + 1
+            self.stats['hits'] += 1
+            self.save_index()
+            logger.info(f"Önbellekten sunuluyor: {key}")
+            return {'path': path, 'info': dict(entry['info'])}
+
+    def put(self, key: Optional[str], file_path: str, info_dict: Dict) -> Optional[str]:
+        """İndirilen dosyayı önbelleğe ekle, önbellekteki yolu döndür"""
+        if not key or not os.path.exists(file_path):
+            return None
+
+        size = os.path.getsize(file_path)
+        if size > self.max_bytes:
+            return None
+
+        # Her girdi kendi klasöründe; dosya adı (Telegram'da görünen ad) korunur
+        entry_dir = os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest()[:16])
+        cached_path = os.path.join(entry_dir, os.path.basename(file_path))
+
+        try:
+            # Aynı dosya sisteminde hard link, değilse kopya
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.makedirs(entry_dir, exist_ok=True)
+            try:
+                os.link(file_path, cached_path)
+            except OSError:
+                shutil.copy2(file_path, cached_path)
+            sha256 = self._file_hash(cached_path)
+        except Exception as e:
+            logger.error(f"Önbelleğe ekleme hatası ({key}): {e}")
+            return None
+
+        now = time.time()
+        with self.lock:
+            self.index[key] = {
+                'path': cached_path,
+                'size': size,
+                'sha256': sha256,
+                'mtime': os.path.getmtime(cached_path),
+                'info': {field: info_dict.get(field) for field in INFO_FIELDS},
+                'created': now,
+                'last_access': now,
+                'hits': 0
+            }
+            self._evict()
+            self.save_index()
+
+        logger.info(f"Önbelleğe eklendi: {key} ({size / (1024*1024):.1f} MB)")
+        return cached_path
+
+    def _evict(self):
+        """Boyut sınırı aşılırsa en uzun süredir kullanılmayan girdileri sil (kilit tutulurken çağrılır)"""
+        total = sum(entry['size'] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= self.index[key]['size']
+            self._drop(key)
+            self.stats['evictions'] += 1
+            logger.info(f"Önbellekten çıkarıldı (LRU): {key}")
+
+    def total_bytes(self) -> int:
+        """Önbellekteki dosyaların toplam boyutu"""
+        with self.lock:
+            return sum(entry['size'] for entry in self.index.values())
+
+    def shrink(self, nbytes: int) -> int:
+        """En az nbytes boşalana kadar LRU girdileri sil, boşaltılan baytı döndür"""
+        freed = 0
+        with self.lock:
+            for key in sorted(self.index, key=lambda k: self.index[k]['last_access']):
+                if freed >= nbytes:
+                    break
+                freed += self.index[key]['size']
+                self._drop(key)
+                self.stats['evictions'] += 1
+                logger.info(f"Disk alanı için önbellekten çıkarıldı (LRU): {key}")
+            self.save_index()
+        return freed
+
+    def invalidate(self, key: Optional[str]):
+        """Girdiyi önbellekten sil"""
+        with self.lock:
+            if key in self.index:
+                self._drop(key)
+                self.save_index()
+
+    def get_status(self) -> Dict:
+        """Önbellek durumunu döndür"""
+        with self.lock:
+            return {
+                'entries': len(self.index),
+                'size_mb': round(sum(entry['size'] for entry in self.index.values()) / (1024 * 1024), 1),
+                'max_mb': round(self.max_bytes / (1024 * 1024)),
+                **self.stats
+            }
+
+
+# Global instance
+media_cache = MediaCache()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+📏 Naofumi Bot Medya Ön Kontrolü
+İndirmeden önce metadata'dan süre ve dosya boyutu tahmini yapar
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from config import MAX_FILE_SIZE, MAX_VIDEO_DURATION, ERROR_MESSAGES
+
+logger = logging.getLogger(__name__)
+
+# Boyut aşılırsa sırayla denenecek video yükseklikleri
+FALLBACK_HEIGHTS = [1080, 720, 480, 360, 240, 144]
+
+
+class AdmissionError(Exception):
+    """İş limitleri aştığı için indirme başlatılmadı (mesaj kullanıcıya gösterilir)"""
+
+
+def video_format(height: Optional[int] = None) -> str:
+    """MP4 için yt-dlp format ifadesi"""
+    if height:
+        return f'bestvideo[ext=mp4][height<={height}]+bestaudio[ext=m4a]/best[ext=mp4][height<={height}]/best'
+    return 'best[ext=mp4]/best'
+
+
+def format_size(fmt: Dict, duration: Optional[float]) -> Optional[float]:
+    """Tek bir formatın boyutunu tahmin et (filesize / filesize_approx / tbr × süre)"""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if size:
+        return float(size)
+
+    bitrate = fmt.get('tbr') or ((fmt.get('vbr') or 0) + (fmt.get('abr') or 0))
+    if bitrate and duration:
+        return bitrate * 1000 / 8 * duration  # kbps -> byte
+    return None
+
+
+def selected_formats(info: Dict) -> List[Dict]:
+    """yt-dlp'nin seçtiği formatları döndür (birleştirilmiş video+ses dahil)"""
+    if info.get('requested_formats'):
+        return info['requested_formats']
+    return [info]
+
+
+def audio_format(mode: str = 'mp3', quality=192) -> Dict:
+    """
+    Ses işleri için format ayarları.
+    'mp3' yeniden kodlar; 'native' AAC'yi .m4a, Opus'u .opus olarak yalnızca akış kopyasıyla teslim eder.
+    """
+    if mode == 'native':
+        return {
+            'format': 'bestaudio[acodec^=mp4a]/bestaudio[acodec=opus]/bestaudio/best',
+            'postprocessors': [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'best',
+            }]
+        }
+    return {
+        'format': 'bestaudio[ext=m4a]/bestaudio/best',
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': str(quality),
+        }]
+    }
+
+
+def audio_codec(format_opts: Dict) -> Optional[str]:
+    """Ses çıkarılacaksa hedef codec ('best' = akış kopyası), değilse None"""
+    for postprocessor in format_opts.get('postprocessors') or []:
+        if postprocessor.get('key') == 'FFmpegExtractAudio':
+            return postprocessor.get('preferredcodec') or 'best'
+    return None
+
+
+def audio_bitrate(format_opts: Dict) -> Optional[int]:
+    """MP3'e dönüştürülecekse hedef bit hızını döndür"""
+    if audio_codec(format_opts) != 'mp3':
+        return None
+    for postprocessor in format_opts.get('postprocessors') or []:
+        if postprocessor.get('key') == 'FFmpegExtractAudio':
+            try:
+                return int(postprocessor.get('preferredquality') or 192)
+            except (TypeError, ValueError):
+                return 192
+    return None
+
+
+def estimate(info: Dict, format_opts: Dict) -> Tuple[Optional[float], Optional[float]]:
+    """(süre saniye, çıktı boyutu byte) tahmini döndür; bilinmeyen değerler None"""
+    duration = info.get('duration')
+
+    # MP3: çıktı boyutu hedef bit hızından hesaplanır
+    bitrate = audio_bitrate(format_opts)
+    if bitrate and duration:
+        return duration, bitrate * 1000 / 8 * duration
+
+    sizes = [format_size(fmt, duration) for fmt in selected_formats(info)]
+    if not sizes or any(size is None for size in sizes):
+        return duration, None
+    return duration, sum(sizes)
+
+
+def best_size_for_height(info: Dict, height: int) -> Optional[float]:
+    """Verilen yüksekliğe kadar en iyi video + en iyi ses için boyut tahmini"""
+    duration = info.get('duration')
+    formats = info.get('formats') or []
+
+    videos = [
+        fmt for fmt in formats
+        if fmt.get('vcodec') not in (None, 'none') and (fmt.get('height') or 0) <= height
+    ]
+    if not videos:
+        return None
+    video = max(videos, key=lambda fmt: ((fmt.get('height') or 0), (fmt.get('tbr') or 0)))
+    video_size = format_size(video, duration)
+    if video_size is None:
+        return None
+
+    # Video formatında ses yoksa en iyi ses formatını ekle
+    if video.get('acodec') in (None, 'none'):
+        audios = [fmt for fmt in formats if fmt.get('vcodec') == 'none' and fmt.get('acodec') not in (None, 'none')]
+        if audios:
+            audio = max(audios, key=lambda fmt: fmt.get('abr') or fmt.get('tbr') or 0)
+            video_size += format_size(audio, duration) or 0
+    return video_size
+
+
+def admit(info: Dict, format_opts: Dict,
+          max_duration: int = MAX_VIDEO_DURATION, max_size: int = MAX_FILE_SIZE) -> Dict:
+    """
+    Metadata'yı limitlere göre kontrol et.
+    Kabul edilirse (gerekirse daha küçük formata düşürülmüş) format_opts döndürür,
+    edilmezse AdmissionError fırlatır.
+    """
+    if info.get('is_live') or info.get('live_status') in ('is_live', 'is_upcoming'):
+        raise AdmissionError("❌ Canlı yayınlar indirilemez! Yayın bittikten sonra tekrar deneyin.")
+
+    duration, size = estimate(info, format_opts)
+
+    if duration and max_duration and duration > max_duration:
+        logger.info(f"İş reddedildi - süre {duration}s > {max_duration}s")
+        raise AdmissionError(ERROR_MESSAGES['video_too_long'])
+
+    if size is None or not max_size or size <= max_size:
+        return format_opts
+
+    # Video ise daha düşük çözünürlüğe düş
+    if audio_codec(format_opts) is None:
+        current_height = info.get('height') or FALLBACK_HEIGHTS[0] + 1
+        for height in FALLBACK_HEIGHTS:
+            if height >= current_height:
+                continue
+            candidate_size = best_size_for_height(info, height)
+            if candidate_size is not None and candidate_size <= max_size:
+                logger.info(
+                    f"Boyut {size / (1024*1024):.0f}MB limiti aşıyor, {height}p formatına düşürülüyor "
+                    f"(~{candidate_size / (1024*1024):.0f}MB)"
+                )
+                downgraded = dict(format_opts)
+                downgraded['format'] = video_format(height)
+                return downgraded
+
+    logger.info(f"İş reddedildi - tahmini boyut {size / (1024*1024):.0f}MB")
+    raise AdmissionError(ERROR_MESSAGES['file_too_large'])
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+🧮 Naofumi Bot Süreç Limitleri
+Ayrı oturumda (start_new_session) başlatılan çocuk süreç gruplarının bellek ölçümü ve sonlandırılması
+"""
+
+import logging
+import os
+import signal
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+def group_rss(pid: int) -> int:
+    """Sürecin ve alt süreçlerinin (ffmpeg dahil) toplam gerçek bellek kullanımı (bayt, psutil yoksa 0)"""
+    if psutil is None:
+        return 0
+    try:
+        parent = psutil.Process(pid)
+        processes = [parent] + parent.children(recursive=True)
+    except psutil.Error:
+        return 0
+    total = 0
+    for proc in processes:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+def kill_group(process):
+    """Süreci ve süreç grubunu SIGKILL ile öldür"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    except Exception as e:
+        logger.error(f"Süreç grubu öldürülemedi (pid {process.pid}): {e}")
+        process.kill()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+📝 Naofumi Bot İlerleme Mesajı Yöneticisi
+Durum mesajı düzenlemelerini tek yerden yapar: aynı mesajın güncellemeleri birleştirilir,
+değişmeyen metin gönderilmez; sohbet/global bütçe ve FloodWait telegram_api'de uygulanır
+"""
+
+import asyncio
+import time
+import logging
+from typing import Callable, Dict, Set, Tuple
+
+from pyrogram.errors import MessageNotModified
+
+from config import PROGRESS_EDIT_INTERVAL
+from telegram_api import telegram_api, DELIVERY
+
+logger = logging.getLogger(__name__)
+
+# Bekleyen güncellemelerin kontrol aralığı (saniye)
+SWEEP_INTERVAL = 0.5
+
+# Bu süredir düzenlenmeyen mesajların son metin kaydı silinir (saniye)
+STATE_TTL = 600
+
+
+def message_key(message) -> Tuple[int, int]:
+    return message.chat.id, message.id
+
+
+class ProgressRenderer:
+    def __init__(self, edit_interval: float = PROGRESS_EDIT_INTERVAL):
+        """İlerleme yöneticisini başlat"""
+        self.edit_interval = edit_interval
+
+        # Gönderilmeyi bekleyen son metin: {(chat_id, message_id): (message, text)}
+        self.pending: Dict[Tuple[int, int], Tuple[object, str]] = {}
+        # Mesajın ekrandaki metni ve son düzenleme zamanı
+        self.shown: Dict[Tuple[int, int], Tuple[str, float]] = {}
+        # Düzenlemesi sürmekte olan mesajlar ve görevleri
+        self.in_flight: Set[Tuple[int, int]] = set()
+        self.tasks: Set[asyncio.Task] = set()
+
+        self.worker = None
+        self.stats = {'edits': 0, 'coalesced': 0, 'unchanged': 0, 'failed': 0}
+
+    async def _edit(self, message, text: str):
+        """
+        Mesajı düzenle (bütçe ve FloodWait beklemesi telegram_api'de).
+        Metin yalnızca düzenleme başarılıysa ekrandaki metin olarak kaydedilir; başarısız düzenlemeden
+        sonra aynı metin tekrar gelirse tekrar denenir.
+        """
+        key = message_key(message)
+        self.in_flight.add(key)
+        try:
+            await message.edit_text(text)
+            self.stats['edits'] += 1
+        except MessageNotModified:
+            self.stats['unchanged'] += 1
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.error(f"İlerleme mesajı güncellenirken hata: {e}")
+            return
+        finally:
+            self.in_flight.discard(key)
+        self.shown[key] = (text, time.time())
+
+    def update(self, message, text: str):
+        """
+        İlerleme metnini sıraya koy (beklemez). Aynı mesaj için bekleyen eski metnin yerine geçer;
+        ekrandaki metinle aynıysa atlanır.
+        """
+        key = message_key(message)
+        if key in self.pending:
+            self.stats['coalesced'] += 1
+        elif self.shown.get(key, (None,))[0] == text:
+            self.stats['unchanged'] += 1
+            return
+        self.pending[key] = (message, text)
+
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+
+    def hook(self, message, formatter: Callable[[Dict], str]) -> Callable[[Dict], None]:
+        """yt-dlp progress_hooks için thread güvenli callback: olay metne çevrilip sıraya konur"""
+        loop = asyncio.get_running_loop()
+
+        def on_event(event: Dict):
+            loop.call_soon_threadsafe(self.update, message, formatter(event))
+        return on_event
+
+    async def edit(self, message, text: str):
+        """
+        Önemli durum değişikliğini (tamamlandı, hata vb.) hemen göster.
+        Bekleyen ilerleme güncellemesi iptal edilir; düzenleme teslim önceliğiyle gönderilir.
+        """
+        key = message_key(message)
+        self.pending.pop(key, None)
+        if self.shown.get(key, (None,))[0] == text:
+            self.stats['unchanged'] += 1
+            return
+        # Süren ilerleme düzenlemesi bu metnin üstüne yazmasın
+        while key in self.in_flight:
+            await asyncio.sleep(SWEEP_INTERVAL)
+        with telegram_api.priority(DELIVERY):
+            await self._edit(message, text)
+
+    def forget(self, message):
+        """Silinen mesajın bekleyen güncellemesini ve kaydını bırak"""
+        key = message_key(message)
+        self.pending.pop(key, None)
+        self.shown.pop(key, None)
+
+    async def _run(self):
+        """Bekleyen güncellemeleri mesaj aralığı ve sohbet bütçesi izin verdikçe gönder"""
+        while self.pending:
+            now = time.time()
+            for key, (message, text) in list(self.pending.items()):
+                last_edit = self.shown.get(key, (None, 0))[1]
+                if key in self.in_flight or now - last_edit < self.edit_interval or not telegram_api.ready(key[0]):
+                    continue
+                del self.pending[key]
+                self.in_flight.add(key)
+                # Her düzenleme kendi görevinde: FloodWait bekleyen sohbet diğerlerini durdurmaz
+                task = asyncio.create_task(self._edit(message, text))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+            await asyncio.sleep(SWEEP_INTERVAL)
+
+        # Uzun süredir dokunulmayan mesaj kayıtlarını temizle
+        now = time.time()
+        for key, (_, edited_at) in list(self.shown.items()):
+            if now - edited_at > STATE_TTL:
+                del self.shown[key]
+
+    def get_status(self) -> Dict:
+        """Bekleyen düzenlemeler ve sayaçlar"""
+        return {
+            'pending': len(self.pending),
+            'in_flight': len(self.in_flight),
+            **self.stats
+        }
+
+
+# Global instance
+progress_renderer = ProgressRenderer()
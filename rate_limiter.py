@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+🚦 Naofumi Bot Hız Sınırlayıcı
+Kullanıcı ve sohbet bazlı token bucket; limitler bot_settings.json'dan canlı okunur
+"""
+
+import json
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    def __init__(self, settings_file: str = "bot_settings.json"):
+        """Hız sınırlayıcıyı başlat"""
+        self.settings_file = settings_file
+        self.reload_interval = 10      # Ayar dosyası en fazla bu sıklıkla kontrol edilir (saniye)
+
+        # Dakika başına izin verilen istek (0 = sınırsız)
+        self.user_rate = 10
+        self.chat_rate = 30
+
+        self._settings_mtime = None
+        self._last_reload_check = 0.0
+
+        # {('user'|'chat', id): [token, son güncelleme, uyarıldı mı]} - en eski erişim başta
+        self.buckets: "OrderedDict[Tuple[str, int], list]" = OrderedDict()
+        self.stats = {'allowed': 0, 'throttled': 0, 'evicted': 0}
+
+        self.reload_settings()
+
+    def reload_settings(self):
+        """bot_settings.json değiştiyse limitleri yeniden yükle"""
+        now = time.time()
+        if now - self._last_reload_check < self.reload_interval and self._settings_mtime is not None:
+            return
+        self._last_reload_check = now
+
+        try:
+            mtime = os.path.getmtime(self.settings_file)
+        except OSError:
+            return
+        if mtime == self._settings_mtime:
+            return
+
+        try:
+            with open(self.settings_file, 'r', encoding='utf-8') as f:
+                settings = json.load(f)
+            user_rate = max(0, int(settings.get('rate_limit_per_minute', self.user_rate)))
+            chat_rate = max(0, int(settings.get('chat_rate_limit_per_minute', user_rate * 3)))
+        except Exception as e:
+            print(f"Hız sınırı ayarları yükleme hatası: {e}")
+            return
+
+        self._settings_mtime = mtime
+        self.user_rate = user_rate
+        self.chat_rate = chat_rate
+        logger.info(f"Hız sınırları yüklendi: kullanıcı {self.user_rate}/dk, sohbet {self.chat_rate}/dk")
+
+    def _bucket(self, key: Tuple[str, int], rate: int, now: float) -> list:
+        """Kovayı doldurup döndür (kapasite = dakikalık limit)"""
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = [float(rate), now, False]
+            self.buckets[key] = bucket
+        else:
+            bucket[0] = min(float(rate), bucket[0] + (now - bucket[1]) * rate / 60.0)
+            bucket[1] = now
+            self.buckets.move_to_end(key)
+        return bucket
+
+    def _evict_idle(self, now: float):
+        """Tamamen dolmuş (boşta) kovaları sil - aktif olmayan kullanıcı bellek tutmaz"""
+        idle_after = 60.0
+        while self.buckets:
+            key, bucket = next(iter(self.buckets.items()))
+            if now - bucket[1] < idle_after:
+                break
+            del self.buckets[key]
+            self.stats['evicted'] += 1
+
+    def check(self, user_id: int, chat_id: int) -> Tuple[bool, bool]:
+        """
+        İstek yapılabilir mi? (izin, uyarı gönderilsin mi) döndürür.
+        Uyarı, sınıra takılan kullanıcıya pencere başına bir kez gönderilir.
+        """
+        self.reload_settings()
+        now = time.time()
+        self._evict_idle(now)
+
+        buckets = []
+        if self.user_rate:
+            buckets.append(self._bucket(('user', user_id), self.user_rate, now))
+        if self.chat_rate and chat_id != user_id:
+            buckets.append(self._bucket(('chat', chat_id), self.chat_rate, now))
+
+        # Token ancak tüm kovalarda varsa harcanır
+        empty = next((bucket for bucket in buckets if bucket[0] < 1.0), None)
+        if empty is None:
+            for bucket in buckets:
+                bucket[0] -= 1.0
+                bucket[2] = False
+            self.stats['allowed'] += 1
+            return True, False
+
+        self.stats['throttled'] += 1
+        warn = not empty[2]
+        empty[2] = True
+        return False, warn
+
+    def get_status(self) -> Dict:
+        """Sınırlayıcı durumunu döndür"""
+        return {
+            'user_rate_per_minute': self.user_rate,
+            'chat_rate_per_minute': self.chat_rate,
+            'active_buckets': len(self.buckets),
+            **self.stats
+        }
+
+
+# Global instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+🛫 Naofumi Bot Tekil Uçuş (single-flight)
+Aynı anda gelen aynı indirme isteklerini tek işte birleştirir
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from media_cache import canonical_media_id
+
+logger = logging.getLogger(__name__)
+
+
+class Flight:
+    def __init__(self, key: str):
+        """Paylaşılan tek bir iş"""
+        self.key = key
+        self.task: Optional[asyncio.Task] = None
+        self.progress: Optional[Dict] = None
+        self.progress_version = 0
+        self.subscribers = 0
+        self.started_at = time.time()
+
+    def update_progress(self, event: Dict):
+        """İlerleme olayını kaydet (işçi thread'inden çağrılabilir)"""
+        self.progress = event
+        self.progress_version += 1
+
+
+class SingleFlight:
+    def __init__(self, progress_interval: float = 1.0):
+        """Tekil uçuş yöneticisini başlat"""
+        self.flights: Dict[str, Flight] = {}
+        self.progress_interval = progress_interval  # Mesaj düzenleme sıklığını progress_renderer sınırlar
+        self.stats = {'started': 0, 'coalesced': 0}
+
+    def make_key(self, url: str, format_type: str, quality: Optional[str] = None) -> str:
+        """Kanonik video id + format + kalite; tanınmayan linklerde URL'nin kendisi"""
+        media_id = canonical_media_id(url)
+        target = ':'.join(media_id) if media_id else url.strip()
+        return f"{target}:{format_type}:{quality or 'default'}"
+
+    async def run(self, key: str, work: Callable[[Callable[[Dict], None]], Awaitable[Any]],
+                  on_progress: Optional[Callable[[Dict], Awaitable[None]]] = None) -> Any:
+        """
+        Aynı anahtarla çalışan iş varsa ona abone ol, yoksa işi başlat.
+        work(progress_callback) paylaşılan işi yapar; her abone sonucu (ya da hatayı) alır,
+        on_progress ile paylaşılan ilerleme her abonenin kendi mesajına yansıtılır.
+        """
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = Flight(key)
+            flight.task = asyncio.create_task(work(flight.update_progress))
+            flight.task.add_done_callback(lambda _: self._finish(flight))
+            self.flights[key] = flight
+            self.stats['started'] += 1
+        else:
+            self.stats['coalesced'] += 1
+            logger.info(f"Aynı indirme zaten sürüyor, sonuca abone olundu: {key} ({flight.subscribers + 1}. abone)")
+
+        flight.subscribers += 1
+        try:
+            seen_version = 0
+            while True:
+                # Abonenin iptali paylaşılan işi iptal etmez
+                done, _ = await asyncio.wait({flight.task}, timeout=self.progress_interval)
+                if done:
+                    return flight.task.result()
+                if on_progress and flight.progress_version != seen_version:
+                    seen_version = flight.progress_version
+                    try:
+                        await on_progress(flight.progress)
+                    except Exception as e:
+                        logger.error(f"İlerleme mesajı güncellenirken hata: {e}")
+        finally:
+            flight.subscribers -= 1
+
+    def _finish(self, flight: Flight):
+        """Biten işi tablodan çıkar"""
+        if self.flights.get(flight.key) is flight:
+            del self.flights[flight.key]
+        # Tüm aboneler ayrıldıysa hata "alınmamış" uyarısı vermesin
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def get_status(self) -> Dict:
+        """Devam eden paylaşılan işleri döndür"""
+        return {
+            'in_flight': len(self.flights),
+            'subscribers': sum(flight.subscribers for flight in self.flights.values()),
+            **self.stats
+        }
+
+
+# Global instance
+single_flight = SingleFlight()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+💾 Naofumi Bot Depolama Yöneticisi
+İş klasörleri ve medya önbelleğinin disk kullanımını izler, kotayı uygular;
+yer yoksa önce biten işlerin çıktıları (önbellek) LRU ile silinir, yine yoksa iş reddedilir
+"""
+
+import os
+import shutil
+import logging
+from typing import Dict, Optional
+
+from config import STORAGE_QUOTA_MB, STORAGE_MIN_FREE_MB
+from job_store import job_store
+from media_cache import media_cache
+from media_probe import AdmissionError
+from workspace import Workspace, workspaces
+
+logger = logging.getLogger(__name__)
+
+# İndirme sırasında kaynak ile dönüştürülmüş/birleştirilmiş çıktı aynı anda diskte bulunur
+SPACE_FACTOR = 2
+
+# Eski sürümlerin ve yardımcı dosyaların kullandığı geçici klasörler
+LEGACY_TEMP_DIRS = ['/tmp/downloads', '/tmp/temp']
+
+
+def dir_size(path: str) -> int:
+    """Klasördeki dosyaların toplam boyutu"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class StorageManager:
+    def __init__(self, quota_mb: int = STORAGE_QUOTA_MB, min_free_mb: int = STORAGE_MIN_FREE_MB):
+        """Depolama yöneticisini başlat (quota_mb = 0: kota yok, yalnızca boş alan kontrolü)"""
+        self.quota = quota_mb * 1024 * 1024
+        self.min_free = min_free_mb * 1024 * 1024
+        self.stats = {'admitted': 0, 'rejected': 0, 'evicted_bytes': 0}
+
+    def free_disk(self) -> int:
+        """Çalışma alanlarının bulunduğu diskte kullanılabilir alan"""
+        stat = os.statvfs(workspaces.root)
+        return stat.f_bavail * stat.f_frsize
+
+    def job_usage(self) -> Dict[str, int]:
+        """Aktif iş klasörü başına kullanılan bayt"""
+        return {path: dir_size(path) for path in list(workspaces.active)}
+
+    def reserve(self, workspace: Workspace, estimated_size: Optional[float]):
+        """
+        İş indirmeye başlamadan önce yer ayır.
+        Kota ya da boş alan yetmezse önbellekten LRU ile yer açılır, yine yetmezse AdmissionError.
+        """
+        needed = int((estimated_size or 0) * SPACE_FACTOR)
+        usage = self.job_usage()
+        # Diğer işlerin henüz yazmadığı ama ayırdığı alan
+        pending = sum(
+            max(0, other.reserved - usage.get(path, 0))
+            for path, other in list(workspaces.active.items())
+            if other is not workspace
+        )
+
+        shortfall = needed + pending + self.min_free - self.free_disk()
+        if self.quota:
+            used = sum(usage.values()) + media_cache.total_bytes()
+            shortfall = max(shortfall, used + pending + needed - self.quota)
+
+        if shortfall > 0:
+            freed = media_cache.shrink(shortfall)
+            self.stats['evicted_bytes'] += freed
+            if freed < shortfall:
+                self.stats['rejected'] += 1
+                logger.warning(
+                    f"Disk alanı yetersiz: {needed / (1024*1024):.0f}MB gerekli, "
+                    f"{(shortfall - freed) / (1024*1024):.0f}MB açılamadı"
+                )
+                raise AdmissionError("💾 Sunucuda şu anda yeterli disk alanı yok! Lütfen birkaç dakika sonra tekrar deneyin.")
+
+        workspace.reserved = needed
+        self.stats['admitted'] += 1
+
+    def clean(self) -> int:
+        """
+        Biten işlerden kalan her şeyi sil: sahipsiz iş klasörleri, medya önbelleği ve eski geçici klasörler.
+        Aktif işlerin ve sürdürülecek (kalıcı kayıtlı) işlerin klasörlerine dokunulmaz. Boşaltılan baytı döndürür.
+        """
+        keep = {os.path.abspath(path) for path in job_store.workspaces()}
+        freed = 0
+        for name in os.listdir(workspaces.root):
+            path = os.path.join(workspaces.root, name)
+            if path not in workspaces.active and os.path.abspath(path) not in keep and os.path.isdir(path):
+                freed += dir_size(path)
+        workspaces.cleanup_stale(keep=keep)
+        freed += media_cache.shrink(media_cache.total_bytes())
+
+        for temp_dir in LEGACY_TEMP_DIRS:
+            if not os.path.isdir(temp_dir):
+                continue
+            freed += dir_size(temp_dir)
+            for name in os.listdir(temp_dir):
+                path = os.path.join(temp_dir, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+        return freed
+
+    def get_status(self) -> Dict:
+        """Disk kullanımı (MB): iş başına, toplam, kota ve boş alan"""
+        mb = 1024 * 1024
+        usage = self.job_usage()
+        jobs_total = sum(usage.values())
+        cache_total = media_cache.total_bytes()
+        return {
+            'jobs': {os.path.basename(path): round(size / mb, 1) for path, size in usage.items()},
+            'jobs_mb': round(jobs_total / mb, 1),
+            'cache_mb': round(cache_total / mb, 1),
+            'total_mb': round((jobs_total + cache_total) / mb, 1),
+            'quota_mb': round(self.quota / mb) if self.quota else None,
+            'free_disk_mb': round(self.free_disk() / mb),
+            **self.stats
+        }
+
+
+# Global instance
+storage_manager = StorageManager()
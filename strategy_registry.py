@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+🧭 Naofumi Bot Bypass Strateji Kaydı
+yt-dlp deneme profillerini platform bazlı başarı/gecikme skoruna göre sıralar
+"""
+
+import copy
+import threading
+import time
+from typing import Dict, List, Optional
+
+from json_file import JsonFile
+
+# Bypass profilleri - varsayılan deneme sırası
+STRATEGY_PROFILES = [
+    {
+        'name': 'android_music',
+        'label': 'Android Music Client',
+        'socket_timeout': 180,
+        'retries': 3,
+        'extractor_args': {
+            'youtube': {
+                'player_client': ['android_music'],
+                'geo_bypass': True,
+                'geo_bypass_country': 'US'
+            }
+        },
+        'http_headers': {
+            'User-Agent': 'Mozilla/5.0 (Linux; Android 10; SM-G973F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'Referer': 'https://www.youtube.com/',
+            'Origin': 'https://www.youtube.com'
+        }
+    },
+    {
+        'name': 'ios',
+        'label': 'iPhone Safari',
+        'socket_timeout': 180,
+        'retries': 3,
+        'extractor_args': {
+            'youtube': {
+                'player_client': ['ios'],
+                'geo_bypass': True,
+                'geo_bypass_country': 'US'
+            }
+        },
+        'http_headers': {
+            'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 15_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive',
+            'Referer': 'https://www.youtube.com/',
+            'Origin': 'https://www.youtube.com'
+        }
+    },
+    {
+        'name': 'googlebot',
+        'label': 'Googlebot',
+        'socket_timeout': 180,
+        'retries': 3,
+        'extractor_args': {
+            'youtube': {
+                'player_client': ['web'],
+                'geo_bypass': True,
+                'geo_bypass_country': 'US'
+            }
+        },
+        'http_headers': {
+            'User-Agent': 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'Referer': 'https://www.google.com/',
+            'Origin': 'https://www.google.com'
+        }
+    },
+    {
+        'name': 'firefox',
+        'label': 'Firefox',
+        'socket_timeout': 180,
+        'retries': 3,
+        'extractor_args': {
+            'youtube': {
+                'player_client': ['web'],
+                'geo_bypass': True,
+                'geo_bypass_country': 'US'
+            }
+        },
+        'http_headers': {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:91.0) Gecko/20100101 Firefox/91.0',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive',
+            'Referer': 'https://www.youtube.com/',
+            'Origin': 'https://www.youtube.com',
+            'DNT': '1',
+            'Upgrade-Insecure-Requests': '1'
+        }
+    },
+    {
+        'name': 'minimal',
+        'label': 'Minimal ayarlar',
+        'socket_timeout': 60,
+        'retries': 1,
+        'extractor_args': {
+            'youtube': {
+                'player_client': ['android', 'web']
+            }
+        },
+        'http_headers': {
+            'User-Agent': 'Mozilla/5.0 (Linux; Android 8.0; SM-G960F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36'
+        }
+    }
+]
+
+# Denemeler sık gelir: istatistik dosyası en fazla bu aralıkla (saniye) yazılır
+SAVE_DELAY = 10
+
+# Tüm profillerde ortak yt-dlp ayarları
+BASE_OPTIONS = {
+    'outtmpl': '/tmp/%(title)s.%(ext)s',
+    'noplaylist': True,
+    'extract_flat': False,
+    'writethumbnail': False,
+    'writeinfojson': False,
+    'no_warnings': True,
+    'quiet': True
+}
+
+
+class StrategyRegistry:
+    def __init__(self):
+        """Strateji kaydını başlat"""
+        self.stats_file = "strategy_stats.json"
+        self.lock = threading.Lock()
+        self.stats_store = JsonFile(self.stats_file, "Strateji istatistikleri", lambda: self.stats, SAVE_DELAY, self.lock)
+
+        self.profiles = {profile['name']: profile for profile in STRATEGY_PROFILES}
+        self.default_order = [profile['name'] for profile in STRATEGY_PROFILES]
+
+        # Skor ayarları
+        self.alpha = 0.3               # EWMA ağırlığı (yeni ölçümün etkisi)
+        self.half_life = 6 * 3600      # Skorlar 6 saatte yarı yarıya önsel değere döner
+        self.prior_success = 0.5       # Hiç denenmemiş strateji için başarı tahmini
+        self.prior_latency = 30.0      # Hiç denenmemiş strateji için süre tahmini (saniye)
+
+        # {platform: {strategy: {'success': float, 'latency': float, 'attempts': int, 'failures': int, 'updated': ts}}}
+        self.stats = self.stats_store.load()
+
+    def flush(self):
+        """Bekleyen istatistik kaydını hemen yaz (kapanışta)"""
+        self.stats_store.flush()
+
+    def _decayed(self, entry: Dict, now: float) -> Dict:
+        """Zamanla önsel değerlere doğru sönümlenmiş skoru döndür"""
+        weight = 0.5 ** (max(0.0, now - entry['updated']) / self.half_life)
+        return {
+            'success': self.prior_success + (entry['success'] - self.prior_success) * weight,
+            'latency': self.prior_latency + (entry['latency'] - self.prior_latency) * weight
+        }
+
+    def score(self, platform: str, name: str) -> float:
+        """Beklenen başarıya kadar geçen süre (düşük olan önce denenir)"""
+        entry = self.stats.get(platform or 'unknown', {}).get(name)
+        if entry:
+            current = self._decayed(entry, time.time())
+        else:
+            current = {'success': self.prior_success, 'latency': self.prior_latency}
+        return current['latency'] / max(current['success'], 0.05)
+
+    def ordered(self, platform: Optional[str]) -> List[Dict]:
+        """Platform için en iyi stratejiden başlayarak profilleri döndür"""
+        names = sorted(
+            self.default_order,
+            key=lambda name: (self.score(platform, name), self.default_order.index(name))
+        )
+        return [self.profiles[name] for name in names]
+
+    def build_options(self, name: str, format_opts: Dict) -> Dict:
+        """Profil ve format ayarlarından yt-dlp seçeneklerini oluştur"""
+        profile = self.profiles[name]
+        ydl_opts = copy.deepcopy(BASE_OPTIONS)
+        for key, value in profile.items():
+            if key not in ('name', 'label'):
+                ydl_opts[key] = copy.deepcopy(value)
+        ydl_opts.update(copy.deepcopy(format_opts))
+        return ydl_opts
+
+    def record(self, platform: Optional[str], name: str, success: bool, latency: float):
+        """Deneme sonucunu kaydet"""
+        now = time.time()
+        with self.lock:
+            self._update(platform, name, success, latency, now)
+            self.stats_store.schedule()
+
+    def _update(self, platform: Optional[str], name: str, success: bool, latency: float, now: float):
+        """Stratejinin skorunu güncelle (kilit tutulurken çağrılır)"""
+        platform_stats = self.stats.setdefault(platform or 'unknown', {})
+        entry = platform_stats.get(name)
+
+        if entry is None:
+            entry = {
+                'success': self.prior_success,
+                'latency': self.prior_latency,
+                'attempts': 0,
+                'failures': 0,
+                'updated': now
+            }
+        else:
+            entry.update(self._decayed(entry, now))
+
+        entry['success'] = (1 - self.alpha) * entry['success'] + self.alpha * (1.0 if success else 0.0)
+        entry['latency'] = (1 - self.alpha) * entry['latency'] + self.alpha * latency
+        entry['attempts'] += 1
+        if not success:
+            entry['failures'] += 1
+        entry['updated'] = now
+
+        platform_stats[name] = entry
+
+    def get_stats_text(self) -> str:
+        """Admin paneli için strateji istatistiklerini metin olarak döndür"""
+        if not self.stats:
+            return "🧭 Henüz strateji istatistiği yok."
+
+        now = time.time()
+        text = "🧭 **BYPASS STRATEJİLERİ** 🧭\n"
+        for platform in sorted(self.stats):
+            text += f"\n📺 **{platform}:**\n"
+            for index, profile in enumerate(self.ordered(platform), 1):
+                entry = self.stats[platform].get(profile['name'])
+                if not entry:
+                    text += f"{index}. {profile['label']}: denenmedi\n"
+                    continue
+                current = self._decayed(entry, now)
+                text += (
+                    f"{index}. {profile['label']}: %{current['success'] * 100:.0f} başarı, "
+                    f"{current['latency']:.1f} sn, {entry['attempts']} deneme\n"
+                )
+        return text
+
+
+# Global instance
+strategy_registry = StrategyRegistry()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+📡 Naofumi Bot Telegram Gönderim Katmanı
+Tüm giden Telegram istekleri (mesaj, düzenleme, medya, callback cevabı) Client.invoke
+üzerinden buradan geçer: sohbet ve global token bucket'larına uyulur, FloodWait'te tam
+istenen süre beklenir, teslim mesajları süs niteliğindeki düzenlemelerden önce gönderilir
+"""
+
+import asyncio
+import contextvars
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from pyrogram.errors import FloodWait
+
+from config import (
+    TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_RATE, TELEGRAM_GROUP_RATE_PER_MINUTE, TELEGRAM_MAX_FLOOD_WAIT
+)
+
+logger = logging.getLogger(__name__)
+
+DELIVERY = 'delivery'
+COSMETIC = 'cosmetic'
+
+# Düzenleme ve "yazıyor..." gibi istekler süs niteliğinde; diğerleri teslim önceliğinde
+COSMETIC_QUERIES = ('EditMessage', 'SetTyping')
+
+# Süs istekleri bucket'ta bu kadar token'ı teslim mesajlarına bırakır
+COSMETIC_RESERVE = 1.0
+
+# FloodWait sonrası en fazla yeniden deneme
+MAX_FLOOD_RETRIES = 3
+
+# FloodWait'i tüm gönderimleri durduran (hesap düzeyindeki) istekler; diğer sohbetsiz
+# istekler (GetMessages, callback cevabı vb.) FloodWait'te yalnızca kendi metodunu bekletir
+GLOBAL_FLOOD_QUERIES = ('ImportBotAuthorization', 'ExportAuthorization', 'ImportAuthorization')
+GLOBAL = ('global', 0)
+
+# Aktif görevin önceliğini zorlamak için (örn. tamamlandı düzenlemesi teslim sayılır)
+_priority: contextvars.ContextVar = contextvars.ContextVar('telegram_priority', default=None)
+
+
+class Bucket:
+    def __init__(self, rate: float, burst: float):
+        """Token bucket (rate: istek/sn)"""
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def available(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def wait_time(self, reserve: float = 0) -> float:
+        """Bir token (ve istenen yedek) birikene kadar beklenecek süre"""
+        missing = 1 + reserve - self.available()
+        return max(0.0, missing / self.rate) if self.rate else 0.0
+
+
+def query_chat(query) -> Optional[Tuple[str, int]]:
+    """Ham Telegram isteğinin hedef sohbeti: ('user'|'group', id), sohbetsiz isteklerde None"""
+    peer = getattr(query, 'peer', None)
+    if peer is None:
+        return None
+    if getattr(peer, 'user_id', None) is not None:
+        return 'user', peer.user_id
+    for field in ('chat_id', 'channel_id'):
+        if getattr(peer, field, None) is not None:
+            return 'group', getattr(peer, field)
+    return None
+
+
+def flood_key(query, chat: Optional[Tuple[str, int]]) -> Tuple[str, object]:
+    """FloodWait'in uygulanacağı kapsam: hedef sohbet, hesap geneli ya da sohbetsiz isteğin metodu"""
+    if chat is not None:
+        return chat
+    name = type(query).__name__
+    return GLOBAL if name in GLOBAL_FLOOD_QUERIES else ('method', name)
+
+
+def chat_key(chat_id: int) -> Tuple[str, int]:
+    """Pyrogram sohbet id'sini (örn. -100... süper grup) ham istekteki sohbet anahtarına çevir"""
+    if chat_id > 0:
+        return 'user', chat_id
+    if chat_id <= -1000000000000:
+        return 'group', -chat_id - 1000000000000
+    return 'group', -chat_id
+
+
+class TelegramAPI:
+    def __init__(self):
+        """Gönderim katmanını başlat"""
+        self.global_bucket = Bucket(TELEGRAM_GLOBAL_RATE, TELEGRAM_GLOBAL_RATE)
+        self.chat_buckets: Dict[Tuple[str, int], Bucket] = {}
+        self.blocked_until: Dict[Tuple[str, object], float] = {}    # FloodWait: {sohbet/metot/GLOBAL: zaman}
+        self.stats = {
+            'calls': 0, 'throttled': 0, 'throttled_seconds': 0.0,
+            'flood_waits': 0, 'flood_wait_seconds': 0, 'flood_failures': 0
+        }
+
+    def install(self, client):
+        """Client.invoke'u sarmala: Pyrogram'ın tüm yüksek seviye metotları buradan geçer"""
+        original = client.invoke
+
+        async def invoke(query, *args, **kwargs):
+            # FloodWait Pyrogram içinde sessizce uyutulmaz, burada sayılıp ele alınır
+            if len(args) < 3:
+                kwargs['sleep_threshold'] = 0
+            return await self.call(query, original, *args, **kwargs)
+
+        client.invoke = invoke
+
+    @contextmanager
+    def priority(self, level: str):
+        """Bu blokta yapılan istekler verilen öncelikle gönderilir"""
+        token = _priority.set(level)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    def _chat_bucket(self, chat: Tuple[str, int]) -> Bucket:
+        bucket = self.chat_buckets.get(chat)
+        if bucket is None:
+            if chat[0] == 'group':
+                bucket = Bucket(TELEGRAM_GROUP_RATE_PER_MINUTE / 60, max(1, TELEGRAM_GROUP_RATE_PER_MINUTE // 4))
+            else:
+                bucket = Bucket(TELEGRAM_CHAT_RATE, max(1, TELEGRAM_CHAT_RATE * 3))
+            self.chat_buckets[chat] = bucket
+            # Dolu (boşta) bucket'ların kaydı tutulmaz
+            if len(self.chat_buckets) > 1000:
+                for key, old in list(self.chat_buckets.items()):
+                    if old.available() >= old.burst:
+                        del self.chat_buckets[key]
+        return bucket
+
+    def _wait_time(self, chat: Optional[Tuple[str, int]], reserve: float,
+                   flood: Optional[Tuple[str, object]] = None) -> float:
+        now = time.time()
+        wait = 0.0
+        for key in (chat, flood, GLOBAL):
+            until = self.blocked_until.get(key)
+            if until is None:
+                continue
+            if until <= now:
+                del self.blocked_until[key]
+            else:
+                wait = max(wait, until - now)
+        wait = max(wait, self.global_bucket.wait_time(reserve))
+        if chat is not None:
+            wait = max(wait, self._chat_bucket(chat).wait_time(reserve))
+        return wait
+
+    def ready(self, chat_id: int) -> bool:
+        """Bu sohbete şimdi beklemeden süs isteği (ilerleme düzenlemesi) gönderilebilir mi?"""
+        return self._wait_time(chat_key(chat_id), COSMETIC_RESERVE) <= 0
+
+    async def call(self, query, send, *args, **kwargs):
+        """İsteği bütçe uygunsa gönder; FloodWait'te tam istenen süre bekleyip yeniden dene"""
+        chat = query_chat(query)
+        flood = flood_key(query, chat)
+        level = _priority.get() or (COSMETIC if type(query).__name__ in COSMETIC_QUERIES else DELIVERY)
+        reserve = COSMETIC_RESERVE if level == COSMETIC else 0
+
+        for attempt in range(MAX_FLOOD_RETRIES + 1):
+            wait = self._wait_time(chat, reserve, flood)
+            if wait > 0:
+                self.stats['throttled'] += 1
+                self.stats['throttled_seconds'] += wait
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    wait = self._wait_time(chat, reserve, flood)
+
+            self.global_bucket.tokens -= 1
+            if chat is not None:
+                self._chat_bucket(chat).tokens -= 1
+            self.stats['calls'] += 1
+
+            try:
+                return await send(query, *args, **kwargs)
+            except FloodWait as e:
+                self.stats['flood_waits'] += 1
+                self.stats['flood_wait_seconds'] += e.value
+                self.blocked_until[flood] = time.time() + e.value
+                if e.value > TELEGRAM_MAX_FLOOD_WAIT or attempt == MAX_FLOOD_RETRIES:
+                    self.stats['flood_failures'] += 1
+                    raise
+                logger.warning(f"FloodWait ({type(query).__name__}, {flood}): {e.value} sn bekleniyor")
+
+    def get_status(self) -> Dict:
+        """Kısıtlama sayaçları ve FloodWait'te bekleyen sohbetler/metotlar"""
+        now = time.time()
+        blocked = [key for key, until in self.blocked_until.items() if until > now]
+        return {
+            'tracked_chats': len(self.chat_buckets),
+            'flood_blocked_chats': sum(1 for key in blocked if key[0] in ('user', 'group')),
+            'flood_blocked_methods': [key[1] for key in blocked if key[0] == 'method'],
+            'flood_blocked_global': GLOBAL in blocked,
+            **self.stats,
+            'throttled_seconds': round(self.stats['throttled_seconds'], 1)
+        }
+
+
+# Global instance
+telegram_api = TelegramAPI()
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test ortamı: modüller global instance'larını içe aktarılırken oluşturduğu için
+kalıcı dosyalar (iş kaydı, çalışma klasörleri, önbellek) geçici klasöre yönlendirilir
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_state_dir = tempfile.mkdtemp(prefix='naofumi_tests_')
+os.environ.setdefault('JOB_STORE_PATH', os.path.join(_state_dir, 'jobs.db'))
+os.environ.setdefault('WORKSPACE_ROOT', os.path.join(_state_dir, 'jobs'))
+os.environ.setdefault('MEDIA_CACHE_DIR', os.path.join(_state_dir, 'media_cache'))
+os.chdir(_state_dir)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import audio_stream
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Aralık isteklerine 206 ve bilinmeyen toplam boyutla (bytes a-b/*) cevap veren sunucu"""
+    body = b''
+    requests_seen = []
+
+    def do_GET(self):
+        start, end = self.headers['Range'].split('=', 1)[1].split('-')
+        start, end = int(start), int(end)
+        self.requests_seen.append((start, end))
+        if start >= len(self.body):
+            self.send_response(416)
+            self.send_header('Content-Range', 'bytes */*')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        chunk = self.body[start:end + 1]
+        self.send_response(206)
+        self.send_header('Content-Range', f'bytes {start}-{start + len(chunk) - 1}/*')
+        self.send_header('Content-Length', str(len(chunk)))
+        self.end_headers()
+        self.wfile.write(chunk)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(audio_stream, 'RANGE_CHUNK_SIZE', 1000)
+    RangeHandler.requests_seen = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}/audio'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def read_all(url, total=None):
+    with requests.Session() as session:
+        return b''.join(chunk for chunk, _ in audio_stream.iter_ranges(session, url, {}, total))
+
+
+def test_unknown_total_reads_until_short_range(server):
+    RangeHandler.body = bytes(range(256)) * 10   # 2560 bayt: 1000 + 1000 + 560
+    assert read_all(server) == RangeHandler.body
+    assert RangeHandler.requests_seen == [(0, 999), (1000, 1999), (2000, 2999)]
+
+
+def test_unknown_total_ending_on_range_boundary(server):
+    RangeHandler.body = b'x' * 2000
+    assert read_all(server) == RangeHandler.body
+    assert RangeHandler.requests_seen[-1] == (2000, 2999)
+
+
+def test_known_total_stops_without_extra_request(server):
+    RangeHandler.body = b'y' * 1500
+    assert read_all(server, total=1500) == RangeHandler.body
+    assert RangeHandler.requests_seen == [(0, 999), (1000, 1499)]
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from bandwidth_manager import BandwidthManager
+
+# 8 Mbps = 1 000 000 bayt/sn, 800 kbps = 100 000 bayt/sn
+TOTAL_MBPS = 8
+FLOOR_KBPS = 800
+
+
+def rates(manager):
+    return [flow.pacer.rate for flow in manager.flows.values()]
+
+
+def test_remaining_bandwidth_is_split_by_weight():
+    manager = BandwidthManager(TOTAL_MBPS, FLOOR_KBPS, 0)
+    manager.open('audio')     # ağırlık 3
+    manager.open('video')     # ağırlık 1
+    # Taban 100k + kalan 800k'nın 3/4'ü ve 1/4'ü
+    assert rates(manager) == pytest.approx([700_000, 300_000])
+
+
+def test_floor_is_shared_equally_when_flows_exceed_total():
+    manager = BandwidthManager(TOTAL_MBPS, 8000, 0)
+    manager.open('audio')
+    manager.open('video')
+    assert rates(manager) == pytest.approx([500_000, 500_000])
+
+
+def test_capped_flow_surplus_goes_to_others():
+    # Üst sınır 3.2 Mbps = 400 000 bayt/sn
+    manager = BandwidthManager(TOTAL_MBPS, FLOOR_KBPS, 3.2)
+    manager.open('audio')     # 3
+    manager.open('video')     # 1
+    manager.open('upload')    # 2
+    audio, video, upload = rates(manager)
+    assert audio == pytest.approx(400_000)
+    # Kalan 400k (taban üstü) video ve yükleme arasında 1:2
+    assert video == pytest.approx(100_000 + 400_000 / 3)
+    assert upload == pytest.approx(100_000 + 800_000 / 3)
+    assert audio + video + upload == pytest.approx(1_000_000)
+
+
+def test_all_flows_capped_leaves_bandwidth_unused():
+    manager = BandwidthManager(TOTAL_MBPS, FLOOR_KBPS, 2.4)
+    for kind in ('audio', 'video', 'upload'):
+        manager.open(kind)
+    assert rates(manager) == pytest.approx([300_000] * 3)
+
+
+def test_closing_a_flow_redistributes_its_share():
+    manager = BandwidthManager(TOTAL_MBPS, FLOOR_KBPS, 0)
+    audio = manager.open('audio')
+    manager.open('video')
+    manager.close(audio)
+    assert rates(manager) == pytest.approx([1_000_000])
+    # Zaten kapalı akış tekrar kapatılabilir
+    manager.close(audio)
+    manager.close(None)
+
+
+def test_unlimited_total_applies_only_the_cap():
+    manager = BandwidthManager(0, FLOOR_KBPS, 2.4)
+    manager.open('audio')
+    manager.open('video')
+    assert rates(manager) == [300_000, 300_000]
+
+    unlimited = BandwidthManager(0, FLOOR_KBPS, 0)
+    unlimited.open('video')
+    assert rates(unlimited) == [0]
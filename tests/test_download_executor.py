@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+
+import pytest
+
+import download_executor
+from download_executor import DownloadExecutor, JobTimeoutError
+
+
+def test_thread_mode_job_times_out_and_thread_stops(monkeypatch):
+    stopped = []
+
+    def slow_task(ydl_opts, url, download, info, stream_bitrate, progress_callback, pacer):
+        try:
+            for _ in range(50):
+                time.sleep(0.05)
+                progress_callback({'status': 'downloading'})
+        except JobTimeoutError:
+            stopped.append(True)
+            raise
+        return {}, 'never'
+
+    monkeypatch.setattr(download_executor, 'run_task', slow_task)
+    executor = DownloadExecutor(max_workers=1, mode='thread')
+    executor.job_timeout = 0.3
+
+    async def run():
+        with pytest.raises(JobTimeoutError):
+            await executor.extract_info({}, 'https://example.com/v')
+        # Thread sonraki ilerleme olayında durur ve havuz işçisi serbest kalır
+        for _ in range(20):
+            if not executor.active_jobs:
+                break
+            await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    executor.shutdown()
+    assert stopped
+    assert executor.stats['abandoned'] == 1
+    assert not executor.active_jobs
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+from fragment_controller import FragmentController, media_host
+
+
+def make_controller(budget):
+    controller = FragmentController()
+    controller.stats = {}
+    controller.budget = budget
+    controller.initial_level = 2
+    return controller
+
+
+def test_acquire_never_exceeds_budget():
+    async def scenario():
+        controller = make_controller(budget=3)
+        first = await controller.acquire('youtube')
+        second = await controller.acquire('youtube')
+        assert (first.level, second.level) == (2, 1)
+        assert controller.in_use == 3
+
+        # Bütçe dolu: üçüncü iş bekler
+        third = asyncio.create_task(controller.acquire('youtube'))
+        await asyncio.sleep(0.01)
+        assert not third.done()
+        assert controller.get_status()['waiting'] == 1
+
+        controller.release(second, True)
+        ticket = await asyncio.wait_for(third, 1)
+        assert ticket.level == 1
+        assert controller.in_use == 3
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_is_dropped():
+    async def scenario():
+        controller = make_controller(budget=1)
+        ticket = await controller.acquire('tiktok')
+        waiter = asyncio.create_task(controller.acquire('tiktok'))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert controller.waiters == []
+
+        controller.release(ticket, True)
+        assert controller.in_use == 0
+    asyncio.run(scenario())
+
+
+def test_media_host_groups_cdn_edge_servers():
+    assert media_host({'url': 'https://rr3---sn-abc123.googlevideo.com/videoplayback?id=1'}) == 'googlevideo.com'
+    assert media_host({'requested_formats': [
+        {'url': 'https://v16-webapp.tiktok.com/video/1'}, {'url': 'https://audio.example.com/a'}
+    ]}) == 'tiktok.com'
+    assert media_host({'url': 'https://video.twimg.com/ext_tw_video/1.m3u8'}) == 'video.twimg.com'
+    assert media_host({}) is None
+
+
+def test_release_updates_level_per_host():
+    async def scenario():
+        controller = make_controller(budget=8)
+        ticket = await controller.acquire('googlevideo.com')
+        ticket.observe({'status': 'downloading', 'downloaded_bytes': 1000, 'fragment_count': 10})
+        controller.release(ticket, True)
+        assert controller.stats['googlevideo.com']['level'] == 3
+        assert 'video.twimg.com' not in controller.stats
+    asyncio.run(scenario())
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+
+from job_scheduler import JobScheduler, QueueFullError
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Gate:
+    """Serbest bırakılana kadar bekleyen iş fabrikaları; başlama sırasını kaydeder"""
+    def __init__(self):
+        self.started = []
+        self.release = {}
+
+    def factory(self, name):
+        async def job():
+            self.started.append(name)
+            self.release[name] = asyncio.Event()
+            await self.release[name].wait()
+        return job
+
+    async def finish(self, name):
+        self.release[name].set()
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    async def drain(self, scheduler):
+        """Döngü kapanmadan tüm işleri bitir"""
+        while scheduler.active:
+            for event in self.release.values():
+                event.set()
+            await asyncio.sleep(0)
+
+
+def test_users_take_turns():
+    async def scenario():
+        scheduler = JobScheduler(max_active=1, per_user_limit=1, max_backlog=0)
+        gate = Gate()
+        for name in ('a1', 'a2', 'a3'):
+            scheduler.submit(1, gate.factory(name))
+        for name in ('b1', 'b2'):
+            scheduler.submit(2, gate.factory(name))
+        scheduler.submit(3, gate.factory('c1'))
+        await asyncio.sleep(0)
+
+        # a1 hemen başlar ve kullanıcı 1 sıranın sonuna geçer; sonra gelen kullanıcılar onun arkasına eklenir
+        assert [job.position for job in scheduler.queued_jobs()] == [1, 2, 3, 4, 5]
+        for name in ('a1', 'a2', 'b1', 'c1', 'a3', 'b2'):
+            assert gate.started[-1] == name
+            await gate.finish(name)
+        assert scheduler.stats['completed'] == 6
+
+    run(scenario())
+
+
+def test_per_user_limit_lets_other_users_run():
+    async def scenario():
+        scheduler = JobScheduler(max_active=3, per_user_limit=1, max_backlog=0)
+        gate = Gate()
+        scheduler.submit(1, gate.factory('a1'))
+        waiting = scheduler.submit(1, gate.factory('a2'))
+        scheduler.submit(2, gate.factory('b1'))
+        await asyncio.sleep(0)
+
+        assert sorted(gate.started) == ['a1', 'b1']
+        assert waiting.position == 1
+        assert scheduler.active == 2
+        await gate.finish('a1')
+        assert gate.started[-1] == 'a2'
+        await gate.drain(scheduler)
+
+    run(scenario())
+
+
+def test_queue_positions_follow_round_robin_order_and_notify():
+    async def scenario():
+        scheduler = JobScheduler(max_active=1, per_user_limit=1, max_backlog=0)
+        gate = Gate()
+        notified = {}
+
+        def on_position(name):
+            async def notify(position):
+                notified.setdefault(name, []).append(position)
+            return notify
+
+        scheduler.submit(9, gate.factory('running'))
+        jobs = {
+            name: scheduler.submit(user_id, gate.factory(name), on_position=on_position(name))
+            for user_id, name in ((1, 'a1'), (1, 'a2'), (2, 'b1'))
+        }
+        # Tahmini sıra: a1, b1 (kullanıcı 2'nin ilk işi), a2; yeni eklenen iş bildirilmez, itilen a2 bildirilir
+        assert [jobs[name].position for name in ('a1', 'b1', 'a2')] == [1, 2, 3]
+        await asyncio.sleep(0)
+        assert notified == {'a2': [3]}
+
+        await gate.finish('running')
+        assert jobs['a1'].position == 0
+        assert (jobs['b1'].position, jobs['a2'].position) == (1, 2)
+        assert notified == {'a2': [3, 2], 'b1': [1]}
+        assert not scheduler._notify_tasks
+        await gate.drain(scheduler)
+
+    run(scenario())
+
+
+def test_admin_jobs_jump_the_queue():
+    async def scenario():
+        scheduler = JobScheduler(max_active=1, per_user_limit=1, max_backlog=0)
+        gate = Gate()
+        scheduler.submit(1, gate.factory('a1'))
+        scheduler.submit(2, gate.factory('b1'))
+        admin = scheduler.submit(3, gate.factory('admin'), is_admin=True)
+        assert admin.position == 1
+        await asyncio.sleep(0)
+        await gate.finish('a1')
+        assert gate.started[-1] == 'admin'
+        await gate.drain(scheduler)
+
+    run(scenario())
+
+
+def test_backlog_limit_rejects_with_retry_after():
+    async def scenario():
+        scheduler = JobScheduler(max_active=1, per_user_limit=1, max_backlog=1)
+        gate = Gate()
+        scheduler.submit(1, gate.factory('a1'))
+        scheduler.submit(2, gate.factory('b1'))
+        with pytest.raises(QueueFullError) as error:
+            scheduler.submit(3, gate.factory('c1'))
+        assert error.value.retry_after > 0
+        # Adminler eşikten etkilenmez
+        scheduler.submit(4, gate.factory('admin'), is_admin=True)
+        assert scheduler.stats['rejected'] == 1
+        await asyncio.sleep(0)
+        await gate.drain(scheduler)
+
+    run(scenario())
+
+
+def test_job_error_reaches_awaiter_and_frees_slot():
+    async def scenario():
+        scheduler = JobScheduler(max_active=1, per_user_limit=1, max_backlog=0)
+
+        async def fail():
+            raise ValueError('boom')
+
+        async def succeed():
+            return None
+
+        failing = scheduler.submit(1, fail)
+        following = scheduler.submit(1, succeed)
+        with pytest.raises(ValueError, match='boom'):
+            await failing
+        await following
+        assert scheduler.stats['failed'] == 1 and scheduler.stats['completed'] == 1
+        assert scheduler.active == 0 and not scheduler.active_per_user
+
+    run(scenario())
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import job_store as job_store_module
+from job_store import JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(path=str(tmp_path / 'jobs.db'))
+
+
+def test_create_deduplicates_unfinished_jobs(store):
+    job_id, created = store.create('fast_download', 1, 10, 100, ['https://youtu.be/x'])
+    assert created
+    assert store.create('fast_download', 1, 10, 100, ['https://youtu.be/x']) == (job_id, False)
+
+    # Biten iş aynı istekle yeniden kuyruğa alınır
+    store.finish(job_id)
+    assert store.create('fast_download', 1, 10, 100, ['https://youtu.be/x']) == (job_id, True)
+    assert store.get(job_id)['state'] == 'queued'
+
+
+def test_finish_records_done_and_failed(store):
+    done_id, _ = store.create('download_video', 1, 10, 100, ['u', 'mp3', None])
+    failed_id, _ = store.create('download_video', 1, 10, 101, ['u', 'mp4', None])
+
+    store.observe(done_id, {'status': 'postprocessing'})
+    assert store.get(done_id)['state'] == 'transcoding'
+
+    store.finish(done_id)
+    store.finish(failed_id, error='boom')
+    assert store.get(done_id)['state'] == 'done'
+    assert store.get(failed_id)['state'] == 'failed'
+    assert store.get(failed_id)['error'] == 'boom'
+    assert store.unfinished() == []
+
+
+def test_unfinished_jobs_keep_workspace_and_resume(store):
+    job_id, _ = store.create('artist_search', 2, 20, 200, ['artist'])
+    store.set_state(job_id, 'downloading')
+    store.set_workspace(job_id, '/tmp/jobs/artist_search_x')
+
+    # Yeniden başlatma: yeni bağlantı aynı kaydı görür
+    reopened = JobStore(path=store.path)
+    assert [job['id'] for job in reopened.unfinished()] == [job_id]
+    assert reopened.workspaces() == ['/tmp/jobs/artist_search_x']
+
+    assert reopened.resume(job_id)
+    job = reopened.get(job_id)
+    assert (job['state'], job['attempts'], job['args']) == ('queued', 1, ['artist'])
+
+
+def test_resume_gives_up_after_max_attempts(store, monkeypatch):
+    monkeypatch.setattr(job_store_module, 'JOB_MAX_RESUMES', 2)
+    job_id, _ = store.create('fast_download', 3, 30, 300, ['u'])
+    assert store.resume(job_id)
+    assert store.resume(job_id)
+    assert not store.resume(job_id)
+    assert store.get(job_id)['state'] == 'failed'
+    assert not store.resume(job_id)
+
+
+def test_attach_sets_current_job(store):
+    assert store.current() is None
+    token = store.attach(42)
+    assert store.current() == 42
+    store.detach(token)
+    assert store.current() is None
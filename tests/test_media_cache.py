@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from media_cache import MediaCache, canonical_media_id
+from workspace import Workspace
+
+
+def make_file(directory, name, size):
+    path = os.path.join(str(directory), name)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    return path
+
+
+def make_cache(tmp_path):
+    cache = MediaCache(cache_dir=str(tmp_path / 'cache'), max_mb=10)
+    for index, name in enumerate(('a', 'b', 'c')):
+        cache.put(f'youtube:{name}:mp3:192', make_file(tmp_path, f'{name}.mp3', 1000), {'title': name})
+        cache.index[f'youtube:{name}:mp3:192']['last_access'] = 100 + index
+    return cache
+
+
+def test_shrink_evicts_least_recently_used_first(tmp_path):
+    cache = make_cache(tmp_path)
+    # 'a' en eski girdi; erişildiği için en yeni olur
+    assert cache.get('youtube:a:mp3:192')
+
+    freed = cache.shrink(1500)
+    assert freed == 2000
+    assert list(cache.index) == ['youtube:a:mp3:192']
+    assert cache.stats['evictions'] == 2
+
+
+def test_shrink_stops_once_enough_is_freed(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.shrink(1) == 1000
+    assert 'youtube:a:mp3:192' not in cache.index
+    assert cache.total_bytes() == 2000
+
+
+def test_adopted_hit_survives_eviction(tmp_path):
+    cache = make_cache(tmp_path)
+    workspace = Workspace(str(tmp_path / 'job'))
+    os.makedirs(workspace.path)
+
+    cached = cache.get('youtube:b:mp3:192', adopt=workspace.adopt)
+    assert workspace.contains(cached['path'])
+
+    cache.shrink(cache.total_bytes())
+    assert not cache.index
+    assert os.path.getsize(cached['path']) == 1000
+
+
+@pytest.mark.parametrize('url', [
+    'https://youtu.be/dQw4w9WgXcQ',
+    'https://youtu.be/dQw4w9WgXcQ?si=abc&t=42',
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://m.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123&index=2',
+    'youtube.com/watch?feature=share&v=dQw4w9WgXcQ',
+    'https://www.youtube.com/shorts/dQw4w9WgXcQ',
+    'https://www.youtube.com/embed/dQw4w9WgXcQ?start=10',
+    'https://www.youtube.com/live/dQw4w9WgXcQ?feature=share',
+    'https://music.youtube.com/watch?v=dQw4w9WgXcQ&si=xyz',
+])
+def test_youtube_links_share_one_key(tmp_path, url):
+    cache = MediaCache(cache_dir=str(tmp_path / 'cache'), max_mb=10)
+    assert canonical_media_id(url) == ('youtube', 'dQw4w9WgXcQ')
+    assert cache.make_key(url, 'mp3', '192') == 'youtube:dQw4w9WgXcQ:mp3:192'
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://www.tiktok.com/@someone/video/7234567890123456789?lang=tr', ('tiktok', '7234567890123456789')),
+    ('https://m.tiktok.com/@someone/video/7234567890123456789', ('tiktok', '7234567890123456789')),
+    ('https://twitter.com/someone/status/1712345678901234567', ('twitter', '1712345678901234567')),
+    ('https://x.com/someone/status/1712345678901234567/photo/1', ('twitter', '1712345678901234567')),
+    ('https://mobile.twitter.com/someone/status/1712345678901234567?s=20', ('twitter', '1712345678901234567')),
+])
+def test_tiktok_and_twitter_ids(url, expected):
+    assert canonical_media_id(url) == expected
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.youtube.com/watch?v=short',
+    'https://www.youtube.com/@channel',
+    'https://www.tiktok.com/@someone',
+    'https://example.com/video/123',
+])
+def test_unrecognized_links_have_no_key(url):
+    assert canonical_media_id(url) is None
+
+
+def test_hit_keeps_fields_used_when_sending(tmp_path):
+    cache = MediaCache(cache_dir=str(tmp_path / 'cache'), max_mb=10)
+    info = {
+        'id': 'dQw4w9WgXcQ', 'title': 't', 'duration': 212, 'width': 1280, 'height': 720,
+        'artist': 'a', 'track': 'tr', 'uploader': 'u', 'channel': 'c', 'formats': [{}]
+    }
+    cache.put('youtube:dQw4w9WgXcQ:mp4:720', make_file(tmp_path, 'v.mp4', 10), info)
+
+    cached = cache.get('youtube:dQw4w9WgXcQ:mp4:720')['info']
+    assert (cached['width'], cached['height'], cached['artist'], cached['track']) == (1280, 720, 'a', 'tr')
+    assert (cached['uploader'], cached['channel']) == ('u', 'c')
+    assert 'formats' not in cached
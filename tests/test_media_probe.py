@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from config import ERROR_MESSAGES
+from media_probe import AdmissionError, admit, audio_format, estimate, video_format
+
+MB = 1024 * 1024
+
+
+def video_info(duration=600):
+    """1080p seçilmiş, ayrı ses formatlı YouTube benzeri metadata (boyutlar tbr × süreden)"""
+    formats = [
+        {'format_id': '137', 'vcodec': 'avc1', 'acodec': 'none', 'height': 1080, 'tbr': 4000},
+        {'format_id': '136', 'vcodec': 'avc1', 'acodec': 'none', 'height': 720, 'tbr': 2000},
+        {'format_id': '135', 'vcodec': 'avc1', 'acodec': 'none', 'height': 480, 'tbr': 1000},
+        {'format_id': '140', 'vcodec': 'none', 'acodec': 'mp4a', 'abr': 128},
+    ]
+    return {
+        'duration': duration,
+        'height': 1080,
+        'formats': formats,
+        'requested_formats': [formats[0], formats[3]],
+    }
+
+
+def test_estimate_sums_selected_formats():
+    duration, size = estimate(video_info(), {'format': video_format()})
+    assert duration == 600
+    assert size == pytest.approx((4000 + 128) * 1000 / 8 * 600)
+
+
+def test_estimate_mp3_uses_target_bitrate():
+    info = {'duration': 300, 'filesize': 50 * MB}
+    assert estimate(info, audio_format('mp3', 128)) == (300, 128 * 1000 / 8 * 300)
+
+
+def test_estimate_unknown_size():
+    info = {'duration': 300, 'formats': [], 'requested_formats': [{'vcodec': 'avc1'}]}
+    assert estimate(info, {'format': video_format()}) == (300, None)
+
+
+def test_fitting_job_is_admitted_unchanged():
+    opts = {'format': video_format()}
+    assert admit(video_info(), opts, max_duration=3600, max_size=1000 * MB) is opts
+
+
+def test_oversized_video_downgrades_to_largest_fitting_height():
+    # 1080p ≈ 309MB, 720p ≈ 159MB, 480p ≈ 84MB
+    opts = admit(video_info(), {'format': video_format()}, max_duration=3600, max_size=200 * MB)
+    assert opts['format'] == video_format(720)
+
+    opts = admit(video_info(), {'format': video_format()}, max_duration=3600, max_size=100 * MB)
+    assert opts['format'] == video_format(480)
+
+
+def test_rejected_when_no_height_fits():
+    with pytest.raises(AdmissionError, match=ERROR_MESSAGES['file_too_large']):
+        admit(video_info(), {'format': video_format()}, max_duration=3600, max_size=50 * MB)
+
+
+def test_audio_is_never_downgraded():
+    info = {'duration': 600, 'filesize': 500 * MB}
+    with pytest.raises(AdmissionError, match=ERROR_MESSAGES['file_too_large']):
+        admit(info, audio_format('native'), max_duration=3600, max_size=100 * MB)
+
+
+def test_too_long_is_rejected_before_size_check():
+    with pytest.raises(AdmissionError, match=ERROR_MESSAGES['video_too_long']):
+        admit(video_info(duration=7200), {'format': video_format()}, max_duration=3600, max_size=10 * 1024 * MB)
+
+
+@pytest.mark.parametrize('live', [{'is_live': True}, {'live_status': 'is_upcoming'}])
+def test_live_streams_are_rejected(live):
+    with pytest.raises(AdmissionError):
+        admit({**video_info(), **live}, {'format': video_format()})
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import types
+
+import pytest
+
+import rate_limiter as rate_limiter_module
+from rate_limiter import RateLimiter
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter_module, 'time', types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+def write_settings(path, mtime, **settings):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(settings, f)
+    os.utime(path, (mtime, mtime))
+
+
+def make_limiter(tmp_path, **settings):
+    path = str(tmp_path / 'bot_settings.json')
+    write_settings(path, 1, **settings)
+    return RateLimiter(settings_file=path), path
+
+
+def test_bucket_empties_then_refills_per_minute(tmp_path, clock):
+    limiter, _ = make_limiter(tmp_path, rate_limit_per_minute=6, chat_rate_limit_per_minute=0)
+
+    assert [limiter.check(1, 1)[0] for _ in range(6)] == [True] * 6
+    # Boş kova: ilk ret uyarılır, sonrakiler sessiz
+    assert limiter.check(1, 1) == (False, True)
+    assert limiter.check(1, 1) == (False, False)
+
+    # 6/dk = 10 saniyede bir token
+    clock.now += 9
+    assert limiter.check(1, 1)[0] is False
+    clock.now += 1
+    assert limiter.check(1, 1) == (True, False)
+    # Bekleme kapasiteden fazla token biriktirmez
+    clock.now += 600
+    assert [limiter.check(1, 1)[0] for _ in range(7)] == [True] * 6 + [False]
+
+
+def test_chat_bucket_is_shared_by_users(tmp_path, clock):
+    limiter, _ = make_limiter(tmp_path, rate_limit_per_minute=10, chat_rate_limit_per_minute=3)
+
+    assert [limiter.check(user_id, -100)[0] for user_id in (1, 2, 3)] == [True] * 3
+    assert limiter.check(4, -100) == (False, True)
+    # Özel sohbette (chat_id == user_id) sohbet kovası yok
+    assert limiter.check(4, 4) == (True, False)
+
+
+def test_settings_hot_reload(tmp_path, clock):
+    limiter, path = make_limiter(tmp_path, rate_limit_per_minute=2)
+    assert (limiter.user_rate, limiter.chat_rate) == (2, 6)
+
+    write_settings(path, 2, rate_limit_per_minute=20, chat_rate_limit_per_minute=50)
+    # Dosya en fazla reload_interval'da bir kontrol edilir
+    limiter.check(1, 1)
+    assert limiter.user_rate == 2
+    clock.now += limiter.reload_interval
+    limiter.check(1, 1)
+    assert (limiter.user_rate, limiter.chat_rate) == (20, 50)
+
+    # Bozuk dosya son geçerli limitleri değiştirmez
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{bozuk')
+    os.utime(path, (3, 3))
+    clock.now += limiter.reload_interval
+    limiter.check(1, 1)
+    assert (limiter.user_rate, limiter.chat_rate) == (20, 50)
+
+
+def test_idle_buckets_are_evicted(tmp_path, clock):
+    limiter, _ = make_limiter(tmp_path, rate_limit_per_minute=5)
+    limiter.check(1, 1)
+    clock.now += 30
+    limiter.check(2, 2)
+    assert list(limiter.buckets) == [('user', 1), ('user', 2)]
+
+    clock.now += 31
+    limiter.check(3, 3)
+    assert list(limiter.buckets) == [('user', 2), ('user', 3)]
+    assert limiter.stats['evicted'] == 1
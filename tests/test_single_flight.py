@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_requests_share_one_run():
+    async def scenario():
+        flights = SingleFlight(progress_interval=0.01)
+        calls = []
+        release = asyncio.Event()
+
+        async def work(progress_callback):
+            calls.append(1)
+            await release.wait()
+            return 'file.mp3'
+
+        waiters = [asyncio.create_task(flights.run('youtube:x:mp3:192', work)) for _ in range(3)]
+        await asyncio.sleep(0.02)
+        assert flights.get_status()['subscribers'] == 3
+        release.set()
+
+        assert await asyncio.gather(*waiters) == ['file.mp3'] * 3
+        assert calls == [1]
+        assert flights.stats == {'started': 1, 'coalesced': 2}
+        assert not flights.flights
+
+        # Bitmiş iş tekrar gelirse yeniden çalışır
+        assert await flights.run('youtube:x:mp3:192', work) == 'file.mp3'
+        assert calls == [1, 1]
+
+    asyncio.run(scenario())
+
+
+def test_error_reaches_every_subscriber():
+    async def scenario():
+        flights = SingleFlight(progress_interval=0.01)
+        release = asyncio.Event()
+
+        async def work(progress_callback):
+            await release.wait()
+            raise RuntimeError('indirme başarısız')
+
+        waiters = [asyncio.create_task(flights.run('k', work)) for _ in range(2)]
+        await asyncio.sleep(0.02)
+        release.set()
+
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+        assert all(str(result) == 'indirme başarısız' for result in results)
+        assert not flights.flights
+
+    asyncio.run(scenario())
+
+
+def test_subscriber_cancel_keeps_shared_work_running():
+    async def scenario():
+        flights = SingleFlight(progress_interval=0.01)
+        release = asyncio.Event()
+
+        async def work(progress_callback):
+            await release.wait()
+            return 'done'
+
+        first = asyncio.create_task(flights.run('k', work))
+        second = asyncio.create_task(flights.run('k', work))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        release.set()
+        assert await second == 'done'
+
+    asyncio.run(scenario())
+
+
+def test_progress_is_forwarded_to_each_subscriber():
+    async def scenario():
+        flights = SingleFlight(progress_interval=0.01)
+        release = asyncio.Event()
+        seen = {'a': [], 'b': []}
+
+        async def work(progress_callback):
+            progress_callback({'status': 'downloading', 'downloaded_bytes': 10})
+            await release.wait()
+            return 'done'
+
+        def on_progress(name):
+            async def show(event):
+                seen[name].append(event['downloaded_bytes'])
+            return show
+
+        waiters = [asyncio.create_task(flights.run('k', work, on_progress(name))) for name in seen]
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.gather(*waiters)
+        assert seen == {'a': [10], 'b': [10]}
+
+    asyncio.run(scenario())
+
+
+def test_make_key_uses_canonical_media_id():
+    flights = SingleFlight()
+    assert flights.make_key('https://youtu.be/dQw4w9WgXcQ', 'mp3', '192') == \
+        flights.make_key('https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=5', 'mp3', '192')
+    assert flights.make_key('https://example.com/a ', 'mp4') == 'https://example.com/a:mp4:default'
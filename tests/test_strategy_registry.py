@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import json
+import time
+
+import pytest
+
+from strategy_registry import StrategyRegistry, STRATEGY_PROFILES
+
+DEFAULT_ORDER = [profile['name'] for profile in STRATEGY_PROFILES]
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    # İstatistik dosyası çalışma klasörüne yazılır; her test boş kayıtla başlar
+    monkeypatch.chdir(tmp_path)
+    return StrategyRegistry()
+
+
+def names(profiles):
+    return [profile['name'] for profile in profiles]
+
+
+def test_untried_platform_keeps_default_order(registry):
+    assert names(registry.ordered('youtube')) == DEFAULT_ORDER
+    assert names(registry.ordered(None)) == DEFAULT_ORDER
+
+
+def test_fast_successful_strategy_moves_first_per_platform(registry):
+    now = time.time()
+    registry._update('youtube', 'minimal', True, 5.0, now)
+    registry._update('youtube', 'android_music', False, 30.0, now)
+
+    order = names(registry.ordered('youtube'))
+    assert order[0] == 'minimal'
+    assert order[-1] == 'android_music'
+    # Diğer platformlar etkilenmez
+    assert names(registry.ordered('tiktok')) == DEFAULT_ORDER
+
+
+def test_scores_decay_back_to_prior_with_half_life(registry):
+    now = time.time()
+    for _ in range(5):
+        registry._update('youtube', 'ios', False, 120.0, now - registry.half_life)
+
+    entry = registry.stats['youtube']['ios']
+    decayed = registry._decayed(entry, now)
+    # Bir yarı ömür sonra önsel değere olan uzaklık yarıya iner
+    assert decayed['success'] - registry.prior_success == pytest.approx((entry['success'] - registry.prior_success) / 2)
+    assert decayed['latency'] - registry.prior_latency == pytest.approx((entry['latency'] - registry.prior_latency) / 2)
+
+    # Çok eski kötü sonuçlar sıralamayı artık etkilemez
+    far_future = registry._decayed(entry, now + 20 * registry.half_life)
+    assert far_future['success'] == pytest.approx(registry.prior_success, abs=1e-4)
+    assert far_future['latency'] == pytest.approx(registry.prior_latency, abs=1e-3)
+
+
+def test_update_starts_from_decayed_score(registry):
+    now = time.time()
+    registry._update('youtube', 'firefox', False, 100.0, now - 10 * registry.half_life)
+    registry._update('youtube', 'firefox', True, 10.0, now)
+
+    entry = registry.stats['youtube']['firefox']
+    alpha = registry.alpha
+    assert entry['success'] == pytest.approx((1 - alpha) * registry.prior_success + alpha, abs=1e-3)
+    assert (entry['attempts'], entry['failures'], entry['updated']) == (2, 1, now)
+
+
+def test_record_is_persisted_on_flush(registry):
+    registry.record('youtube', 'googlebot', True, 12.0)
+    registry.flush()
+
+    with open(registry.stats_file, encoding='utf-8') as f:
+        saved = json.load(f)
+    assert saved['youtube']['googlebot']['attempts'] == 1
+    assert StrategyRegistry().stats == saved
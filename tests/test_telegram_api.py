@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+from pyrogram.errors import FloodWait
+from pyrogram.raw import functions, types
+
+from config import TELEGRAM_MAX_FLOOD_WAIT
+from telegram_api import GLOBAL, TelegramAPI, chat_key, flood_key, query_chat
+
+
+def send_message(peer):
+    return functions.messages.SendMessage(peer=peer, message='x', random_id=1)
+
+
+@pytest.mark.parametrize('chat_id, expected', [
+    (123456789, ('user', 123456789)),
+    (-1001234567890, ('group', 1234567890)),     # süper grup / kanal: -100 öneki atılır
+    (-123456, ('group', 123456)),                # eski tip grup
+])
+def test_chat_key_matches_raw_peer(chat_id, expected):
+    assert chat_key(chat_id) == expected
+
+
+@pytest.mark.parametrize('peer, chat_id', [
+    (types.InputPeerUser(user_id=123456789, access_hash=1), 123456789),
+    (types.InputPeerChannel(channel_id=1234567890, access_hash=1), -1001234567890),
+    (types.InputPeerChat(chat_id=123456), -123456),
+])
+def test_query_chat_and_chat_key_agree(peer, chat_id):
+    query = send_message(peer)
+    assert query_chat(query) == chat_key(chat_id)
+    assert flood_key(query, query_chat(query)) == chat_key(chat_id)
+
+
+def test_flood_key_without_chat():
+    auth = functions.auth.ImportBotAuthorization(flags=0, api_id=1, api_hash='h', bot_auth_token='t')
+    assert flood_key(auth, None) == GLOBAL
+    assert flood_key(functions.updates.GetState(), None) == ('method', 'GetState')
+
+
+def test_flood_wait_blocks_only_its_chat():
+    api = TelegramAPI()
+
+    async def flood(query):
+        raise FloodWait(value=TELEGRAM_MAX_FLOOD_WAIT + 1)
+
+    query = send_message(types.InputPeerChannel(channel_id=1234567890, access_hash=1))
+    with pytest.raises(FloodWait):
+        asyncio.run(api.call(query, flood))
+
+    assert list(api.blocked_until) == [('group', 1234567890)]
+    assert not api.ready(-1001234567890)
+    assert api.ready(-1009999999999)
+    assert api.ready(123456789)
+    assert api.stats['flood_failures'] == 1
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import storage_manager
+from job_store import job_store
+from workspace import WorkspaceManager, workspaces
+
+
+def make_dir(root, name):
+    path = os.path.join(str(root), name)
+    os.makedirs(path)
+    with open(os.path.join(path, 'video.part'), 'wb') as f:
+        f.write(b'\0' * 100)
+    return path
+
+
+def test_cleanup_stale_keeps_active_and_listed_workspaces(tmp_path):
+    manager = WorkspaceManager(root=str(tmp_path))
+    active = manager.create('active')
+    resumed = make_dir(tmp_path, 'resumed')
+    stale = make_dir(tmp_path, 'stale')
+
+    # keep göreli/farklı yazılmış yolları da eşleştirir
+    manager.cleanup_stale(keep=[os.path.relpath(resumed)])
+
+    assert os.path.isdir(active.path)
+    assert os.path.isdir(resumed)
+    assert not os.path.exists(stale)
+
+
+def test_create_reattaches_persisted_workspace(tmp_path):
+    manager = WorkspaceManager(root=str(tmp_path))
+    job_id, _ = job_store.create('fast_download', 1, 10, 500, ['https://youtu.be/w'])
+
+    token = job_store.attach(job_id)
+    try:
+        first = manager.create('fast_download')
+        manager.active.clear()     # Yeniden başlatma
+        second = manager.create('fast_download')
+    finally:
+        job_store.detach(token)
+    assert second.path == first.path
+    assert manager.stats['resumed'] == 1
+
+    manager.remove_job(job_id)
+    job_store.finish(job_id)
+    assert not os.path.exists(first.path)
+
+
+def test_storage_clean_keeps_persisted_job_workspaces(monkeypatch):
+    monkeypatch.setattr(storage_manager, 'LEGACY_TEMP_DIRS', [])
+    job_id, _ = job_store.create('download_video', 1, 10, 600, ['u', 'mp4', None])
+    resumed = make_dir(workspaces.root, 'download_resumed')
+    job_store.set_workspace(job_id, resumed)
+    stale = make_dir(workspaces.root, 'download_stale')
+
+    try:
+        freed = storage_manager.storage_manager.clean()
+        assert os.path.isdir(resumed)
+        assert not os.path.exists(stale)
+        assert freed >= 100
+    finally:
+        job_store.finish(job_id)
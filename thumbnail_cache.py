@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+🖼️ Naofumi Bot Thumbnail Önbelleği
+Thumbnail'ı medya indirilirken arka planda çeker, Pillow ile Telegram sınırına (320px JPEG)
+küçültür ve video id'sine göre boyut sınırlı LRU önbellekte tutar
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import threading
+import logging
+from typing import Dict, Optional
+
+import requests
+from PIL import Image
+
+from config import THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+# Telegram thumbnail sınırları: en fazla 320x320 JPEG, 200 KB
+THUMB_MAX_SIDE = 320
+THUMB_MAX_BYTES = 200 * 1024
+
+
+def thumbnail_key(info: Dict) -> Optional[str]:
+    """Önbellek anahtarı: video id, yoksa thumbnail URL'si"""
+    if not info.get('thumbnail'):
+        return None
+    if info.get('id'):
+        return f"{info.get('extractor_key') or info.get('ie_key') or 'media'}:{info['id']}".lower()
+    return info['thumbnail']
+
+
+def make_thumbnail(data: bytes) -> bytes:
+    """Görseli 320px JPEG'e küçült, 200 KB altına inene kadar kaliteyi düşür"""
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert('RGB')
+        image.thumbnail((THUMB_MAX_SIDE, THUMB_MAX_SIDE))
+        for quality in (85, 75, 60, 45):
+            output = io.BytesIO()
+            image.save(output, 'JPEG', quality=quality, optimize=True)
+            if output.tell() <= THUMB_MAX_BYTES:
+                break
+    return output.getvalue()
+
+
+class ThumbnailCache:
+    def __init__(self, cache_dir: str = THUMBNAIL_CACHE_DIR, max_mb: int = THUMBNAIL_CACHE_MAX_MB):
+        """Thumbnail önbelleğini başlat"""
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb * 1024 * 1024
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Devam eden çekme işleri: {key: asyncio.Task}
+        self.pending: Dict[str, asyncio.Task] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'failed': 0, 'evictions': 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest()[:16] + '.jpg')
+
+    def _fetch(self, url: str, path: str) -> str:
+        """Thumbnail'ı indir, küçült ve önbelleğe yaz (thread içinde çalışır)"""
+        response = requests.get(url, timeout=15)
+        response.raise_for_status()
+        thumb = make_thumbnail(response.content)
+
+        temp_path = path + '.part'
+        with open(temp_path, 'wb') as f:
+            f.write(thumb)
+        os.replace(temp_path, path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        """Boyut sınırı aşılırsa en uzun süredir kullanılmayan thumbnail'ları sil"""
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.jpg'):
+                    path = os.path.join(self.cache_dir, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+                self.stats['evictions'] += 1
+
+    def prefetch(self, info: Dict):
+        """Thumbnail'ı arka planda çekmeye başla (medya indirmesiyle aynı anda)"""
+        key = thumbnail_key(info)
+        if not key or key in self.pending or os.path.exists(self._path(key)):
+            return
+        task = asyncio.create_task(asyncio.to_thread(self._fetch, info['thumbnail'], self._path(key)))
+        task.add_done_callback(lambda _: self._finish(key, task))
+        self.pending[key] = task
+
+    def _finish(self, key: str, task: asyncio.Task):
+        """Biten çekme işini listeden çıkar (bekleyen olmasa da hata 'alınmamış' kalmasın)"""
+        self.pending.pop(key, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def get(self, info: Dict) -> Optional[str]:
+        """Küçültülmüş thumbnail yolunu döndür; önbellekte yoksa çek (hata olursa None)"""
+        key = thumbnail_key(info)
+        if not key:
+            return None
+
+        path = self._path(key)
+        if key not in self.pending and os.path.exists(path):
+            self.stats['hits'] += 1
+            os.utime(path)       # LRU için son erişim
+            return path
+
+        self.stats['misses'] += 1
+        self.prefetch(info)
+        try:
+            await asyncio.shield(self.pending[key])
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.warning(f"Thumbnail alınamadı ({key}): {e}")
+            return None
+        return path if os.path.exists(path) else None
+
+    def get_status(self) -> Dict:
+        """Önbellek durumunu döndür"""
+        with self.lock:
+            names = [name for name in os.listdir(self.cache_dir) if name.endswith('.jpg')]
+            size = sum(os.path.getsize(os.path.join(self.cache_dir, name)) for name in names)
+        return {
+            'entries': len(names),
+            'size_mb': round(size / (1024 * 1024), 2),
+            'max_mb': round(self.max_bytes / (1024 * 1024)),
+            'pending': len(self.pending),
+            **self.stats
+        }
+
+
+# Global instance
+thumbnail_cache = ThumbnailCache()
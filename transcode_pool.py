@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+🎛️ Naofumi Bot Dönüştürme Havuzu
+ffmpeg işlerini indirmelerden ayrı, CPU bütçesiyle sınırlı bir aşamada çalıştırır;
+çocuk ffmpeg süreçleri düşük öncelikli (nice) ve kaynak limitli başlatılır
+"""
+
+import asyncio
+import os
+import shutil
+import subprocess
+import time
+import logging
+from typing import Callable, Dict, List, Optional
+
+from config import (
+    TRANSCODE_CPU_BUDGET, TRANSCODE_THREADS, TRANSCODE_NICE,
+    TRANSCODE_MAX_CPU_SECONDS, TRANSCODE_MAX_MEMORY_MB, DOWNLOAD_JOB_TIMEOUT
+)
+from download_executor import JobMemoryError
+from load_control import load_control
+from process_limits import group_rss, kill_group
+
+logger = logging.getLogger(__name__)
+
+# Hedef codec için tercih sırasına göre ffmpeg kodlayıcıları
+ENCODER_PREFERENCES = {
+    'mp3': ['libmp3lame', 'libshine', 'mp3_mf'],
+    'aac': ['libfdk_aac', 'aac'],
+    'opus': ['libopus', 'opus']
+}
+
+
+def spawn_ffmpeg(args: List[str], **kwargs) -> subprocess.Popen:
+    """
+    ffmpeg'i ayrı süreç grubunda ve düşük öncelikle (nice -n) başlat.
+    CPU süresi limiti başlatıldıktan sonra prlimit ile uygulanır; preexec_fn thread'li süreçte güvenli değildir.
+    """
+    command = ['ffmpeg', *args]
+    if TRANSCODE_NICE and shutil.which('nice'):
+        command = ['nice', '-n', str(TRANSCODE_NICE), *command]
+    process = subprocess.Popen(command, start_new_session=os.name == 'posix', **kwargs)
+
+    if TRANSCODE_MAX_CPU_SECONDS > 0:
+        try:
+            import resource
+            resource.prlimit(
+                process.pid, resource.RLIMIT_CPU,
+                (TRANSCODE_MAX_CPU_SECONDS, TRANSCODE_MAX_CPU_SECONDS + 5)
+            )
+        except (ImportError, AttributeError, OSError):
+            pass
+    return process
+
+
+def check_memory(process: subprocess.Popen):
+    """ffmpeg süreç grubunun gerçek belleği (RSS) sınırı aştıysa grubu öldür (psutil yoksa ölçülmez)"""
+    if TRANSCODE_MAX_MEMORY_MB > 0 and group_rss(process.pid) > TRANSCODE_MAX_MEMORY_MB * 1024 * 1024:
+        kill_group(process)
+        process.wait()
+        raise JobMemoryError(f"ffmpeg {TRANSCODE_MAX_MEMORY_MB}MB bellek sınırını aştı ve sonlandırıldı")
+
+
+def wait_ffmpeg(process: subprocess.Popen, timeout: Optional[float] = None):
+    """
+    ffmpeg'in bitmesini bekle; bellek saniyede bir ölçülür, süre aşılırsa süreç grubu öldürülür.
+    Çıkış kodu sıfır değilse stderr'in sonuyla RuntimeError fırlatılır.
+    """
+    deadline = time.time() + timeout if timeout else None
+    while True:
+        try:
+            process.wait(timeout=1.0)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        check_memory(process)
+        if deadline and time.time() > deadline:
+            kill_group(process)
+            process.wait()
+            raise subprocess.TimeoutExpired(process.args, timeout)
+
+    if process.returncode != 0:
+        stderr = process.stderr.read() if process.stderr else b''
+        raise RuntimeError(f"ffmpeg hatası: {stderr.decode(errors='replace').strip()[-300:]}")
+
+
+class TranscodePool:
+    def __init__(self):
+        """Dönüştürme havuzunu başlat"""
+        self.cpu_budget = max(1, TRANSCODE_CPU_BUDGET)
+        self.threads = max(1, min(TRANSCODE_THREADS, self.cpu_budget))
+        self.encoders: Optional[List[str]] = None
+        self.stats = {'completed': 0, 'failed': 0, 'total_seconds': 0.0}
+
+    def detect_encoders(self) -> List[str]:
+        """ffmpeg'in desteklediği kodlayıcıları bir kez tespit et"""
+        if self.encoders is not None:
+            return self.encoders
+
+        self.encoders = []
+        try:
+            result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'], capture_output=True, text=True, timeout=15)
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return self.encoders
+
+        # Satır biçimi: " A....D libmp3lame           libmp3lame MP3 (MPEG audio layer 3)"
+        for line in result.stdout.splitlines():
+            parts = line.split()
+            if len(parts) >= 2 and len(parts[0]) == 6 and parts[0][0] in 'VAS' and parts[1] != '=':
+                self.encoders.append(parts[1])
+        return self.encoders
+
+    def encoder(self, codec: str) -> str:
+        """Codec için kullanılabilir en iyi kodlayıcı"""
+        available = self.detect_encoders()
+        for name in ENCODER_PREFERENCES.get(codec, [codec]):
+            if name in available:
+                return name
+        raise RuntimeError(f"ffmpeg'de {codec} kodlayıcısı yok")
+
+    def ffmpeg_args(self, codec: str, bitrate: int) -> List[str]:
+        """Kodlama argümanları (-threads iş başına CPU payına göre)"""
+        return ['-vn', '-c:a', self.encoder(codec), '-b:a', f'{bitrate}k', '-threads', str(self.threads)]
+
+    def _run(self, source: str, output: str, bitrate: int, timeout: int):
+        """ffmpeg'i çalıştır ve bitmesini bekle (thread içinden çağrılır)"""
+        process = spawn_ffmpeg(
+            [
+                '-hide_banner', '-loglevel', 'error', '-y',
+                '-i', source, *self.ffmpeg_args('mp3', bitrate), '-f', 'mp3', output
+            ],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        try:
+            wait_ffmpeg(process, timeout)
+        finally:
+            if process.poll() is None:
+                kill_group(process)
+                process.wait()
+            process.stderr.close()
+
+    async def to_mp3(self, source: str, bitrate: int, timeout: int = DOWNLOAD_JOB_TIMEOUT,
+                     progress_callback: Optional[Callable[[Dict], None]] = None) -> str:
+        """
+        İndirilen kaynağı MP3'e dönüştür, kaynağı sil ve MP3 yolunu döndür.
+        Dönüştürme slotu yoksa sırada beklenir; bu sırada indirme ve yüklemeler devam eder.
+        Slot alınınca progress_callback'e 'transcoding' olayı gönderilir.
+        """
+        output = source.rsplit(".", 1)[0] + ".mp3"
+        target = output + ".part" if output == source else output
+
+        async with load_control.slot('transcode'):
+            if progress_callback:
+                progress_callback({'status': 'transcoding', 'filename': source})
+            start = time.time()
+            try:
+                await asyncio.to_thread(self._run, source, target, bitrate, timeout or None)
+            except BaseException:
+                self.stats['failed'] += 1
+                if os.path.exists(target) and target != source:
+                    os.remove(target)
+                raise
+
+        elapsed = time.time() - start
+        self.stats['completed'] += 1
+        self.stats['total_seconds'] += elapsed
+        if target != output:
+            os.replace(target, output)
+        elif os.path.exists(source):
+            os.remove(source)
+        logger.info(f"MP3 dönüştürme tamamlandı ({elapsed:.1f} sn, {self.threads} thread): {os.path.basename(output)}")
+        return output
+
+    def get_status(self) -> Dict:
+        """Havuz ayarları ve sayaçlar"""
+        completed = self.stats['completed']
+        return {
+            'cpu_budget': self.cpu_budget,
+            'threads_per_job': self.threads,
+            'slots': load_control.limits['transcode'],
+            'encoders': [name for names in ENCODER_PREFERENCES.values() for name in names if name in (self.encoders or [])],
+            'completed': completed,
+            'failed': self.stats['failed'],
+            'avg_seconds': round(self.stats['total_seconds'] / completed, 2) if completed else None
+        }
+
+
+# Global instance
+transcode_pool = TranscodePool()
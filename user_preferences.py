@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+🎚️ Naofumi Bot Kullanıcı Tercihleri
+Kullanıcı bazlı indirme tercihlerini (örn. ses teslim modu) saklar
+"""
+
+import threading
+from typing import Any
+
+from json_file import JsonFile
+
+# Ses teslim modları: 'mp3' yeniden kodlar, 'native' orijinal sesi (M4A/Opus) akış kopyasıyla gönderir
+AUDIO_MODES = ('mp3', 'native')
+
+# Art arda yapılan değişiklikler (örn. ayar menüsünde gezinme) tek yazmada birleşir (saniye)
+SAVE_DELAY = 2
+
+
+class UserPreferences:
+    def __init__(self):
+        """Kullanıcı tercihlerini başlat"""
+        self.preferences_file = "user_preferences.json"
+        self.lock = threading.Lock()
+        self.store = JsonFile(self.preferences_file, "Kullanıcı tercihleri", lambda: self.preferences, SAVE_DELAY, self.lock)
+
+        # {str(user_id): {tercih: değer}}
+        self.preferences = self.store.load()
+
+    def flush(self):
+        """Ertelenmiş kaydı beklemeden yaz"""
+        self.store.flush()
+
+    def get(self, user_id: int, key: str, default: Any = None) -> Any:
+        """Kullanıcının tercihini döndür, yoksa default"""
+        return self.preferences.get(str(user_id), {}).get(key, default)
+
+    def set(self, user_id: int, key: str, value: Any):
+        """Tercihi kaydet (None verilirse silinir ve genel ayar kullanılır); dosya SAVE_DELAY sonra yazılır"""
+        with self.lock:
+            user_prefs = self.preferences.setdefault(str(user_id), {})
+            if value is None:
+                user_prefs.pop(key, None)
+            else:
+                user_prefs[key] = value
+            if not user_prefs:
+                self.preferences.pop(str(user_id), None)
+            self.store.schedule()
+
+
+# Global instance
+user_preferences = UserPreferences()
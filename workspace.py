@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+📂 Naofumi Bot İş Çalışma Alanları
+Her indirme işine kendi geçici klasörünü verir; çıktı yolu tahmin edilmez, iş bitince klasör silinir.
+Bitmemiş kalıcı işlerin (job_store) klasörleri yeniden başlatmada korunur, yarım indirmeler devam eder
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import logging
+from typing import Dict, Iterable, Optional
+
+from config import WORKSPACE_ROOT
+from job_store import job_store
+
+logger = logging.getLogger(__name__)
+
+# yt-dlp çıktı adı: başlık (bayt olarak kısaltılmış, yt-dlp tarafından temizlenmiş) + uzantı
+OUTPUT_TEMPLATE = '%(title).100B.%(ext)s'
+
+
+class Workspace:
+    def __init__(self, path: str, job_id: Optional[int] = None):
+        """Tek bir işin geçici klasörü"""
+        self.path = path
+        self.job_id = job_id
+        self.created_at = time.time()
+        self.reserved = 0            # İndirme öncesi ayrılan disk alanı (storage_manager)
+
+    @property
+    def outtmpl(self) -> str:
+        """Bu klasöre yazan yt-dlp çıktı şablonu"""
+        return os.path.join(self.path, OUTPUT_TEMPLATE)
+
+    def file(self, name: str) -> str:
+        """Klasör içindeki dosya yolu"""
+        return os.path.join(self.path, os.path.basename(name))
+
+    def contains(self, file_path: str) -> bool:
+        """Dosya bu klasörde mi?"""
+        return os.path.dirname(os.path.abspath(file_path)) == os.path.abspath(self.path)
+
+    def adopt(self, file_path: str) -> str:
+        """
+        Başka bir işin klasöründeki dosyayı bu klasöre bağla (hard link, olmazsa kopya).
+        Birleştirilmiş (single-flight) indirmelerde her abone kendi kopyasına sahip olur.
+        """
+        if self.contains(file_path):
+            return file_path
+        target = self.file(file_path)
+        try:
+            os.link(file_path, target)
+        except OSError:
+            shutil.copy2(file_path, target)
+        return target
+
+
+class WorkspaceManager:
+    def __init__(self, root: str = WORKSPACE_ROOT):
+        """Çalışma alanı yöneticisini başlat, önceki çalışmadan kalan sahipsiz klasörleri temizle"""
+        self.root = root
+        self.active: Dict[str, Workspace] = {}
+        self.stats = {'created': 0, 'resumed': 0, 'removed': 0}
+
+        os.makedirs(self.root, exist_ok=True)
+        self.cleanup_stale(keep=job_store.workspaces())
+
+    def cleanup_stale(self, keep: Iterable[str] = ()):
+        """Çökme/yeniden başlatma sonrası sahipsiz kalan iş klasörlerini sil (keep: sürdürülecek işlerinki)"""
+        keep = {os.path.abspath(path) for path in keep}
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if path not in self.active and os.path.abspath(path) not in keep and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def create(self, label: str = 'job') -> Workspace:
+        """
+        Yeni iş klasörü oluştur. Kalıcı bir iş içinden çağrılırsa klasör işe kaydedilir;
+        iş yeniden başlatmadan sonra sürdürülüyorsa eski klasörü (yarım .part dosyalarıyla) döner.
+        """
+        job = job_store.get(job_store.current())
+        if job and job['workspace'] and os.path.isdir(job['workspace']):
+            workspace = Workspace(job['workspace'], job['id'])
+            self.active[workspace.path] = workspace
+            self.stats['resumed'] += 1
+            logger.info(f"İş {job['id']} önceki çalışma klasörüyle sürdürülüyor: {workspace.path}")
+            return workspace
+
+        workspace = Workspace(tempfile.mkdtemp(prefix=f"{label}_", dir=self.root), job and job['id'])
+        self.active[workspace.path] = workspace
+        if job:
+            job_store.set_workspace(job['id'], workspace.path)
+        self.stats['created'] += 1
+        return workspace
+
+    def remove(self, workspace: Workspace):
+        """İş bitti: klasörü içindekilerle birlikte sil"""
+        if workspace is None or self.active.pop(workspace.path, None) is None:
+            return
+        shutil.rmtree(workspace.path, ignore_errors=True)
+        self.stats['removed'] += 1
+
+    def remove_job(self, job_id: int):
+        """Kalıcı iş bitti: işe ait klasörleri sil"""
+        for workspace in list(self.active.values()):
+            if workspace.job_id == job_id:
+                self.remove(workspace)
+
+    def get_status(self) -> Dict:
+        """Aktif çalışma alanları"""
+        return {
+            'root': self.root,
+            'active': len(self.active),
+            **self.stats
+        }
+
+
+# Global instance
+workspaces = WorkspaceManager()